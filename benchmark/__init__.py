@@ -0,0 +1,3 @@
+"""
+性能测试工具，不属于插件本身，不会被 NoneBot 加载
+"""
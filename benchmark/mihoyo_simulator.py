@@ -0,0 +1,763 @@
+"""
+米游社API离线模拟器
+
+在本地模拟插件使用的所有米游社接口（``api/common.py``、``api/game_sign_api.py``、``api/myb_missions_api.py``
+中的 ``URL_*``），用于在不访问米哈游服务器的情况下进行压力测试。支持：
+
+- 可配置的响应耗时分布（全局或按接口）
+- 网络错误、HTTP 5xx 和 retcode（如 1034 人机验证、-100 登录失效、1008 重复签到）的按概率注入
+- 按客户端IP的令牌桶限速（超出时返回 HTTP 429）
+- 按账户（米游社UID）保存签到、米游币任务等状态，重复执行时行为与真实接口一致
+
+两种运行方式：
+
+- 作为 httpx 的 ``MockTransport`` 在同一进程中使用::
+
+    simulator = MihoyoSimulator(SimulatorConfig(seed=1))
+    async with httpx.AsyncClient(transport=simulator.transport()) as client:
+        ...
+
+- 作为独立的 ASGI 服务运行（需要 uvicorn），插件进程通过 ``remote_transport`` 将请求转发到该服务::
+
+    python -m benchmark.mihoyo_simulator --port 8765 --config simulator.json
+
+接口按路径区分（不同主机上的接口路径互不相同），因此转发时只需替换请求的主机。
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple, Callable, Awaitable, Any, Literal, Set, Mapping
+
+import httpx
+from pydantic import BaseModel
+
+__all__ = ["LatencyModel", "FaultConfig", "SimulatorConfig", "SimulatorResponse", "MihoyoSimulator",
+           "remote_transport", "ENDPOINTS"]
+
+SimulatorResponse = Tuple[int, List[Tuple[str, str]], bytes]
+"""(HTTP状态码, 响应头, 响应体)"""
+
+RETCODE_MESSAGES = {
+    -100: "登录失效，请重新登录",
+    1008: "重复签到",
+    1034: "请求频繁，请完成验证",
+    -110: "网络出小差了，请稍后重试",
+    10001: "请先登录",
+}
+"""注入 retcode 时使用的消息"""
+
+EXPIRED_RETCODES = {"game_record": 10001}
+"""{接口名称: 登录失效时的 retcode}，未列出的接口返回 -100"""
+
+STATIC_ICON_PATH = "/simulator/static/icon.png"
+"""签到奖励等图片使用的路径"""
+
+_ICON_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+    "0000000c4944415408d763f8ffff3f0005fe02fea7d6a4480000000049454e44ae426082"
+)
+"""1x1 像素的 PNG 图片"""
+
+
+class LatencyModel(BaseModel):
+    """
+    响应耗时分布
+    """
+    distribution: Literal["constant", "uniform", "lognormal"] = "lognormal"
+    """分布类型"""
+    median: float = 0.08
+    """``constant`` 的耗时，或 ``lognormal`` 的中位数（单位：秒）"""
+    sigma: float = 0.4
+    """``lognormal`` 的对数标准差，越大长尾越明显"""
+    low: float = 0.02
+    """``uniform`` 的下限（单位：秒）"""
+    high: float = 0.2
+    """``uniform`` 的上限（单位：秒）"""
+    max: float = 10
+    """耗时上限（单位：秒）"""
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        生成一次响应的耗时
+        """
+        if self.distribution == "constant":
+            value = self.median
+        elif self.distribution == "uniform":
+            value = rng.uniform(self.low, self.high)
+        else:
+            value = self.median * math.exp(rng.gauss(0, self.sigma))
+        return min(max(value, 0.0), self.max)
+
+
+class FaultConfig(BaseModel):
+    """
+    故障注入设置（均为每次请求发生的概率）
+    """
+    network_error: float = 0
+    """连接失败（``MockTransport`` 中抛出 ``httpx.ConnectError``，ASGI 服务中返回 HTTP 503）"""
+    server_error: float = 0
+    """返回 HTTP 500"""
+    retcodes: Dict[int, float] = {}
+    """{retcode: 概率}，如 ``{1034: 0.01, -100: 0.001}``；游戏签到接口的 1034 以 ``risk_code`` 的形式返回"""
+
+
+class SimulatorConfig(BaseModel):
+    """
+    模拟器设置
+    """
+    seed: Optional[int] = None
+    """随机数种子，设置后耗时和故障注入可复现"""
+    latency: LatencyModel = LatencyModel()
+    """默认响应耗时分布"""
+    endpoint_latency: Dict[str, LatencyModel] = {}
+    """{接口名称: 响应耗时分布}，接口名称见 ``ENDPOINTS``"""
+    faults: FaultConfig = FaultConfig()
+    """默认故障注入设置"""
+    endpoint_faults: Dict[str, FaultConfig] = {}
+    """{接口名称: 故障注入设置}，覆盖默认设置"""
+    rate_limit: float = 0
+    """每个客户端IP每秒允许的请求数，为 0 则不限速"""
+    rate_burst: int = 50
+    """每个客户端IP允许的最大突发请求数"""
+    games: List[int] = [2, 6, 8]
+    """每个账户拥有的游戏账号（游戏ID：2 原神、6 崩坏：星穹铁道、8 绝区零）"""
+    expired_uids: Set[str] = set()
+    """登录已失效的米游社UID，这些账户需要登录的请求总是返回登录失效（见 ``EXPIRED_RETCODES``）"""
+    qrcode_scan_polls: int = 2
+    """二维码登录时，查询多少次后变为已扫描（再查询一次后确认登录）"""
+    post_count: int = 20
+    """帖子列表每次返回的帖子数量"""
+
+
+class _TokenBucket:
+    """
+    非阻塞的令牌桶，令牌不足时直接拒绝
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _AccountState:
+    """
+    单个米游社账户在模拟器中的状态
+    """
+
+    def __init__(self, bbs_uid: str):
+        self.bbs_uid = bbs_uid
+        """米游社UID"""
+        self.points = 1000
+        """米游币数量"""
+        self.game_signs: Dict[str, int] = {}
+        """{act_id: 本月签到天数}"""
+        self.signed_acts: Set[str] = set()
+        """今日已签到的 act_id"""
+        self.missions: Dict[str, int] = {}
+        """{任务键: 今日完成次数}"""
+        self.liked_posts: Set[str] = set()
+        """已点赞的帖子"""
+
+
+class _Request:
+    """
+    模拟器内部使用的请求数据
+    """
+
+    def __init__(self, method: str, url: httpx.URL, headers: Mapping[str, str], body: bytes, client_ip: str):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.client_ip = client_ip
+        # 插件发送的 Cookie 中可能有没有值的项（如 ``stoken_v1``），SimpleCookie 遇到时会放弃整个请求头，因此逐项解析
+        self.cookies: Dict[str, str] = {}
+        for item in headers.get("cookie", "").split(";"):
+            key, _, value = item.strip().partition("=")
+            if key and value:
+                self.cookies[key] = value
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @property
+    def bbs_uid(self) -> Optional[str]:
+        """
+        从 Cookies 或查询参数中获取米游社UID
+        """
+        for key in ("stuid", "ltuid", "account_id", "ltuid_v2", "account_id_v2", "login_uid"):
+            if value := self.cookies.get(key):
+                return value
+        return self.url.params.get("uid")
+
+
+_Handler = Callable[["MihoyoSimulator", _Request, _AccountState], Awaitable[Any]]
+
+ENDPOINTS: Dict[str, Tuple[str, bool]] = {}
+"""{路径: (接口名称, 是否需要登录)}"""
+_HANDLERS: Dict[str, _Handler] = {}
+"""{路径: 处理函数}"""
+
+
+def _route(path: str, name: str, auth: bool = True):
+    """
+    注册接口
+
+    :param path: 请求路径
+    :param name: 接口名称，用于按接口设置耗时和故障注入
+    :param auth: 是否需要登录（登录失效的账户返回 -100）
+    """
+
+    def decorator(func: _Handler) -> _Handler:
+        ENDPOINTS[path] = name, auth
+        _HANDLERS[path] = func
+        return func
+
+    return decorator
+
+
+def _ok(data: Any = None, message: str = "OK") -> Dict[str, Any]:
+    return {"retcode": 0, "message": message, "data": data}
+
+
+def _account_ok(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    webapi.account.mihoyo.com 的返回格式
+    """
+    return {"code": 200, "data": {"status": 1, "msg": "成功", **data}}
+
+
+def _token(prefix: str = "") -> str:
+    return prefix + uuid.uuid4().hex
+
+
+class MihoyoSimulator:
+    """
+    米游社API模拟器
+
+    >>> simulator = MihoyoSimulator(SimulatorConfig(faults=FaultConfig(retcodes={1034: 0.05})))
+    >>> transport = simulator.transport()
+    """
+
+    def __init__(self, config: Optional[SimulatorConfig] = None):
+        self.config = config or SimulatorConfig()
+        """模拟器设置"""
+        self.rng = random.Random(self.config.seed)
+        """耗时和故障注入使用的随机数生成器"""
+        self.accounts: Dict[str, _AccountState] = {}
+        """{米游社UID: 账户状态}"""
+        self.requests: Dict[str, int] = {}
+        """{接口名称: 请求次数}"""
+        self.injected: Dict[str, int] = {}
+        """{注入的故障类型: 次数}"""
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._qrcode_polls: Dict[str, int] = {}
+
+    def account(self, bbs_uid: Optional[str]) -> _AccountState:
+        """
+        获取账户状态，不存在时创建
+        """
+        bbs_uid = bbs_uid or "0"
+        if (state := self.accounts.get(bbs_uid)) is None:
+            state = self.accounts[bbs_uid] = _AccountState(bbs_uid)
+        return state
+
+    def new_day(self):
+        """
+        模拟跨日：清空所有账户的今日签到和米游币任务进度
+        """
+        for state in self.accounts.values():
+            state.signed_acts.clear()
+            state.missions.clear()
+            state.liked_posts.clear()
+
+    def _count(self, table: Dict[str, int], key: str):
+        table[key] = table.get(key, 0) + 1
+
+    def _fault(self, name: str) -> FaultConfig:
+        return self.config.endpoint_faults.get(name, self.config.faults)
+
+    def _rate_limited(self, client_ip: str) -> bool:
+        if self.config.rate_limit <= 0:
+            return False
+        if (bucket := self._buckets.get(client_ip)) is None:
+            bucket = self._buckets[client_ip] = _TokenBucket(self.config.rate_limit, self.config.rate_burst)
+        return not bucket.take()
+
+    async def handle(self, request: _Request) -> SimulatorResponse:
+        """
+        处理一次请求
+
+        :raise httpx.ConnectError: 注入网络错误时
+        """
+        path = request.url.path
+        if path == STATIC_ICON_PATH:
+            return 200, [("content-type", "image/png")], _ICON_BYTES
+        if path not in ENDPOINTS:
+            return 404, [("content-type", "application/json")], \
+                json.dumps({"retcode": -404, "message": f"simulator: unknown path {path}"}).encode()
+
+        name, auth = ENDPOINTS[path]
+        self._count(self.requests, name)
+        await asyncio.sleep(self.config.endpoint_latency.get(name, self.config.latency).sample(self.rng))
+
+        if self._rate_limited(request.client_ip):
+            self._count(self.injected, "rate_limited")
+            return 429, [("content-type", "application/json")], \
+                json.dumps({"retcode": -429, "message": "Too Many Requests"}).encode()
+
+        fault = self._fault(name)
+        if fault.network_error and self.rng.random() < fault.network_error:
+            self._count(self.injected, "network_error")
+            raise httpx.ConnectError("simulator: injected connection failure")
+        if fault.server_error and self.rng.random() < fault.server_error:
+            self._count(self.injected, "server_error")
+            return 500, [("content-type", "text/plain")], b"Internal Server Error"
+
+        headers: List[Tuple[str, str]] = [("content-type", "application/json; charset=utf-8"),
+                                          ("date", time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime()))]
+        bbs_uid = request.bbs_uid
+        if auth and bbs_uid in self.config.expired_uids:
+            retcode = EXPIRED_RETCODES.get(name, -100)
+            content = {"retcode": retcode, "message": RETCODE_MESSAGES[retcode], "data": None}
+        elif (retcode := self._inject_retcode(fault)) is not None:
+            self._count(self.injected, str(retcode))
+            if retcode == 1034 and name == "game_sign":
+                content = _ok({"code": "ok", "risk_code": 375, "gt": _token(), "challenge": _token(), "success": 1})
+            else:
+                content = {"retcode": retcode, "message": RETCODE_MESSAGES.get(retcode, "simulator"), "data": None}
+        else:
+            content = await _HANDLERS[path](self, request, self.account(bbs_uid))
+            if isinstance(content, tuple):
+                content, cookies = content
+                headers += [("set-cookie", f"{key}={value}; Path=/; Domain=.mihoyo.com") for key, value in
+                            cookies.items()]
+        return 200, headers, json.dumps(content, ensure_ascii=False).encode()
+
+    def _inject_retcode(self, fault: FaultConfig) -> Optional[int]:
+        point = self.rng.random()
+        for retcode, probability in fault.retcodes.items():
+            if point < probability:
+                return retcode
+            point -= probability
+        return None
+
+    async def _mock_handler(self, request: httpx.Request) -> httpx.Response:
+        content = await request.aread()
+        try:
+            status, headers, body = await self.handle(_Request(
+                request.method, request.url, request.headers, content,
+                request.headers.get("x-forwarded-for", "127.0.0.1")
+            ))
+        except httpx.ConnectError as e:
+            raise httpx.ConnectError(str(e), request=request)
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+    def transport(self) -> httpx.MockTransport:
+        """
+        获取在当前进程中处理请求的 httpx 传输层
+
+        请求的客户端IP取自 ``X-Forwarded-For`` 请求头，默认为 ``127.0.0.1``
+        """
+        return httpx.MockTransport(self._mock_handler)
+
+    async def __call__(self, scope: Dict[str, Any], receive, send):
+        """
+        ASGI 应用入口
+        """
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        url = httpx.URL(scheme=scope.get("scheme", "http"), host=headers.get("host", "localhost").split(":")[0],
+                        path=scope["path"], query=scope.get("query_string", b""))
+        client_ip = headers.get("x-forwarded-for") or (scope.get("client") or ("127.0.0.1",))[0]
+        try:
+            status, response_headers, content = await self.handle(
+                _Request(scope["method"], url, headers, body, client_ip))
+        except httpx.ConnectError:
+            status, response_headers, content = 503, [("content-type", "text/plain")], b"Service Unavailable"
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(key.encode("latin-1"), value.encode("latin-1")) for key, value in response_headers]
+        })
+        await send({"type": "http.response.body", "body": content})
+
+    # ---------------- 登录与 Cookies ----------------
+
+    @_route("/Api/is_mobile_registrable", "is_mobile_registrable", auth=False)
+    async def _is_mobile_registrable(self, _: _Request, __: _AccountState):
+        return _account_ok({"is_registable": False})
+
+    @_route("/Api/create_mmt", "create_mmt", auth=False)
+    async def _create_mmt(self, _: _Request, __: _AccountState):
+        return _account_ok({"mmt_data": {"challenge": _token(), "gt": _token(), "mmt_key": _token(),
+                                         "new_captcha": True, "risk_type": "", "success": 1, "use_v4": False}})
+
+    @_route("/Api/create_mobile_captcha", "create_mobile_captcha", auth=False)
+    async def _create_mobile_captcha(self, _: _Request, __: _AccountState):
+        return _account_ok({})
+
+    @_route("/Api/login_by_mobilecaptcha", "login_by_mobilecaptcha", auth=False)
+    async def _login_by_mobilecaptcha(self, _: _Request, __: _AccountState):
+        bbs_uid = str(self.rng.randint(100000000, 399999999))
+        return _account_ok({"account_info": {"account_id": bbs_uid}}), \
+            {"login_ticket": _token(), "login_uid": bbs_uid}
+
+    @_route("/Api/login_by_password", "login_by_password", auth=False)
+    async def _login_by_password(self, _: _Request, __: _AccountState):
+        bbs_uid = str(self.rng.randint(100000000, 399999999))
+        return _account_ok({"account_info": {"account_id": bbs_uid}}), \
+            {"login_ticket": _token(), "login_uid": bbs_uid, "stuid": bbs_uid}
+
+    @_route("/account/auth/api/webLoginByMobile", "web_login_by_mobile", auth=False)
+    async def _web_login_by_mobile(self, _: _Request, __: _AccountState):
+        bbs_uid = str(self.rng.randint(100000000, 399999999))
+        return _ok({"account_id": bbs_uid}), \
+            {"cookie_token": _token(), "account_id": bbs_uid, "ltuid": bbs_uid, "ltoken": _token()}
+
+    @_route("/auth/api/getMultiTokenByLoginTicket", "multi_token_by_login_ticket")
+    async def _multi_token(self, _: _Request, __: _AccountState):
+        return _ok({"list": [{"name": "stoken", "token": _token()}, {"name": "ltoken", "token": _token()}]})
+
+    @_route("/account/auth/api/getCookieAccountInfoBySToken", "cookie_token_by_stoken")
+    async def _cookie_token_by_stoken(self, _: _Request, account: _AccountState):
+        return _ok({"uid": account.bbs_uid, "cookie_token": _token()})
+
+    @_route("/account/auth/api/getLTokenBySToken", "ltoken_by_stoken")
+    async def _ltoken_by_stoken(self, _: _Request, __: _AccountState):
+        return _ok({"ltoken": _token()})
+
+    @_route("/account/ma-cn-session/app/getTokenBySToken", "stoken_v2_by_v1")
+    async def _stoken_v2_by_v1(self, _: _Request, account: _AccountState):
+        return _ok({"token": {"token_type": 1, "token": _token("v2_")},
+                    "user_info": {"aid": account.bbs_uid, "mid": _token()[:12]}})
+
+    @_route("/auth/api/getActionTicketBySToken", "action_ticket")
+    async def _action_ticket(self, _: _Request, __: _AccountState):
+        return _ok({"ticket": _token()})
+
+    @_route("/hk4e_cn/combo/panda/qrcode/fetch", "fetch_game_token_qrcode", auth=False)
+    async def _fetch_qrcode(self, _: _Request, __: _AccountState):
+        ticket = _token()
+        self._qrcode_polls[ticket] = 0
+        return _ok({"url": f"https://user.mihoyo.com/qr_code_in_game.html?app_id=1&biz_key=bbs_cn&ticket={ticket}"})
+
+    @_route("/hk4e_cn/combo/panda/qrcode/query", "query_game_token_qrcode", auth=False)
+    async def _query_qrcode(self, request: _Request, __: _AccountState):
+        ticket = request.json().get("ticket")
+        if ticket not in self._qrcode_polls:
+            return {"retcode": -106, "message": "二维码已过期", "data": None}
+        polls = self._qrcode_polls[ticket] = self._qrcode_polls[ticket] + 1
+        if polls < self.config.qrcode_scan_polls:
+            return _ok({"stat": "Init", "payload": {}})
+        if polls == self.config.qrcode_scan_polls:
+            return _ok({"stat": "Scanned", "payload": {}})
+        del self._qrcode_polls[ticket]
+        raw = json.dumps({"uid": str(self.rng.randint(100000000, 399999999)), "token": _token()})
+        return _ok({"stat": "Confirmed", "payload": {"proto": "Account", "raw": raw}})
+
+    @_route("/account/ma-cn-session/app/getTokenByGameToken", "token_by_game_token", auth=False)
+    async def _token_by_game_token(self, request: _Request, __: _AccountState):
+        bbs_uid = str(request.json().get("account_id") or self.rng.randint(100000000, 399999999))
+        return _ok({"token": {"token_type": 1, "token": _token("v2_")},
+                    "user_info": {"aid": bbs_uid, "mid": _token()[:12]}})
+
+    @_route("/auth/api/getCookieAccountInfoByGameToken", "cookie_token_by_game_token", auth=False)
+    async def _cookie_token_by_game_token(self, _: _Request, __: _AccountState):
+        return _ok({"uid": "", "cookie_token": _token(), "token": {"token": _token()}})
+
+    @_route("/device-fp/api/getFp", "device_fp", auth=False)
+    async def _device_fp(self, _: _Request, __: _AccountState):
+        return _ok({"device_fp": _token()[:13], "code": 200, "msg": "ok"})
+
+    @_route("/apihub/api/deviceLogin", "device_login")
+    async def _device_login(self, _: _Request, __: _AccountState):
+        return _ok({})
+
+    @_route("/apihub/api/saveDevice", "device_save")
+    async def _device_save(self, _: _Request, __: _AccountState):
+        return _ok({})
+
+    @_route("/misc/api/createVerification", "create_verification")
+    async def _create_verification(self, _: _Request, __: _AccountState):
+        return _ok({"challenge": _token(), "gt": _token(), "new_captcha": 1, "success": 1})
+
+    @_route("/misc/api/verifyVerification", "verify_verification")
+    async def _verify_verification(self, request: _Request, __: _AccountState):
+        return _ok({"challenge": request.json().get("geetest_challenge")})
+
+    # ---------------- 账户信息 ----------------
+
+    @_route("/user/api/getUserFullInfo", "user_info")
+    async def _user_info(self, _: _Request, account: _AccountState):
+        return _ok({"user_info": {"uid": account.bbs_uid, "nickname": f"sim{account.bbs_uid}"}})
+
+    @_route("/game_record/card/wapi/getGameRecordCard", "game_record")
+    async def _game_record(self, _: _Request, account: _AccountState):
+        regions = {2: ("cn_gf01", "天空岛"), 6: ("prod_gf_cn", "星穹列车"), 8: ("prod_gf_cn", "新艾利都")}
+        return _ok({"list": [
+            {"game_id": game_id, "region": regions.get(game_id, ("cn_gf01", ""))[0],
+             "region_name": regions.get(game_id, ("", "官服"))[1], "game_role_id": f"{game_id}{account.bbs_uid}",
+             "nickname": f"sim{account.bbs_uid}", "level": 60}
+            for game_id in self.config.games
+        ]})
+
+    @_route("/apihub/api/getGameList", "game_list", auth=False)
+    async def _game_list(self, _: _Request, __: _AccountState):
+        games = [(1, "bh3", "崩坏3"), (2, "ys", "原神"), (3, "bh2", "崩坏学园2"), (4, "wd", "未定事件簿"),
+                 (5, "dby", "大别野"), (6, "sr", "崩坏：星穹铁道"), (8, "zzz", "绝区零")]
+        return _ok({"list": [{"id": game_id, "name": name, "en_name": en_name, "op_name": en_name,
+                              "app_icon": STATIC_ICON_PATH, "icon": STATIC_ICON_PATH}
+                             for game_id, en_name, name in games]})
+
+    @_route("/common/homutreasure/v1/web/user/point", "myb")
+    async def _myb(self, _: _Request, account: _AccountState):
+        return _ok({"points": account.points})
+
+    @_route("/account/address/list", "address")
+    async def _address(self, _: _Request, account: _AccountState):
+        return _ok({"list": [{"id": f"1{account.bbs_uid}", "connect_name": "模拟用户", "connect_areacode": "+86",
+                              "connect_mobile": "138****0000", "province_name": "上海市", "city_name": "上海市",
+                              "county_name": "徐汇区", "addr_ext": "模拟地址"}]})
+
+    # ---------------- 游戏签到 ----------------
+
+    @_route("/event/luna/home", "game_sign_rewards", auth=False)
+    async def _game_sign_rewards(self, request: _Request, __: _AccountState):
+        icon = str(request.url.copy_with(path=STATIC_ICON_PATH, query=None))
+        return _ok({"month": time.localtime().tm_mon,
+                    "awards": [{"name": "原石" if day % 2 else "摩拉", "icon": icon, "cnt": 20 * (day % 3 + 1)}
+                               for day in range(1, 32)]})
+
+    @_route("/event/luna/info", "game_sign_info")
+    async def _game_sign_info(self, request: _Request, account: _AccountState):
+        act_id = request.url.params.get("act_id", "")
+        return _ok({"is_sign": act_id in account.signed_acts,
+                    "total_sign_day": account.game_signs.get(act_id, 0),
+                    "sign_cnt_missed": 0})
+
+    @_route("/event/luna/sign", "game_sign")
+    async def _game_sign(self, request: _Request, account: _AccountState):
+        act_id = request.json().get("act_id", "")
+        if act_id in account.signed_acts:
+            return {"retcode": -5003, "message": "旅行者，你已经签到过了~", "data": None}
+        account.signed_acts.add(act_id)
+        account.game_signs[act_id] = account.game_signs.get(act_id, 0) % 31 + 1
+        return _ok({"code": "", "risk_code": 0, "gt": "", "challenge": "", "success": 0})
+
+    # ---------------- 米游币任务 ----------------
+
+    MISSIONS = [
+        {"id": 58, "name": "连续签到", "points": 0, "mission_key": "continuous_sign", "threshold": 1},
+        {"id": 59, "name": "看帖子", "points": 20, "mission_key": "view_post_0", "threshold": 3},
+        {"id": 60, "name": "给帖子点赞", "points": 30, "mission_key": "post_up_0", "threshold": 5},
+        {"id": 61, "name": "分享帖子", "points": 10, "mission_key": "share_post_0", "threshold": 1},
+    ]
+    """米游币任务列表"""
+
+    def _mission_progress(self, account: _AccountState, key: str):
+        mission = next(mission for mission in self.MISSIONS if mission["mission_key"] == key)
+        happened = account.missions.get(key, 0)
+        if happened < mission["threshold"]:
+            account.missions[key] = happened + 1
+            if happened + 1 == mission["threshold"]:
+                account.points += mission["points"]
+
+    @_route("/apihub/wapi/getMissions", "missions")
+    async def _missions(self, _: _Request, __: _AccountState):
+        return _ok({"missions": self.MISSIONS})
+
+    @_route("/apihub/wapi/getUserMissionsState", "missions_state")
+    async def _missions_state(self, _: _Request, account: _AccountState):
+        return _ok({"states": [{"mission_key": key, "happened_times": value}
+                               for key, value in account.missions.items()],
+                    "total_points": account.points})
+
+    @_route("/apihub/app/api/signIn", "bbs_sign")
+    async def _bbs_sign(self, _: _Request, account: _AccountState):
+        if account.missions.get("continuous_sign"):
+            return {"retcode": 1008, "message": RETCODE_MESSAGES[1008], "data": None}
+        self._mission_progress(account, "continuous_sign")
+        account.points += 20
+        return _ok({"points": 20})
+
+    @_route("/post/api/feeds/posts", "posts", auth=False)
+    async def _posts(self, request: _Request, __: _AccountState):
+        gids = request.url.params.get("gids", "0")
+        return _ok({"list": [{"post": {"post_id": f"{gids}{self.rng.randint(10000000, 99999999)}"},
+                              "self_operation": {"attitude": 0}}
+                             for _ in range(self.config.post_count)]})
+
+    @_route("/post/api/getPostFull", "read_post")
+    async def _read_post(self, request: _Request, account: _AccountState):
+        self._mission_progress(account, "view_post_0")
+        return _ok({"post": {"post": {"post_id": request.url.params.get("post_id")},
+                             "self_operation": {"attitude": 0}}})
+
+    @_route("/apihub/sapi/upvotePost", "like_post")
+    async def _like_post(self, request: _Request, account: _AccountState):
+        post_id = str(request.json().get("post_id"))
+        if post_id not in account.liked_posts:
+            account.liked_posts.add(post_id)
+            self._mission_progress(account, "post_up_0")
+        return _ok({})
+
+    @_route("/apihub/api/getShareConf", "share_post")
+    async def _share_post(self, _: _Request, account: _AccountState):
+        self._mission_progress(account, "share_post_0")
+        return _ok({"title": "simulator", "url": STATIC_ICON_PATH})
+
+    # ---------------- 实时便笺 ----------------
+
+    def _genshin_note(self):
+        return _ok({"current_resin": self.rng.randint(0, 200), "max_resin": 200, "resin_recovery_time": "3600",
+                    "finished_task_num": 4, "total_task_num": 4, "current_expedition_num": 5,
+                    "max_expedition_num": 5, "current_home_coin": 2400, "max_home_coin": 2400,
+                    "transformer": {"obtained": True, "recovery_time": {"Day": 0, "Hour": 0, "Minute": 0,
+                                                                        "Second": 0, "reached": True}}})
+
+    @_route("/game_record/app/genshin/api/dailyNote", "genshin_note_bbs")
+    async def _genshin_note_bbs(self, _: _Request, __: _AccountState):
+        return self._genshin_note()
+
+    @_route("/game_record/genshin/aapi/widget/v2", "genshin_note_widget")
+    async def _genshin_note_widget(self, _: _Request, __: _AccountState):
+        return self._genshin_note()
+
+    def _starrail_note(self):
+        return _ok({"current_stamina": self.rng.randint(0, 240), "max_stamina": 240, "stamina_recover_time": 3600,
+                    "current_train_score": 500, "max_train_score": 500, "current_rogue_score": 14000,
+                    "max_rogue_score": 14000, "accepted_expedition_num": 4, "total_expedition_num": 4,
+                    "has_signed": True})
+
+    @_route("/game_record/app/hkrpg/api/note", "starrail_note_bbs")
+    async def _starrail_note_bbs(self, _: _Request, __: _AccountState):
+        return self._starrail_note()
+
+    @_route("/game_record/app/hkrpg/aapi/widget", "starrail_note_widget")
+    async def _starrail_note_widget(self, _: _Request, __: _AccountState):
+        return self._starrail_note()
+
+    def _zzz_note(self):
+        return _ok({"energy": {"progress": {"current": self.rng.randint(0, 240), "max": 240}, "restore": 3600},
+                    "vitality": {"current": 400, "max": 400}, "vhs_sale": {"sale_state": "SaleStateDone"},
+                    "card_sign": "CardSignDone", "has_signed": True})
+
+    @_route("/event/game_record_zzz/api/zzz/note", "zzz_note_bbs")
+    async def _zzz_note_bbs(self, _: _Request, __: _AccountState):
+        return self._zzz_note()
+
+    @_route("/event/game_record_zzz/api/zzz/widget", "zzz_note_widget")
+    async def _zzz_note_widget(self, _: _Request, __: _AccountState):
+        return self._zzz_note()
+
+    # ---------------- 米游币商城 ----------------
+
+    def _good(self, goods_id: str) -> Dict[str, Any]:
+        return {"goods_id": goods_id, "goods_name": f"模拟商品{goods_id}", "type": 2, "price": 500,
+                "icon": STATIC_ICON_PATH, "next_time": 0, "next_num": 100, "sale_start_time": 0, "status": "online",
+                "game_biz": "", "account_exchange_num": 0, "account_cycle_limit": 1, "account_cycle_type": "forever"}
+
+    @_route("/mall/v1/web/goods/list", "good_list", auth=False)
+    async def _good_list(self, request: _Request, __: _AccountState):
+        page = int(request.url.params.get("page", 1) or 1)
+        total = 45
+        start = (page - 1) * 20
+        return _ok({"list": [self._good(str(2023000 + i)) for i in range(start, min(start + 20, total))],
+                    "total": total})
+
+    @_route("/mall/v1/web/goods/detail", "good_detail", auth=False)
+    async def _good_detail(self, request: _Request, __: _AccountState):
+        return _ok(self._good(request.url.params.get("goods_id", "0")))
+
+    @_route("/mall/v1/web/goods/exchange", "exchange")
+    async def _exchange(self, _: _Request, account: _AccountState):
+        if account.points < 500:
+            return {"retcode": -1, "message": "米游币不足", "data": None}
+        account.points -= 500
+        return _ok({"order_sn": _token()[:16]})
+
+
+class _RemoteTransport(httpx.AsyncBaseTransport):
+    """
+    将请求转发到独立运行的模拟器服务
+    """
+
+    def __init__(self, base_url: str, transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs):
+        self._base_url = httpx.URL(base_url)
+        self._transport = transport or httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme=self._base_url.scheme, host=self._base_url.host,
+                                            port=self._base_url.port)
+        request.headers["host"] = request.url.netloc.decode("ascii")
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def remote_transport(base_url: str, transport: Optional[httpx.AsyncBaseTransport] = None,
+                     **kwargs) -> httpx.AsyncBaseTransport:
+    """
+    获取将所有请求转发到模拟器服务的 httpx 传输层
+
+    :param base_url: 模拟器服务地址，如 ``http://127.0.0.1:8765``
+    :param transport: 实际发送请求的传输层，为None则新建 ``httpx.AsyncHTTPTransport``
+    :param kwargs: 新建 ``httpx.AsyncHTTPTransport`` 时的参数（如 ``limits``）
+    """
+    return _RemoteTransport(base_url, transport, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="米游社API离线模拟器（ASGI 服务）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--config", help="SimulatorConfig 的 JSON 文件路径")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        parser.exit(1, "需要安装 uvicorn 才能以独立服务运行模拟器\n")
+    config = SimulatorConfig.parse_file(args.config) if args.config else SimulatorConfig()
+    uvicorn.run(MihoyoSimulator(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
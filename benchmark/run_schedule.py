@@ -0,0 +1,350 @@
+"""
+定时任务压力测试
+
+生成指定数量的模拟用户，在米游社API模拟器（``benchmark.mihoyo_simulator``）和模拟的消息发送函数上
+端到端执行 ``daily_schedule`` 与 ``auto_note_check``，统计耗时、每秒请求数、通知发送耗时、峰值内存（RSS）
+以及事件循环延迟，用于衡量 ``command/plan.py`` 等改动对大量用户场景的影响。
+
+每个用户数量在单独的子进程和临时目录中运行，因此峰值内存互不影响，也不会读写机器人的插件数据::
+
+    python -m benchmark.run_schedule --users 100 1000 10000
+    python -m benchmark.run_schedule --users 1000 --simulator-config simulator.json --output results.jsonl
+
+使用独立运行的模拟器服务（见 ``benchmark.mihoyo_simulator``）::
+
+    python -m benchmark.run_schedule --users 1000 --simulator-url http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import httpx
+
+from .mihoyo_simulator import MihoyoSimulator, SimulatorConfig, LatencyModel, remote_transport
+
+__all__ = ["LoopLagMonitor", "StandInSender", "generate_users", "load_plugin", "run_benchmark", "TASKS"]
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+"""仓库根目录（插件位于 ``plugins/mys-tools``）"""
+
+PLUGIN_MODULE = "plugins.mys-tools"
+"""插件模块名"""
+
+TASKS = ("daily_schedule", "auto_note_check")
+"""可测试的定时任务（``command/plan.py`` 中的函数名）"""
+
+RESULT_PREFIX = "BENCHMARK_RESULT "
+"""子进程输出测试结果的行前缀"""
+
+
+class LoopLagMonitor:
+    """
+    事件循环延迟监视器
+
+    以固定间隔休眠，记录每次实际唤醒时间比预期晚了多少；
+    同步的 CPU 密集操作（如序列化插件数据、合并消息）阻塞事件循环时延迟会升高。
+    """
+
+    def __init__(self, interval: float = 0.05):
+        """
+        :param interval: 采样间隔（单位：秒）
+        """
+        self.interval = interval
+        """采样间隔（单位：秒）"""
+        self.samples: List[float] = []
+        """每次采样的延迟（单位：秒）"""
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(time.perf_counter() - start - self.interval, 0.0))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def summary(self) -> Dict[str, float]:
+        """
+        :return: {"mean", "p99", "max"}，单位为毫秒
+        """
+        if not self.samples:
+            return {"mean": 0.0, "p99": 0.0, "max": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "mean": round(statistics.fmean(ordered) * 1000, 2),
+            "p99": round(ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)] * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2)
+        }
+
+
+class StandInSender:
+    """
+    代替 ``send_private_msg`` 的消息发送函数，用作 ``NotificationOutbox.sender``
+
+    不连接任何聊天平台，只将消息转换为文本并等待固定的耗时，模拟 Bot 发送私信。
+    """
+
+    def __init__(self, latency: float = 0.01):
+        """
+        :param latency: 每条消息的发送耗时（单位：秒）
+        """
+        self.latency = latency
+        """每条消息的发送耗时（单位：秒）"""
+        self.messages = 0
+        """已发送的消息数"""
+        self.characters = 0
+        """已发送消息的总字符数"""
+
+    async def __call__(self, user_id: str, message: Any, use: Any = None, **_):
+        self.characters += len(str(message))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.messages += 1
+        return True, None
+
+
+def peak_rss() -> Optional[float]:
+    """
+    当前进程的峰值内存（单位：MiB），不支持的平台返回None
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    value = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 的单位为 KiB，macOS 为字节
+    return round(value / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def generate_users(model, count: int, accounts_per_user: int = 1, uid_start: int = 100000000):
+    """
+    生成模拟用户数据
+
+    :param model: 插件的 ``model`` 模块
+    :param count: 用户数量
+    :param accounts_per_user: 每个用户绑定的米游社账户数量
+    :param uid_start: 第一个账户的米游社UID
+    :return: {用户ID: UserData}
+    """
+    users = {}
+    bbs_uid = uid_start
+    for index in range(count):
+        user = model.UserData(enable_notice=True)
+        for _ in range(accounts_per_user):
+            cookies = model.BBSCookies(stoken=f"v2_benchmark{bbs_uid}", mid=f"mid{bbs_uid}",
+                                       cookie_token=f"ct{bbs_uid}", ltoken=f"lt{bbs_uid}")
+            cookies.bbs_uid = str(bbs_uid)
+            user.accounts[str(bbs_uid)] = model.UserAccount(
+                cookies=cookies,
+                enable_mission=True,
+                enable_game_sign=True,
+                enable_resin=True,
+                mission_games=["BBSMission"]
+            )
+            bbs_uid += 1
+        users[str(10000 + index)] = user
+    return users
+
+
+def load_plugin(log_level: str):
+    """
+    初始化 NoneBot 并加载插件（不启动驱动器，定时任务由测试直接调用）
+
+    :return: (plan 模块, model 模块, utils 模块)
+    """
+    import nonebot
+
+    nonebot.init(driver="~none", log_level=log_level)
+    nonebot.load_plugin("nonebot_plugin_saa")
+    nonebot.load_plugin("nonebot_plugin_apscheduler")
+    nonebot.load_plugin(PLUGIN_MODULE)
+    return (importlib.import_module(f"{PLUGIN_MODULE}.command.plan"),
+            importlib.import_module(f"{PLUGIN_MODULE}.model"),
+            importlib.import_module(f"{PLUGIN_MODULE}.utils"))
+
+
+async def run_benchmark(args: argparse.Namespace, users: int) -> Dict[str, Any]:
+    """
+    在当前进程中执行一次测试（需要在临时目录中运行，插件数据会写入当前目录下的 ``data``）
+
+    :param args: 命令行参数
+    :param users: 用户数量
+    :return: 测试结果
+    """
+    plan, model, utils = load_plugin(args.log_level)
+    preference = model.plugin_config.preference
+    preference.sleep_time = args.sleep_time
+    preference.retry_interval = args.retry_interval
+    preference.notice_send_interval = args.notice_interval
+
+    # 所有网络请求都发送到模拟器
+    if args.simulator_url:
+        simulator = None
+        http_transport = httpx.AsyncHTTPTransport
+        httpx.AsyncHTTPTransport = lambda **kwargs: remote_transport(args.simulator_url, http_transport(**kwargs))
+    else:
+        if args.simulator_config:
+            config = SimulatorConfig.parse_file(args.simulator_config)
+        else:
+            config = SimulatorConfig(latency=LatencyModel(distribution="constant", median=args.latency))
+        simulator = MihoyoSimulator(config)
+        httpx.AsyncHTTPTransport = lambda **_: simulator.transport()
+
+    sender = StandInSender(args.notice_latency)
+    utils.NotificationOutbox.sender = sender
+
+    requests: Dict[str, int] = {"total": 0, "failed": 0}
+
+    def count_request(_: str, outcome: str, __: float):
+        requests["total"] += 1
+        if not outcome.isdigit() or int(outcome) >= 400:
+            requests["failed"] += 1
+
+    utils.Metrics.add_request_listener(count_request)
+
+    start = time.perf_counter()
+    model.PluginDataManager.plugin_data.users.update(generate_users(model, users, args.accounts_per_user))
+    result: Dict[str, Any] = {
+        "users": users,
+        "accounts": users * args.accounts_per_user,
+        "generate_time": round(time.perf_counter() - start, 3),
+        "simulator": args.simulator_url or "local",
+        "tasks": {}
+    }
+
+    monitor = LoopLagMonitor(args.lag_interval)
+    for task in args.tasks:
+        requests.update(total=0, failed=0)
+        messages = sender.messages
+        monitor.start()
+        start = time.perf_counter()
+        await getattr(plan, task)()
+        wall_time = time.perf_counter() - start
+        # 定时任务只把通知放入发送队列，不等待发送完成，任务结束后剩余通知（包括管理员报告）的发送时间单独统计，
+        # 与执行报告中的 notifications 阶段对应
+        await utils.NotificationOutbox.join()
+        notice_time = time.perf_counter() - start - wall_time
+        await monitor.stop()
+        result["tasks"][task] = {
+            "wall_time": round(wall_time, 3),
+            "requests": requests["total"],
+            "failed_requests": requests["failed"],
+            "rps": round(requests["total"] / wall_time, 1) if wall_time else 0.0,
+            "notices": sender.messages - messages,
+            "notice_drain_time": round(notice_time, 3),
+            "loop_lag_ms": monitor.summary(),
+            "peak_rss_mib": peak_rss()
+        }
+    if simulator is not None:
+        result["simulator_injected"] = simulator.injected
+    return result
+
+
+def _child_command(args: argparse.Namespace, users: int) -> List[str]:
+    command = [sys.executable, "-m", "benchmark.run_schedule", "--single", str(users),
+               "--accounts-per-user", str(args.accounts_per_user),
+               "--tasks", *args.tasks,
+               "--sleep-time", str(args.sleep_time),
+               "--retry-interval", str(args.retry_interval),
+               "--notice-latency", str(args.notice_latency),
+               "--notice-interval", str(args.notice_interval),
+               "--lag-interval", str(args.lag_interval),
+               "--latency", str(args.latency),
+               "--log-level", args.log_level]
+    if args.simulator_config:
+        command += ["--simulator-config", str(Path(args.simulator_config).resolve())]
+    if args.simulator_url:
+        command += ["--simulator-url", args.simulator_url]
+    return command
+
+
+def _run_child(args: argparse.Namespace, users: int) -> Optional[Dict[str, Any]]:
+    """
+    在子进程和临时目录中执行一次测试
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    with tempfile.TemporaryDirectory(prefix="mystool-benchmark-") as work_dir:
+        process = subprocess.run(_child_command(args, users), cwd=work_dir, env=env,
+                                 stdout=subprocess.PIPE, text=True)
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    print(f"用户数 {users} 的测试失败，退出码 {process.returncode}", file=sys.stderr)
+    return None
+
+
+def print_table(results: List[Dict[str, Any]]):
+    header = ("用户数", "任务", "耗时(s)", "请求数", "失败", "请求/秒", "通知", "通知发送(s)",
+              "循环延迟p99(ms)", "循环延迟max(ms)", "峰值RSS(MiB)")
+    rows = [header]
+    for result in results:
+        for task, data in result["tasks"].items():
+            rows.append((result["users"], task, data["wall_time"], data["requests"], data["failed_requests"],
+                         data["rps"], data["notices"], data["notice_drain_time"], data["loop_lag_ms"]["p99"],
+                         data["loop_lag_ms"]["max"], data["peak_rss_mib"]))
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="定时任务压力测试")
+    parser.add_argument("--users", type=int, nargs="+", default=[100, 1000, 10000], help="测试的用户数量")
+    parser.add_argument("--accounts-per-user", type=int, default=1, help="每个用户绑定的米游社账户数量")
+    parser.add_argument("--tasks", nargs="+", choices=TASKS, default=list(TASKS), help="测试的定时任务")
+    parser.add_argument("--simulator-config", help="SimulatorConfig 的 JSON 文件路径（进程内模拟器）")
+    parser.add_argument("--latency", type=float, default=0.002,
+                        help="未指定 --simulator-config 时进程内模拟器的固定响应耗时。"
+                             "定时任务按用户依次执行，使用真实耗时测试上万用户需要数小时（单位：秒）")
+    parser.add_argument("--simulator-url", help="独立运行的模拟器服务地址，设置后不使用进程内模拟器")
+    parser.add_argument("--sleep-time", type=float, default=0,
+                        help="插件的任务操作冷却时间，默认为 0 以免耗时被固定等待占据（单位：秒）")
+    parser.add_argument("--retry-interval", type=float, default=0, help="插件的网络请求重试间隔（单位：秒）")
+    parser.add_argument("--notice-latency", type=float, default=0.01, help="模拟每条通知的发送耗时（单位：秒）")
+    parser.add_argument("--notice-interval", type=float, default=0, help="插件的通知发送间隔（单位：秒）")
+    parser.add_argument("--lag-interval", type=float, default=0.05, help="事件循环延迟的采样间隔（单位：秒）")
+    parser.add_argument("--log-level", default="WARNING", help="NoneBot 日志等级")
+    parser.add_argument("--output", help="将结果以 JSON Lines 格式追加写入该文件")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        result = asyncio.run(run_benchmark(args, args.single))
+        print(RESULT_PREFIX + json.dumps(result, ensure_ascii=False), flush=True)
+        return
+
+    results = []
+    for users in args.users:
+        print(f"⏳正在测试 {users} 个用户...", file=sys.stderr, flush=True)
+        if (result := _run_child(args, users)) is not None:
+            results.append(result)
+            if args.output:
+                with open(args.output, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    if results:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
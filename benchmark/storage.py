@@ -0,0 +1,288 @@
+"""
+插件数据存储性能测试
+
+生成不同规模的插件数据，测量 ``PluginDataManager.write_plugin_data`` / ``load_plugin_data`` 的序列化耗时、
+解析耗时、文件大小和加载后每个账户占用的内存（tracemalloc），并测量 ``BBSCookies``、``UserAccount``、
+``UserData`` 单个对象占用的内存。
+
+存储方式通过 ``StorageBackend`` 扩展，默认测试插件当前使用的 JSON 文件（``json``），
+其他存储方式只需实现 ``write`` 和 ``load``，即可用相同的数据和指标进行比较::
+
+    python -m benchmark.storage --accounts 100 1000 10000
+    python -m benchmark.storage --backends json json-compact my_package.storage:SQLiteBackend
+
+测试在临时目录中运行，不会读写机器人的插件数据。
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Any, Type, Callable
+
+from .run_schedule import REPO_ROOT, load_plugin, generate_users
+
+__all__ = ["StorageBackend", "JsonBackend", "CompactJsonBackend", "BACKENDS", "measure_backend",
+           "measure_objects"]
+
+
+class StorageBackend:
+    """
+    插件数据存储方式
+
+    子类需要实现 ``write`` 和 ``load``，并将数据保存在 ``path`` 对应的文件（或目录）中，
+    测试会以该路径的大小作为存储占用。
+    """
+    name = ""
+    """存储方式名称"""
+
+    def __init__(self, model, work_dir: Path):
+        """
+        :param model: 插件的 ``model`` 模块
+        :param work_dir: 可用于保存数据的临时目录
+        """
+        self.model = model
+        """插件的 ``model`` 模块"""
+        self.work_dir = work_dir
+        """可用于保存数据的临时目录"""
+
+    @property
+    def path(self) -> Path:
+        """
+        数据保存的位置
+        """
+        raise NotImplementedError
+
+    def write(self, plugin_data) -> None:
+        """
+        保存插件数据
+
+        :param plugin_data: ``PluginData`` 对象
+        """
+        raise NotImplementedError
+
+    def load(self):
+        """
+        读取插件数据
+
+        :return: ``PluginData`` 对象
+        """
+        raise NotImplementedError
+
+    def size(self) -> int:
+        """
+        数据占用的存储空间（单位：字节）
+        """
+        if self.path.is_dir():
+            return sum(file.stat().st_size for file in self.path.rglob("*") if file.is_file())
+        return self.path.stat().st_size
+
+
+class JsonBackend(StorageBackend):
+    """
+    插件当前的存储方式，直接调用 ``PluginDataManager`` 读写 ``dataV2.json``
+    """
+    name = "json"
+
+    @property
+    def path(self) -> Path:
+        return self.model.plugin_data_path
+
+    def write(self, plugin_data):
+        self.model.PluginDataManager.plugin_data = plugin_data
+        if not self.model.PluginDataManager.write_plugin_data():
+            raise RuntimeError("PluginDataManager.write_plugin_data 执行失败")
+
+    def load(self):
+        self.model.PluginDataManager.load_plugin_data()
+        return self.model.PluginDataManager.plugin_data
+
+
+class CompactJsonBackend(StorageBackend):
+    """
+    不缩进的 JSON 文件，用于比较缩进对文件大小和耗时的影响
+    """
+    name = "json-compact"
+
+    @property
+    def path(self) -> Path:
+        return self.work_dir / "dataV2.compact.json"
+
+    def write(self, plugin_data):
+        self.path.write_text(plugin_data.json(), encoding="utf-8")
+
+    def load(self):
+        return self.model.PluginData.parse_obj(json.loads(self.path.read_text(encoding="utf-8")))
+
+
+BACKENDS: Dict[str, Type[StorageBackend]] = {
+    JsonBackend.name: JsonBackend,
+    CompactJsonBackend.name: CompactJsonBackend
+}
+"""内置的存储方式"""
+
+
+def _resolve_backend(name: str) -> Type[StorageBackend]:
+    """
+    获取存储方式，``模块:类名`` 格式时从对应模块导入
+    """
+    if name in BACKENDS:
+        return BACKENDS[name]
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"未知的存储方式 {name}，可用：{', '.join(BACKENDS)}，或使用 模块:类名 格式")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _timeit(func: Callable[[], Any], repeat: int) -> float:
+    """
+    :return: 多次执行的耗时中位数（单位：毫秒）
+    """
+    durations = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def _traced(func: Callable[[], Any]):
+    """
+    执行函数并统计内存
+
+    :return: (返回值, 返回值占用的内存, 执行期间的内存峰值)，单位为字节
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        value = func()
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, after - before, peak - before
+
+
+def measure_backend(backend: StorageBackend, plugin_data, accounts: int, repeat: int) -> Dict[str, Any]:
+    """
+    测量一种存储方式
+
+    :param backend: 存储方式
+    :param plugin_data: 要保存的 ``PluginData`` 对象
+    :param accounts: 数据中的账户数量
+    :param repeat: 计时的重复次数
+    """
+    serialize_time = _timeit(lambda: backend.write(plugin_data), repeat)
+    size = backend.size()
+    parse_time = _timeit(backend.load, repeat)
+    _, retained, peak = _traced(backend.load)
+    return {
+        "backend": backend.name,
+        "accounts": accounts,
+        "file_size": size,
+        "bytes_per_account": round(size / accounts, 1),
+        "serialize_ms": round(serialize_time, 2),
+        "parse_ms": round(parse_time, 2),
+        "memory_per_account": round(retained / accounts, 1),
+        "load_peak_memory": peak
+    }
+
+
+def measure_objects(model, count: int = 1000, repeat: int = 3) -> Dict[str, float]:
+    """
+    测量单个 ``BBSCookies``、``UserAccount``（含 Cookies）、``UserData``（含一个账户）对象占用的内存
+
+    :param model: 插件的 ``model`` 模块
+    :param count: 每种对象创建的数量
+    :param repeat: 测量的重复次数，取中位数（全局集合扩容等偶发的分配可能落在某一次测量中）
+    :return: {类名: 单个对象占用的内存（单位：字节）}
+    """
+    def cookies():
+        return [next(iter(user.accounts.values())).cookies
+                for user in generate_users(model, count).values()]
+
+    def accounts():
+        return [next(iter(user.accounts.values())) for user in generate_users(model, count).values()]
+
+    def users():
+        return list(generate_users(model, count).values())
+
+    factories = (("BBSCookies", cookies), ("UserAccount", accounts), ("UserData", users))
+    # 先不统计地各执行一次，避免第一次测量计入 pydantic 校验器、字符串驻留等只在首次创建对象时产生的内存
+    for _, func in factories:
+        func()
+    result = {}
+    for name, func in factories:
+        samples = []
+        for _ in range(max(repeat, 1)):
+            value, retained, _ = _traced(func)
+            samples.append(retained)
+            del value
+        result[name] = round(statistics.median(samples) / count, 1)
+    return result
+
+
+def _print_table(header: List[str], rows: List[List[Any]]):
+    rows = [header, *rows]
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="插件数据存储性能测试")
+    parser.add_argument("--accounts", type=int, nargs="+", default=[100, 1000, 10000], help="测试的账户数量")
+    parser.add_argument("--accounts-per-user", type=int, default=1, help="每个用户绑定的米游社账户数量")
+    parser.add_argument("--backends", nargs="+", default=[JsonBackend.name],
+                        help=f"测试的存储方式，内置：{', '.join(BACKENDS)}；也可以使用 模块:类名 指定自定义的存储方式")
+    parser.add_argument("--repeat", type=int, default=3, help="计时和对象内存测量的重复次数，取中位数")
+    parser.add_argument("--output", help="将结果以 JSON Lines 格式追加写入该文件")
+    args = parser.parse_args()
+
+    backend_types = [_resolve_backend(name) for name in args.backends]
+    output = Path(args.output).resolve() if args.output else None
+    # 插件数据目录基于当前工作目录，切换到临时目录后再加载插件
+    work_dir = Path(tempfile.mkdtemp(prefix="mystool-storage-"))
+    sys.path.insert(0, str(REPO_ROOT))
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        _, model, _ = load_plugin("WARNING")
+
+        results = []
+        for accounts in args.accounts:
+            users = generate_users(model, max(accounts // args.accounts_per_user, 1), args.accounts_per_user)
+            plugin_data = model.PluginData(users=users)
+            total = sum(len(user.accounts) for user in users.values())
+            for backend_type in backend_types:
+                print(f"⏳正在测试 {backend_type.name}，{total} 个账户...", file=sys.stderr, flush=True)
+                result = measure_backend(backend_type(model, work_dir), plugin_data, total, args.repeat)
+                results.append(result)
+                if output:
+                    with open(output, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+        _print_table(
+            ["存储方式", "账户数", "文件大小(KiB)", "每账户(B)", "序列化(ms)", "解析(ms)", "每账户内存(B)", "加载峰值(MiB)"],
+            [[r["backend"], r["accounts"], round(r["file_size"] / 1024, 1), r["bytes_per_account"], r["serialize_ms"],
+              r["parse_ms"], r["memory_per_account"], round(r["load_peak_memory"] / 1024 / 1024, 1)] for r in results]
+        )
+        print()
+        objects = measure_objects(model, repeat=args.repeat)
+        _print_table(["对象", "单个对象内存(B)"], [[name, value] for name, value in objects.items()])
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -40,9 +40,11 @@ __plugin_meta__ = PluginMetadata(
 
 # 防止多进程生成图片时反复调用
 
-from .utils import CommandBegin
+from .utils import CommandBegin, FontManager, setup_metrics_endpoint
 
 _driver.on_startup(CommandBegin.set_command_begin)
+_driver.on_startup(FontManager.start_prepare)
+setup_metrics_endpoint()
 
 # 加载命令
 
@@ -1,2 +1,3 @@
 from .game_sign_api import *
 from .myb_missions_api import *
+from .exchange_api import *
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import time
 from typing import List, Optional, Tuple, Dict, Any, Union, Type
@@ -12,9 +13,9 @@ from ..model import GameRecord, GameInfo, BaseApiStatus, MmtData, GeetestResult,
     GetCookieStatus, \
     CreateMobileCaptchaStatus, GeetestResultV4, GenshinNote, GenshinNoteStatus, \
     GetFpStatus, StarRailNoteStatus, StarRailNote, ZzzNote, ZzzNoteStatus, UserAccount, BBSCookies, \
-    plugin_env, plugin_config, QueryGameTokenQrCodeStatus
-from ..utils import generate_device_id, logger, generate_ds, \
-    get_async_retry, generate_seed_id, generate_fp_locally
+    plugin_env, plugin_config, QueryGameTokenQrCodeStatus, Good, Address
+from ..utils import generate_device_id, logger, create_async_client, generate_ds, \
+    get_async_retry, generate_seed_id, generate_fp_locally, record_api_status
 
 URL_LOGIN_TICKET_BY_CAPTCHA = "https://webapi.account.mihoyo.com/Api/login_by_mobilecaptcha"
 URL_LOGIN_TICKET_BY_PASSWORD = "https://webapi.account.mihoyo.com/Api/login_by_password"
@@ -167,6 +168,18 @@ HEADERS_MYB = {
     "Referer": "https://webstatic.mihoyo.com/",
     "Accept-Encoding": "gzip, deflate, br"
 }
+HEADERS_ADDRESS = {
+    "Host": "api-takumi.mihoyo.com",
+    "Accept": "application/json, text/plain, */*",
+    "Origin": "https://user.mihoyo.com",
+    "Connection": "keep-alive",
+    "x-rpc-device_id": None,
+    "x-rpc-client_type": "5",
+    "User-Agent": plugin_env.device_config.USER_AGENT_MOBILE,
+    "Referer": "https://user.mihoyo.com/",
+    "Accept-Language": "zh-CN,zh-Hans;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br"
+}
 HEADERS_DEVICE = {
     "DS": None,
     "x-rpc-client_type": "2",
@@ -318,6 +331,54 @@ class ApiResultHandler(BaseModel):
         return self.message in ["invalid request"]
 
 
+class NoteEndpointAffinity:
+    """
+    实时便签接口亲和性记录
+
+    记录每个账户每个游戏上一次成功获取便签所用的接口，之后优先使用该接口；
+    距离上次探测超过 ``note_endpoint_probe_interval`` 后，会优先重新探测另一个接口。
+    """
+    BBS = "bbs"
+    """米游社内页面接口"""
+    WIDGET = "widget"
+    """iOS 小组件接口"""
+
+    _records: Dict[Tuple[str, str], Tuple[str, float]] = {}
+    """{(米游社UID, 游戏): (优先接口, 上次探测时间)}"""
+
+    @classmethod
+    def get_order(cls, bbs_uid: str, game: str, default: str = BBS) -> List[str]:
+        """
+        获取本次请求应尝试的接口顺序
+
+        :param bbs_uid: 米游社UID
+        :param game: 游戏标识，如 ``genshin``
+        :param default: 没有记录时优先使用的接口
+        """
+        preferred, probe_time = cls._records.get((bbs_uid, game), (default, None))
+        other = cls.WIDGET if preferred == cls.BBS else cls.BBS
+        if probe_time is not None and \
+                time.time() - probe_time >= plugin_config.preference.note_endpoint_probe_interval:
+            # 重新探测另一个接口，同时刷新探测时间，防止探测失败后每次都重复探测
+            cls._records[(bbs_uid, game)] = (preferred, time.time())
+            return [other, preferred]
+        return [preferred, other]
+
+    @classmethod
+    def record_success(cls, bbs_uid: str, game: str, endpoint: str):
+        """
+        记录成功获取便签所用的接口
+
+        :param bbs_uid: 米游社UID
+        :param game: 游戏标识，如 ``genshin``
+        :param endpoint: 成功使用的接口
+        """
+        preferred, _ = cls._records.get((bbs_uid, game), (None, None))
+        if preferred != endpoint:
+            cls._records[(bbs_uid, game)] = (endpoint, time.time())
+
+
+@record_api_status
 async def get_game_record(account: UserAccount, retry: bool = True) -> Tuple[BaseApiStatus, Optional[List[GameRecord]]]:
     """
     获取用户绑定的游戏账户信息，返回一个GameRecord对象的列表
@@ -328,7 +389,7 @@ async def get_game_record(account: UserAccount, retry: bool = True) -> Tuple[Bas
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(URL_GAME_RECORD.format(account.bbs_uid), headers=HEADERS_GAME_RECORD,
                                            cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
                                            timeout=plugin_config.preference.timeout)
@@ -350,6 +411,7 @@ async def get_game_record(account: UserAccount, retry: bool = True) -> Tuple[Bas
             return BaseApiStatus(network_error=True), None
 
 
+@record_api_status
 async def get_game_list(retry: bool = True) -> Tuple[BaseApiStatus, Optional[List[GameInfo]]]:
     """
     获取米哈游游戏的详细信息，若返回`None`说明获取失败
@@ -361,7 +423,7 @@ async def get_game_list(retry: bool = True) -> Tuple[BaseApiStatus, Optional[Lis
         async for attempt in get_async_retry(retry):
             with attempt:
                 headers["DS"] = generate_ds()
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(URL_GAME_LIST, headers=headers, timeout=plugin_config.preference.timeout)
                 api_result = ApiResultHandler(res.json())
                 return BaseApiStatus(success=True), list(
@@ -376,6 +438,7 @@ async def get_game_list(retry: bool = True) -> Tuple[BaseApiStatus, Optional[Lis
             return BaseApiStatus(network_error=True), None
 
 
+@record_api_status
 async def get_user_myb(account: UserAccount, retry: bool = True) -> Tuple[BaseApiStatus, Optional[int]]:
     """
     获取用户当前米游币数量
@@ -386,7 +449,7 @@ async def get_user_myb(account: UserAccount, retry: bool = True) -> Tuple[BaseAp
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(URL_MYB, headers=HEADERS_MYB,
                                            cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
                                            timeout=plugin_config.preference.timeout)
@@ -407,6 +470,164 @@ async def get_user_myb(account: UserAccount, retry: bool = True) -> Tuple[BaseAp
             return BaseApiStatus(network_error=True), None
 
 
+@record_api_status
+async def get_good_list(game: str = "", retry: bool = True) -> Tuple[BaseApiStatus, Optional[List[Good]]]:
+    """
+    获取米游币商城某个分区的全部商品，第一页之外的各页并发获取
+
+    :param game: 商品分区，如 ``hk4e``，为空则获取全部分区
+    :param retry: 是否允许重试
+    """
+
+    async def get_page(page: int) -> Tuple[List[Dict[str, Any]], int]:
+        async for attempt in get_async_retry(retry):
+            with attempt:
+                res = await client.get(URL_GOOD_LIST.format(page=page, game=game).strip(), headers=HEADERS_MYB,
+                                       timeout=plugin_config.preference.timeout)
+                api_result = ApiResultHandler(res.json())
+                return api_result.data["list"], int(api_result.data["total"])
+
+    try:
+        async with create_async_client() as client:
+            first_page, total = await get_page(1)
+            page_size = len(first_page) or 1
+            pages = list(range(2, (total + page_size - 1) // page_size + 1))
+            goods_data = list(first_page)
+            window = max(plugin_config.preference.good_list_page_concurrency, 1)
+            for i in range(0, len(pages), window):
+                for page_data, _ in await asyncio.gather(*map(get_page, pages[i:i + window])):
+                    goods_data += page_data
+        return BaseApiStatus(success=True), list(map(Good.parse_obj, goods_data))
+    except tenacity.RetryError as e:
+        if is_incorrect_return(e):
+            logger.exception(f"获取商品列表 - 服务器没有正确返回")
+            return BaseApiStatus(incorrect_return=True), None
+        else:
+            logger.exception(f"获取商品列表 - 请求失败")
+            return BaseApiStatus(network_error=True), None
+    except (ValidationError, KeyError, TypeError):
+        logger.exception(f"获取商品列表 - 服务器没有正确返回")
+        return BaseApiStatus(incorrect_return=True), None
+
+
+@record_api_status
+async def get_good_detail(good: Good, retry: bool = True) -> Tuple[BaseApiStatus, Optional[Good]]:
+    """
+    获取商品详细信息，并更新到商品数据对象中
+
+    :param good: 商品数据
+    :param retry: 是否允许重试
+    """
+    try:
+        async for attempt in get_async_retry(retry):
+            with attempt:
+                async with create_async_client() as client:
+                    res = await client.get(URL_CHECK_GOOD.format(good.goods_id), headers=HEADERS_MYB,
+                                           timeout=plugin_config.preference.timeout)
+                api_result = ApiResultHandler(res.json())
+                return BaseApiStatus(success=True), good.update(api_result.data)
+    except tenacity.RetryError as e:
+        if is_incorrect_return(e):
+            logger.exception(f"获取商品详细信息 - 服务器没有正确返回")
+            logger.debug(f"网络请求返回: {res.text}")
+            return BaseApiStatus(incorrect_return=True), None
+        else:
+            logger.exception(f"获取商品详细信息 - 请求失败")
+            return BaseApiStatus(network_error=True), None
+
+
+class GoodsCatalog:
+    """
+    米游币商城商品目录缓存
+
+    各分区的商品列表在有效期内直接使用缓存；过期后重新获取商品列表，
+    只对新增或在列表中有变化的商品重新获取详情，其余商品沿用缓存的详情。
+    """
+    _catalogs: Dict[str, Tuple[float, List[Good]]] = {}
+    """{商品分区: (获取时间, 商品列表)}"""
+    _details: Dict[str, Tuple[Tuple[Any, ...], Good]] = {}
+    """{商品ID: (获取详情时的商品列表字段, 包含详情的商品数据)}"""
+    _locks: Dict[str, asyncio.Lock] = {}
+    """每个分区的刷新锁，防止并发请求重复刷新"""
+
+    @classmethod
+    async def get(cls, game: str = "", force: bool = False) -> Tuple[BaseApiStatus, Optional[List[Good]]]:
+        """
+        获取某个分区的全部商品（包含详情）
+
+        :param game: 商品分区，如 ``hk4e``，为空则获取全部分区
+        :param force: 是否忽略缓存有效期强制刷新
+        """
+        async with cls._locks.setdefault(game, asyncio.Lock()):
+            if not force and (catalog := cls._catalogs.get(game)) \
+                    and time.time() - catalog[0] < plugin_config.preference.good_catalog_ttl:
+                return BaseApiStatus(success=True), catalog[1]
+            return await cls._refresh(game)
+
+    @classmethod
+    async def _refresh(cls, game: str) -> Tuple[BaseApiStatus, Optional[List[Good]]]:
+        """
+        刷新某个分区的商品列表，只获取有变化的商品的详情
+        """
+        status, good_list = await get_good_list(game)
+        if not status:
+            # 获取失败时，若有缓存则继续使用过期的缓存
+            if catalog := cls._catalogs.get(game):
+                return BaseApiStatus(success=True), catalog[1]
+            return status, None
+
+        semaphore = asyncio.Semaphore(max(plugin_config.preference.good_detail_concurrency, 1))
+
+        async def with_detail(good: Good) -> Good:
+            if (cached := cls._details.get(good.goods_id)) and cached[0] == good.list_signature:
+                return cached[1]
+            signature = good.list_signature
+            async with semaphore:
+                detail_status, _ = await get_good_detail(good)
+            if detail_status:
+                cls._details[good.goods_id] = signature, good
+            return good
+
+        goods = list(await asyncio.gather(*map(with_detail, good_list)))
+        cls._catalogs[game] = time.time(), goods
+        return BaseApiStatus(success=True), goods
+
+
+@record_api_status
+async def get_address(account: UserAccount, retry: bool = True) -> Tuple[BaseApiStatus, Optional[List[Address]]]:
+    """
+    获取用户的收货地址列表
+
+    :param account: 用户账户数据
+    :param retry: 是否允许重试
+    """
+    headers = HEADERS_ADDRESS.copy()
+    headers["x-rpc-device_id"] = account.device_id_ios
+    try:
+        async for attempt in get_async_retry(retry):
+            with attempt:
+                async with create_async_client() as client:
+                    res = await client.get(URL_ADDRESS.format(round(time.time() * 1000)), headers=headers,
+                                           cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
+                                           timeout=plugin_config.preference.timeout)
+                api_result = ApiResultHandler(res.json())
+                if api_result.login_expired:
+                    logger.info(
+                        f"获取收货地址 - 用户 {account.display_name} 登录失效")
+                    logger.debug(f"网络请求返回: {res.text}")
+                    return BaseApiStatus(login_expired=True), None
+                return BaseApiStatus(success=True), list(map(Address.parse_obj, api_result.data["list"]))
+    except tenacity.RetryError as e:
+        if is_incorrect_return(e):
+            logger.exception(f"获取收货地址 - 服务器没有正确返回")
+            logger.debug(f"网络请求返回: {res.text}")
+            return BaseApiStatus(incorrect_return=True), None
+        else:
+            logger.exception(f"获取收货地址 - 请求失败")
+            return BaseApiStatus(network_error=True), None
+
+
+@record_api_status
 async def device_login(account: UserAccount, retry: bool = True):
     """
     设备登录(deviceLogin)(适用于安卓设备)
@@ -428,7 +649,7 @@ async def device_login(account: UserAccount, retry: bool = True):
         async for attempt in get_async_retry(retry):
             with attempt:
                 headers["DS"] = generate_ds(data)
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(URL_DEVICE_LOGIN, headers=headers, json=data,
                                             cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
                                             timeout=plugin_config.preference.timeout)
@@ -452,6 +673,7 @@ async def device_login(account: UserAccount, retry: bool = True):
             return BaseApiStatus(network_error=True)
 
 
+@record_api_status
 async def device_save(account: UserAccount, retry: bool = True):
     """
     设备保存(saveDevice)(适用于安卓设备)
@@ -473,7 +695,7 @@ async def device_save(account: UserAccount, retry: bool = True):
         async for attempt in get_async_retry(retry):
             with attempt:
                 headers["DS"] = generate_ds(data)
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(URL_DEVICE_SAVE, headers=headers, json=data,
                                             cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
                                             timeout=plugin_config.preference.timeout)
@@ -497,6 +719,66 @@ async def device_save(account: UserAccount, retry: bool = True):
             return BaseApiStatus(network_error=True)
 
 
+class DeviceRegisterCache:
+    """
+    安卓设备登录和保存(device_login/device_save)的执行记录
+
+    在 ``device_register_valid_time`` 有效期内，且账户的 device_id_android 没有改变时，视为已完成设备注册
+    """
+    _records: Dict[str, Tuple[str, float]] = {}
+    """{米游社UID: (注册所用的 device_id_android, 注册时间)}"""
+    _locks: Dict[str, asyncio.Lock] = {}
+    """{米游社UID: 防止同一账户同时进行注册的锁}"""
+
+    @classmethod
+    def is_valid(cls, account: UserAccount) -> bool:
+        """
+        账户的设备注册记录是否仍然有效
+
+        :param account: 用户账户数据
+        """
+        device_id, register_time = cls._records.get(account.bbs_uid, (None, 0))
+        return device_id == account.device_id_android and \
+            time.time() - register_time < plugin_config.preference.device_register_valid_time
+
+    @classmethod
+    def record(cls, account: UserAccount):
+        """
+        记录账户已完成设备注册
+
+        :param account: 用户账户数据
+        """
+        cls._records[account.bbs_uid] = (account.device_id_android, time.time())
+
+    @classmethod
+    def get_lock(cls, account: UserAccount) -> asyncio.Lock:
+        """
+        获取账户的设备注册锁
+
+        :param account: 用户账户数据
+        """
+        return cls._locks.setdefault(account.bbs_uid, asyncio.Lock())
+
+
+async def device_register(account: UserAccount, retry: bool = True) -> BaseApiStatus:
+    """
+    设备登录并保存(适用于安卓设备)，有效期内不会重复执行
+
+    :param account: 用户账户数据
+    :param retry: 是否允许重试
+    """
+    async with DeviceRegisterCache.get_lock(account):
+        if DeviceRegisterCache.is_valid(account):
+            return BaseApiStatus(success=True)
+        status = await device_login(account, retry)
+        if status:
+            status = await device_save(account, retry)
+        if status:
+            DeviceRegisterCache.record(account)
+        return status
+
+
+@record_api_status
 async def check_registrable(phone_number: int, keep_client: bool = False, retry: bool = True) -> Tuple[
     BaseApiStatus,
     Optional[bool],
@@ -529,9 +811,9 @@ async def check_registrable(phone_number: int, keep_client: bool = False, retry:
         async for attempt in get_async_retry(retry):
             with attempt:
                 if keep_client:
-                    client = httpx.AsyncClient()
+                    client = create_async_client()
                 else:
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await request()
                 res = await request()
                 api_result = ApiResultHandler(res.json())
@@ -548,6 +830,7 @@ async def check_registrable(phone_number: int, keep_client: bool = False, retry:
             return BaseApiStatus(network_error=True), None, device_id, None
 
 
+@record_api_status
 async def create_mmt(client: Optional[httpx.AsyncClient] = None,
                      use_v4: bool = True,
                      device_id: str = None,
@@ -588,7 +871,7 @@ async def create_mmt(client: Optional[httpx.AsyncClient] = None,
                 if client:
                     res = await request()
                 else:
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await request()
                 api_result = ApiResultHandler(res.json())
                 return BaseApiStatus(success=True), MmtData.parse_obj(api_result.data["mmt_data"]), device_id, client
@@ -604,6 +887,7 @@ async def create_mmt(client: Optional[httpx.AsyncClient] = None,
             return BaseApiStatus(network_error=True), None, device_id, None
 
 
+@record_api_status
 async def create_mobile_captcha(phone_number: str,
                                 mmt_data: MmtData,
                                 geetest_result: Union[GeetestResult, GeetestResultV4] = None,
@@ -666,7 +950,7 @@ async def create_mobile_captcha(phone_number: str,
                 if client and not client.is_closed:
                     res = await request()
                 else:
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await request()
                 api_result = ApiResultHandler(res.json())
                 if api_result.success:
@@ -693,6 +977,7 @@ async def create_mobile_captcha(phone_number: str,
             return CreateMobileCaptchaStatus(network_error=True), None
 
 
+@record_api_status
 async def get_login_ticket_by_captcha(phone_number: str,
                                       captcha: int,
                                       device_id: str = None,
@@ -741,7 +1026,7 @@ async def get_login_ticket_by_captcha(phone_number: str,
                 if client is not None:
                     res = await request()
                 else:
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await request()
                 api_result = ApiResultHandler(res.json())
                 if api_result.success:
@@ -769,6 +1054,7 @@ async def get_login_ticket_by_captcha(phone_number: str,
             return GetCookieStatus(network_error=True), None
 
 
+@record_api_status
 async def get_multi_token_by_login_ticket(cookies: BBSCookies, retry: bool = True) -> Tuple[
     GetCookieStatus,
     Optional[BBSCookies]
@@ -786,7 +1072,7 @@ async def get_multi_token_by_login_ticket(cookies: BBSCookies, retry: bool = Tru
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(
                         URL_MULTI_TOKEN_BY_LOGIN_TICKET.format(cookies.login_ticket, cookies.bbs_uid),
                         headers=HEADERS_API_TAKUMI_PC,
@@ -811,6 +1097,7 @@ async def get_multi_token_by_login_ticket(cookies: BBSCookies, retry: bool = Tru
             return GetCookieStatus(network_error=True), None
 
 
+@record_api_status
 async def get_cookie_token_by_captcha(phone_number: str, captcha: int, retry: bool = True) -> Tuple[
     GetCookieStatus,
     Optional[BBSCookies]
@@ -829,7 +1116,7 @@ async def get_cookie_token_by_captcha(phone_number: str, captcha: int, retry: bo
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(URL_COOKIE_TOKEN_BY_CAPTCHA,
                                             headers=HEADERS_API_TAKUMI_PC,
                                             json={
@@ -863,6 +1150,7 @@ async def get_cookie_token_by_captcha(phone_number: str, captcha: int, retry: bo
             return GetCookieStatus(network_error=True), None
 
 
+@record_api_status
 async def get_login_ticket_by_password(account: str, password: str, mmt_data: MmtData, geetest_result: GeetestResult,
                                        retry: bool = True) -> Tuple[GetCookieStatus, Optional[BBSCookies]]:
     """
@@ -891,7 +1179,7 @@ async def get_login_ticket_by_password(account: str, password: str, mmt_data: Mm
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(
                         URL_LOGIN_TICKET_BY_PASSWORD,
                         content=encoded_params,
@@ -915,6 +1203,7 @@ async def get_login_ticket_by_password(account: str, password: str, mmt_data: Mm
             return GetCookieStatus(network_error=True), None
 
 
+@record_api_status
 async def get_cookie_token_by_stoken(cookies: BBSCookies, device_id: str = None, retry: bool = True) -> Tuple[
     GetCookieStatus,
     Optional[BBSCookies]
@@ -937,7 +1226,7 @@ async def get_cookie_token_by_stoken(cookies: BBSCookies, device_id: str = None,
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(
                         URL_COOKIE_TOKEN_BY_STOKEN,
                         cookies=cookies.dict(v2_stoken=True, cookie_type=True),
@@ -966,6 +1255,7 @@ async def get_cookie_token_by_stoken(cookies: BBSCookies, device_id: str = None,
             return GetCookieStatus(network_error=True), None
 
 
+@record_api_status
 async def get_stoken_v2_by_v1(cookies: BBSCookies, device_id: str = None, retry: bool = True) -> Tuple[
     GetCookieStatus,
     Optional[BBSCookies]
@@ -991,7 +1281,7 @@ async def get_stoken_v2_by_v1(cookies: BBSCookies, device_id: str = None, retry:
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     headers.setdefault("DS", generate_ds(salt=plugin_env.salt_config.SALT_PROD))
                     res = await client.post(
                         URL_STOKEN_V2_BY_V1,
@@ -1022,6 +1312,7 @@ async def get_stoken_v2_by_v1(cookies: BBSCookies, device_id: str = None, retry:
             return GetCookieStatus(network_error=True), None
 
 
+@record_api_status
 async def get_ltoken_by_stoken(cookies: BBSCookies, device_id: str = None, retry: bool = True) -> Tuple[
     GetCookieStatus,
     Optional[BBSCookies]
@@ -1046,7 +1337,7 @@ async def get_ltoken_by_stoken(cookies: BBSCookies, device_id: str = None, retry
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(
                         URL_LTOKEN_BY_STOKEN,
                         cookies=cookies.dict(v2_stoken=True, cookie_type=True),
@@ -1073,6 +1364,7 @@ async def get_ltoken_by_stoken(cookies: BBSCookies, device_id: str = None, retry
             return GetCookieStatus(network_error=True), None
 
 
+@record_api_status
 async def get_device_fp(device_id: str, retry: bool = True) -> Tuple[GetFpStatus, Optional[str]]:
     """
     获取 x-rpc-device_fp
@@ -1104,7 +1396,7 @@ async def get_device_fp(device_id: str, retry: bool = True) -> Tuple[GetFpStatus
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(
                         URL_GET_DEVICE_FP,
                         json=content,
@@ -1131,6 +1423,7 @@ async def get_device_fp(device_id: str, retry: bool = True) -> Tuple[GetFpStatus
             return GetFpStatus(network_error=True), None
 
 
+@record_api_status
 async def genshin_note(account: UserAccount) -> Tuple[
     Union[BaseApiStatus, GenshinNoteStatus],
     Optional[GenshinNote]
@@ -1159,48 +1452,46 @@ async def genshin_note(account: UserAccount) -> Tuple[
                 flag = False
                 params = {"role_id": record.game_role_id, "server": record.region}
                 headers = HEADERS_GENSHIN_STATUS_BBS.copy()
-                headers["x-rpc-device_id"] = account.device_id_android
                 headers["x-rpc-device_fp"] = account.device_id_android or generate_fp_locally()
+                # 优先使用上次成功的接口，失败时再尝试另一个接口
+                endpoints = NoteEndpointAffinity.get_order(account.bbs_uid, "genshin")
                 async for attempt in get_async_retry(False):
                     with attempt:
-                        headers["DS"] = generate_ds(
-                            params={"role_id": record.game_role_id, "server": record.region})
-                        async with httpx.AsyncClient() as client:
-                            res = await client.get(
-                                URL_GENSHEN_NOTE_BBS,
-                                headers=headers,
-                                cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
-                                params=params,
-                                timeout=plugin_config.preference.timeout
-                            )
-                        api_result = ApiResultHandler(res.json())
-                        if api_result.login_expired:
-                            logger.info(
-                                f"原神实时便笺: 用户 {account.display_name} 登录失效")
-                            logger.debug(f"网络请求返回: {res.text}")
-                            return GenshinNoteStatus(login_expired=True), None
-
-                        if api_result.invalid_ds:
-                            logger.info(
-                                f"原神实时便笺: 用户 {account.display_name} DS 校验失败")
-                            logger.debug(f"网络请求返回: {res.text}")
-                        if api_result.retcode == 1034:
-                            logger.info(
-                                f"原神实时便笺: 用户 {account.display_name} 可能被验证码阻拦")
-                            logger.debug(f"网络请求返回: {res.text}")
-                        if not api_result.success:
-                            headers["DS"] = generate_ds()
-                            headers["x-rpc-device_id"] = account.device_id_ios
-                            async with httpx.AsyncClient() as client:
+                        for endpoint in endpoints:
+                            if endpoint == NoteEndpointAffinity.BBS:
+                                url, request_params = URL_GENSHEN_NOTE_BBS, params
+                                headers["DS"] = generate_ds(params=params)
+                                headers["x-rpc-device_id"] = account.device_id_android
+                            else:
+                                url, request_params = URL_GENSHEN_NOTE_WIDGET, None
+                                headers["DS"] = generate_ds()
+                                headers["x-rpc-device_id"] = account.device_id_ios
+                            async with create_async_client() as client:
                                 res = await client.get(
-                                    URL_GENSHEN_NOTE_WIDGET,
+                                    url,
                                     headers=headers,
                                     cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
+                                    params=request_params,
                                     timeout=plugin_config.preference.timeout
                                 )
                             api_result = ApiResultHandler(res.json())
-                            return GenshinNoteStatus(success=True), \
-                                   GenshinNote.parse_obj(api_result.data)
+                            if api_result.login_expired:
+                                logger.info(
+                                    f"原神实时便笺: 用户 {account.display_name} 登录失效")
+                                logger.debug(f"网络请求返回: {res.text}")
+                                return GenshinNoteStatus(login_expired=True), None
+
+                            if api_result.invalid_ds:
+                                logger.info(
+                                    f"原神实时便笺: 用户 {account.display_name} DS 校验失败")
+                                logger.debug(f"网络请求返回: {res.text}")
+                            if api_result.retcode == 1034:
+                                logger.info(
+                                    f"原神实时便笺: 用户 {account.display_name} 可能被验证码阻拦")
+                                logger.debug(f"网络请求返回: {res.text}")
+                            if api_result.success:
+                                NoteEndpointAffinity.record_success(account.bbs_uid, "genshin", endpoint)
+                                break
                         return GenshinNoteStatus(success=True), GenshinNote.parse_obj(api_result.data)
             except tenacity.RetryError as e:
                 if is_incorrect_return(e):
@@ -1214,6 +1505,7 @@ async def genshin_note(account: UserAccount) -> Tuple[
         return GenshinNoteStatus(no_genshin_account=True), None
 
 
+@record_api_status
 async def starrail_note(account: UserAccount) -> Tuple[
     Union[BaseApiStatus, StarRailNoteStatus],
     Optional[StarRailNote]
@@ -1245,7 +1537,7 @@ async def starrail_note(account: UserAccount) -> Tuple[
                 async for attempt in get_async_retry(False):
                     with attempt:
                         headers["DS"] = generate_ds(data={})
-                        async with httpx.AsyncClient() as client:
+                        async with create_async_client() as client:
                             cookies = account.cookies.dict(v2_stoken=True, cookie_type=True)
                             res = await client.get(url, headers=headers,
                                                    cookies=cookies,
@@ -1279,6 +1571,7 @@ async def starrail_note(account: UserAccount) -> Tuple[
         return StarRailNoteStatus(no_starrail_account=True), None
 
 
+@record_api_status
 async def zzz_note(account: UserAccount) -> Tuple[
     Union[BaseApiStatus, ZzzNoteStatus],
     Optional[ZzzNote]
@@ -1310,7 +1603,7 @@ async def zzz_note(account: UserAccount) -> Tuple[
                 async for attempt in get_async_retry(False):
                     with attempt:
                         headers["DS"] = generate_ds(data={})
-                        async with httpx.AsyncClient() as client:
+                        async with create_async_client() as client:
                             cookies = account.cookies.dict(v2_stoken=True, cookie_type=True)
                             res = await client.get(url, headers=headers,
                                                    cookies=cookies,
@@ -1355,6 +1648,7 @@ async def zzz_note(account: UserAccount) -> Tuple[
         return ZzzNoteStatus(no_starrail_account=True), None
 
 
+@record_api_status
 async def create_verification(
         account: UserAccount = None,
         retry: bool = True
@@ -1374,7 +1668,7 @@ async def create_verification(
                 headers["x-rpc-device_fp"] = account.device_fp if account and account.device_fp else \
                     generate_fp_locally()
                 headers["DS"] = generate_ds()
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(
                         URL_CREATE_VERIFICATION,
                         headers=headers,
@@ -1393,6 +1687,7 @@ async def create_verification(
             return BaseApiStatus(network_error=True), None
 
 
+@record_api_status
 async def verify_verification(
         mmt_data: MmtData,
         geetest_result: GeetestResult,
@@ -1421,7 +1716,7 @@ async def verify_verification(
                 headers["x-rpc-device_fp"] = account.device_fp if account and account.device_fp else \
                     generate_fp_locally()
                 headers["DS"] = generate_ds()
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(
                         URL_VERIFY_VERIFICATION,
                         headers=headers,
@@ -1443,6 +1738,7 @@ async def verify_verification(
             return BaseApiStatus(network_error=True)
 
 
+@record_api_status
 async def fetch_game_token_qrcode(
         device_id: str,
         app_id: str = "1",
@@ -1463,7 +1759,7 @@ async def fetch_game_token_qrcode(
                     "app_id": app_id,
                     "device": device_id,
                 }
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(
                         URL_FETCH_GAME_TOKEN_QRCODE,
                         json=content,
@@ -1487,11 +1783,13 @@ async def fetch_game_token_qrcode(
             return BaseApiStatus(network_error=True), None
 
 
+@record_api_status
 async def query_game_token_qrcode(
         ticket: str,
         device_id: str,
         app_id: str = "1",
-        retry: bool = True
+        retry: bool = True,
+        client: Optional[httpx.AsyncClient] = None
 ) -> Tuple[QueryGameTokenQrCodeStatus, Optional[Tuple[str, str]]]:
     """
     查询米游社扫码登录（GameToken）二维码扫描状态
@@ -1500,22 +1798,33 @@ async def query_game_token_qrcode(
     :param device_id: 设备ID
     :param app_id: 登录的应用标识符
     :param retry: 是否允许重试
+    :param client: 可选，复用的 httpx.AsyncClient 连接
     :return 其中 ``Tuple[str, str]`` 为米游社账号ID和 GameToken
     """
+    content = {
+        "app_id": app_id,
+        "device": device_id,
+        "ticket": ticket
+    }
+
+    async def request(_client: httpx.AsyncClient):
+        """
+        发送请求的闭包函数
+        """
+        return await _client.post(
+            URL_QUERY_GAME_TOKEN_QRCODE,
+            json=content,
+            timeout=plugin_config.preference.timeout
+        )
+
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                content = {
-                    "app_id": app_id,
-                    "device": device_id,
-                    "ticket": ticket
-                }
-                async with httpx.AsyncClient() as client:
-                    res = await client.post(
-                        URL_QUERY_GAME_TOKEN_QRCODE,
-                        json=content,
-                        timeout=plugin_config.preference.timeout
-                    )
+                if client:
+                    res = await request(client)
+                else:
+                    async with create_async_client() as new_client:
+                        res = await request(new_client)
                 api_result = ApiResultHandler(res.json())
                 if api_result.retcode == 0:
                     if api_result.data["stat"] == "Init":
@@ -1543,6 +1852,147 @@ async def query_game_token_qrcode(
             return QueryGameTokenQrCodeStatus(network_error=True), None
 
 
+class _QrCodeLoginSession:
+    """
+    等待扫码的米游社登录二维码
+    """
+
+    def __init__(self, ticket: str, device_id: str, app_id: str):
+        self.ticket = ticket
+        """二维码 ``ticket``"""
+        self.device_id = device_id
+        """设备ID"""
+        self.app_id = app_id
+        """登录的应用标识符"""
+        self.future: "asyncio.Future[Tuple[QueryGameTokenQrCodeStatus, Optional[Tuple[str, str]]]]" = \
+            asyncio.get_running_loop().create_future()
+        """查询结果"""
+        self.status = QueryGameTokenQrCodeStatus(qrcode_init=True)
+        """最近一次查询的状态"""
+        self.interval = plugin_config.preference.qrcode_query_interval
+        """当前的查询间隔"""
+        self.deadline = time.monotonic() + plugin_config.preference.qrcode_wait_time
+        """停止等待的时间"""
+        self.next_query = time.monotonic()
+        """下一次查询的时间"""
+
+
+class QrCodeLoginPoller:
+    """
+    米游社扫码登录的集中查询
+
+    所有用户等待扫码的二维码都在同一个后台任务中、使用同一个连接池查询。
+    二维码未被扫描时查询间隔逐渐增加至 ``qrcode_query_interval_max``，
+    被扫描后恢复为 ``qrcode_query_interval``，以便尽快拿到确认登录的结果。
+    """
+    _sessions: Dict[str, _QrCodeLoginSession] = {}
+    """二维码 ``ticket`` -> 等待扫码的二维码"""
+    _task: Optional[asyncio.Task] = None
+    """查询任务"""
+    _running = False
+    """查询任务是否仍在查询循环中（退出循环后关闭连接池期间为 False，此时加入的二维码需要启动新的查询任务）"""
+    _wakeup: Optional[asyncio.Event] = None
+    """有新的二维码加入时唤醒查询任务"""
+
+    @classmethod
+    async def wait(
+            cls,
+            ticket: str,
+            device_id: str,
+            app_id: str = "1"
+    ) -> Tuple[QueryGameTokenQrCodeStatus, Optional[Tuple[str, str]]]:
+        """
+        等待二维码被扫描并确认登录，超过 ``qrcode_wait_time`` 后返回最后一次查询的状态
+
+        :param ticket: 生成二维码时返回的 URL 参数中 ``ticket`` 字段的值
+        :param device_id: 设备ID
+        :param app_id: 登录的应用标识符
+        :return 其中 ``Tuple[str, str]`` 为米游社账号ID和 GameToken
+        """
+        session = cls._sessions[ticket] = _QrCodeLoginSession(ticket, device_id, app_id)
+        if cls._running:
+            cls._wakeup.set()
+        else:
+            cls._running = True
+            cls._wakeup = asyncio.Event()
+            cls._task = asyncio.create_task(cls._run())
+        try:
+            # 查询任务会在超时后返回结果，这里的超时只是防止查询任务意外卡住时永远等待
+            return await asyncio.wait_for(
+                session.future,
+                plugin_config.preference.qrcode_wait_time + plugin_config.preference.timeout * 2
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"米游社扫码登录 - 等待二维码 {ticket} 的查询结果超时")
+            return session.status, None
+        finally:
+            cls._sessions.pop(ticket, None)
+
+    @classmethod
+    async def _query(cls, client: httpx.AsyncClient, session: _QrCodeLoginSession):
+        """
+        查询一个二维码的扫描状态，并根据结果调整其查询间隔
+        """
+        status, result = await query_game_token_qrcode(
+            session.ticket, session.device_id, session.app_id, retry=False, client=client)
+        now = time.monotonic()
+        if status or status.qrcode_expired:
+            if not session.future.done():
+                session.future.set_result((status, result))
+            return
+        if status.qrcode_scanned:
+            session.interval = plugin_config.preference.qrcode_query_interval
+        elif status.qrcode_init:
+            session.interval = min(session.interval * 1.5, plugin_config.preference.qrcode_query_interval_max)
+        if status.qrcode_init or status.qrcode_scanned or not session.status.qrcode_scanned:
+            # 网络错误等情况不覆盖“已扫描”的状态
+            session.status = status
+        if now >= session.deadline:
+            if not session.future.done():
+                session.future.set_result((session.status, None))
+            return
+        session.next_query = min(now + session.interval, session.deadline)
+
+    @classmethod
+    async def _run(cls):
+        """
+        查询所有等待扫码的二维码，直到没有需要等待的二维码
+        """
+        try:
+            async with create_async_client() as client:
+                try:
+                    while True:
+                        sessions = [session for session in cls._sessions.values() if not session.future.done()]
+                        if not sessions:
+                            break
+                        now = time.monotonic()
+                        due = [session for session in sessions if session.next_query <= now]
+                        if due:
+                            await asyncio.gather(*(cls._query(client, session) for session in due))
+                            continue
+                        cls._wakeup.clear()
+                        try:
+                            await asyncio.wait_for(
+                                cls._wakeup.wait(),
+                                min(session.next_query for session in sessions) - now
+                            )
+                        except asyncio.TimeoutError:
+                            pass
+                finally:
+                    # 在关闭连接池之前标记退出，之后加入的二维码由新的查询任务处理
+                    cls._running = False
+        except Exception:
+            logger.exception("米游社扫码登录 - 查询任务异常退出")
+            if cls._task is asyncio.current_task():
+                for session in cls._sessions.values():
+                    if not session.future.done():
+                        session.future.set_result((session.status, None))
+        finally:
+            if cls._task is asyncio.current_task():
+                cls._running = False
+
+
+@record_api_status
 async def get_token_by_game_token(
         bbs_uid: str,
         game_token: str,
@@ -1562,7 +2012,7 @@ async def get_token_by_game_token(
                     "account_id": int(bbs_uid),
                     "game_token": game_token
                 }
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(
                         URL_GET_TOKEN_BY_GAME_TOKEN,
                         headers={"x-rpc-app_id": "bll8iq97cem8"},
@@ -1587,6 +2037,7 @@ async def get_token_by_game_token(
             return BaseApiStatus(network_error=True), None
 
 
+@record_api_status
 async def get_cookie_token_by_game_token(
         bbs_uid: str,
         game_token: str,
@@ -1606,7 +2057,7 @@ async def get_cookie_token_by_game_token(
                     "account_id": int(bbs_uid),
                     "game_token": game_token
                 }
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.post(
                         URL_GET_COOKIE_TOKEN_BY_GAME_TOKEN,
                         headers={"x-rpc-app_id": "bll8iq97cem8"},
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import statistics
+import time
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple, Dict, Any
+
+import httpx
+
+from ..api.common import ApiResultHandler, URL_EXCHANGE, IncorrectReturn
+from ..model import ExchangePlan, ExchangeStatus, plugin_config, plugin_env
+from ..utils import logger, create_async_client, generate_ds, generate_fp_locally, Metrics
+
+__all__ = ["ExchangeEngine"]
+
+HEADERS_EXCHANGE = {
+    "Host": "api-takumi.miyoushe.com",
+    "Accept": "application/json, text/plain, */*",
+    "Origin": "https://webstatic.miyoushe.com",
+    "Referer": "https://webstatic.miyoushe.com/",
+    "Connection": "keep-alive",
+    "Content-Type": "application/json;charset=utf-8",
+    "User-Agent": plugin_env.device_config.USER_AGENT_MOBILE,
+    "x-rpc-app_version": plugin_env.device_config.X_RPC_APP_VERSION,
+    "x-rpc-channel": plugin_env.device_config.X_RPC_CHANNEL,
+    "x-rpc-client_type": "5",
+    "x-rpc-device_id": None,
+    "x-rpc-device_fp": None,
+    "x-rpc-device_model": plugin_env.device_config.X_RPC_DEVICE_MODEL_MOBILE,
+    "x-rpc-device_name": plugin_env.device_config.X_RPC_DEVICE_NAME_MOBILE,
+    "x-rpc-sys_version": plugin_env.device_config.X_RPC_SYS_VERSION,
+    "Accept-Language": "zh-CN,zh-Hans;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "DS": None
+}
+
+
+async def _sleep_until(timestamp: float):
+    """
+    等待到指定的本地时间戳，最后一小段时间让出事件循环而不是依赖定时器，以减小唤醒误差
+    """
+    delay = timestamp - time.time()
+    if delay > 0.02:
+        await asyncio.sleep(delay - 0.02)
+    while time.time() < timestamp:
+        await asyncio.sleep(0)
+
+
+class ExchangeEngine:
+    """
+    米游币商品定时兑换
+
+    在开放兑换前 ``exchange_warmup_time`` 秒建立连接池并预热连接，
+    同时根据服务器返回的 ``Date`` 校准本地时间与服务器时间的偏差，
+    随后为每个兑换计划预先生成带签名的请求，在（服务器时间下的）开放兑换时刻同时发出所有账户的兑换请求。
+
+    >>> engine = ExchangeEngine(good.time, [ExchangePlan(good=good, account=account, game_record=record)])
+    >>> results = await engine.run()
+    """
+
+    def __init__(self, sale_time: float, plans: List[ExchangePlan]):
+        """
+        :param sale_time: 开放兑换的时间戳（服务器时间）
+        :param plans: 兑换计划列表
+        """
+        self.sale_time = sale_time
+        """开放兑换的时间戳（服务器时间）"""
+        self.plans = plans
+        """兑换计划列表"""
+        self.clock_offset = 0.0
+        """服务器时间减去本地时间的偏差（单位：秒）"""
+        self.latency = 0.0
+        """请求到达服务器的单程耗时估计（单位：秒）"""
+        self._statuses: List[List[Optional[ExchangeStatus]]] = []
+        """每个兑换计划每次请求的结果"""
+
+    @staticmethod
+    def _validate_plan(plan: ExchangePlan) -> ExchangeStatus:
+        """
+        检查兑换计划是否具备兑换所需的信息
+        """
+        if plan.good.game_biz:
+            if plan.game_record is None:
+                return ExchangeStatus(missing_game_record=True)
+        elif plan.address is None:
+            return ExchangeStatus(missing_address=True)
+        return ExchangeStatus(success=True)
+
+    @staticmethod
+    def _build_request(client: httpx.AsyncClient, plan: ExchangePlan) -> httpx.Request:
+        """
+        生成兑换请求（包含请求头签名、Cookies和请求体）
+        """
+        content: Dict[str, Any] = {
+            "app_id": 1,
+            "point_sn": "myb",
+            "goods_id": plan.good.goods_id,
+            "exchange_num": 1
+        }
+        if plan.good.game_biz:
+            content.update(
+                uid=plan.game_record.game_role_id,
+                region=plan.game_record.region,
+                game_biz=plan.good.game_biz
+            )
+        else:
+            content["address_id"] = plan.address.id
+
+        headers = HEADERS_EXCHANGE.copy()
+        headers["x-rpc-device_id"] = plan.account.device_id_ios
+        headers["x-rpc-device_fp"] = plan.account.device_fp or generate_fp_locally()
+        headers["DS"] = generate_ds()
+        return client.build_request(
+            "POST", URL_EXCHANGE,
+            content=json.dumps(content),
+            headers=headers,
+            cookies=plan.account.cookies.dict(v2_stoken=True, cookie_type=True),
+            timeout=plugin_config.preference.timeout
+        )
+
+    async def _calibrate(self, client: httpx.AsyncClient, connections: int):
+        """
+        预热连接池，并根据服务器 ``Date`` 响应头估计时间偏差和单程耗时
+
+        ``Date`` 只精确到秒，因此在超过一秒的时间内多次采样，
+        每次采样都将偏差限制在一个区间内，取所有区间的交集的中点作为偏差估计。
+
+        :param client: 用于兑换的连接池
+        :param connections: 需要预热的连接数
+        """
+        samples: List[Tuple[float, float, float]] = []
+        """[(服务器时间(秒), 请求发出时间, 收到响应时间)]"""
+
+        async def sample():
+            try:
+                start = time.time()
+                res = await client.head(URL_EXCHANGE, timeout=plugin_config.preference.timeout)
+                end = time.time()
+                samples.append((parsedate_to_datetime(res.headers["Date"]).timestamp(), start, end))
+            except Exception:
+                logger.exception("商品兑换 - 预热连接失败")
+
+        rounds = max(plugin_config.preference.exchange_clock_samples, 1)
+        # 第一轮同时建立所有连接，之后的采样分布在一秒多的时间内，使采样跨过服务器时间的整秒
+        await asyncio.gather(*(sample() for _ in range(connections)))
+        for _ in range(rounds - 1):
+            await asyncio.sleep(1 / rounds + 0.01)
+            await sample()
+
+        if not samples:
+            logger.warning("商品兑换 - 无法校准服务器时间，将使用本地时间")
+            return
+        lower = max(server - end for server, _, end in samples)
+        upper = min(server + 1 - start for server, start, _ in samples)
+        if lower <= upper:
+            self.clock_offset = (lower + upper) / 2
+        else:
+            # 网络波动导致区间没有交集时，退化为取中位数
+            self.clock_offset = statistics.median(server + 0.5 - (start + end) / 2 for server, start, end in samples)
+        self.latency = min(end - start for _, start, end in samples) / 2
+        logger.info(f"商品兑换 - 服务器时间偏差 {self.clock_offset:.3f}s，单程耗时约 {self.latency:.3f}s")
+
+    async def _send(self, client: httpx.AsyncClient, index: int, attempt: int, request: httpx.Request):
+        """
+        发出一次兑换请求并记录结果
+        """
+        plan = self.plans[index]
+        try:
+            res = await client.send(request)
+            api_result = ApiResultHandler(res.json())
+        except httpx.HTTPError:
+            logger.exception("商品兑换 - 请求失败")
+            status = ExchangeStatus(network_error=True)
+        except (json.JSONDecodeError, *IncorrectReturn):
+            logger.exception("商品兑换 - 服务器没有正确返回")
+            status = ExchangeStatus(incorrect_return=True)
+        else:
+            if api_result.success:
+                logger.info(f"商品兑换 - 用户 {plan.account.display_name} 兑换商品 {plan.good.goods_id} 成功")
+                status = ExchangeStatus(success=True)
+            elif api_result.login_expired:
+                logger.info(f"商品兑换 - 用户 {plan.account.display_name} 登录失效")
+                status = ExchangeStatus(login_expired=True)
+            elif api_result.invalid_ds:
+                status = ExchangeStatus(invalid_ds=True)
+            else:
+                logger.info(f"商品兑换 - 用户 {plan.account.display_name} 兑换商品 {plan.good.goods_id} 失败：{api_result.message}")
+                status = ExchangeStatus(exchange_failed=True)
+            logger.debug(f"网络请求返回: {res.text}")
+        Metrics.record_status(status)
+        self._statuses[index][attempt] = status
+
+    def _result(self, index: int) -> ExchangeStatus:
+        """
+        汇总一个兑换计划的结果：任意一次请求成功即为成功，否则为最后一次完成的请求的结果
+        """
+        statuses = [status for status in self._statuses[index] if status is not None]
+        for status in statuses:
+            if status:
+                return status
+        return statuses[-1] if statuses else ExchangeStatus(network_error=True)
+
+    async def run(self) -> List[Tuple[ExchangePlan, ExchangeStatus]]:
+        """
+        等待到开放兑换时刻并进行兑换
+
+        :return: [(兑换计划, 兑换结果)]，顺序与兑换计划列表一致
+        """
+        attempts = max(plugin_config.preference.exchange_attempts, 1)
+        self._statuses = [[None] * attempts for _ in self.plans]
+        results = [self._validate_plan(plan) for plan in self.plans]
+        valid = [i for i, status in enumerate(results) if status]
+        if not valid:
+            return list(zip(self.plans, results))
+
+        await _sleep_until(self.sale_time - plugin_config.preference.exchange_warmup_time)
+
+        connections = len(valid) * attempts
+        limits = httpx.Limits(
+            max_connections=connections,
+            max_keepalive_connections=connections,
+            keepalive_expiry=plugin_config.preference.exchange_warmup_time + 30
+        )
+        async with create_async_client(limits=limits) as client:
+            await self._calibrate(client, connections)
+
+            # 提前生成所有请求，开放兑换时只需发出
+            requests = [[self._build_request(client, self.plans[i]) for _ in range(attempts)] for i in valid]
+            fire_time = self.sale_time - self.clock_offset - self.latency
+
+            tasks: List[asyncio.Task] = []
+            for attempt in range(attempts):
+                await _sleep_until(fire_time + attempt * plugin_config.preference.exchange_attempt_interval)
+                for i, plan_requests in zip(valid, requests):
+                    if not any(self._statuses[i]):
+                        tasks.append(asyncio.create_task(self._send(client, i, attempt, plan_requests[attempt])))
+            await asyncio.gather(*tasks)
+
+        for i in valid:
+            results[i] = self._result(i)
+        return list(zip(self.plans, results))
@@ -1,15 +1,14 @@
 from typing import List, Optional, Tuple, Literal, Set, Type
 from urllib.parse import urlencode
 
-import httpx
 import tenacity
 
 from ..api.common import ApiResultHandler, HEADERS_API_TAKUMI_MOBILE, is_incorrect_return, \
-    device_login, device_save
+    device_register
 from ..model import GameRecord, BaseApiStatus, Award, GameSignInfo, GeetestResult, MmtData, plugin_config, plugin_env, \
     UserAccount
-from ..utils import logger, generate_ds, \
-    get_async_retry
+from ..utils import logger, create_async_client, generate_ds, \
+    get_async_retry, record_api_status
 
 __all__ = ["BaseGameSign", "GenshinImpactSign", "HonkaiImpact3Sign", "HoukaiGakuen2Sign", "TearsOfThemisSign",
            "StarRailSign", "ZenlessZoneZeroSign"]
@@ -65,6 +64,7 @@ class BaseGameSign:
         """
         return self.record is not None
 
+    @record_api_status
     async def get_rewards(self, retry: bool = True) -> Tuple[BaseApiStatus, Optional[List[Award]]]:
         """
         获取签到奖励信息
@@ -74,7 +74,7 @@ class BaseGameSign:
         try:
             async for attempt in get_async_retry(retry):
                 with attempt:
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await client.get(self.url_reward, headers=self.headers_reward,
                                                timeout=plugin_config.preference.timeout)
                     award_list = []
@@ -90,6 +90,7 @@ class BaseGameSign:
                 logger.exception(f"获取签到奖励信息 - 请求失败")
                 return BaseApiStatus(network_error=True), None
 
+    @record_api_status
     async def get_info(
             self,
             platform: Literal["ios", "android"] = "ios",
@@ -108,7 +109,7 @@ class BaseGameSign:
             async for attempt in get_async_retry(retry):
                 with attempt:
                     headers["DS"] = generate_ds() if platform == "ios" else generate_ds(platform="android")
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await client.get(self.url_info, headers=headers,
                                                cookies=self.account.cookies.dict(),
                                                timeout=plugin_config.preference.timeout)
@@ -133,6 +134,7 @@ class BaseGameSign:
                 logger.exception(f"获取签到数据 - 请求失败")
                 return BaseApiStatus(network_error=True), None
 
+    @record_api_status
     async def sign(self,
                    platform: Literal["ios", "android"] = "ios",
                    mmt_data: MmtData = None,
@@ -160,8 +162,7 @@ class BaseGameSign:
             headers["Sec-Fetch-Site"] = "same-site"
             headers["DS"] = generate_ds()
         else:
-            await device_login(self.account)
-            await device_save(self.account)
+            await device_register(self.account)
             headers["x-rpc-device_id"] = self.account.device_id_android
             headers["x-rpc-device_model"] = plugin_env.device_config.X_RPC_DEVICE_MODEL_ANDROID
             headers["User-Agent"] = plugin_env.device_config.USER_AGENT_ANDROID
@@ -181,7 +182,7 @@ class BaseGameSign:
                         headers["x-rpc-seccode"] = geetest_result.seccode
                         logger.info("游戏签到 - 尝试使用人机验证结果进行签到")
 
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await client.post(
                             self.url_sign,
                             headers=headers,
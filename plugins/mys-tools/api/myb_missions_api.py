@@ -1,15 +1,14 @@
 import asyncio
 from typing import List, Optional, Tuple, Type, Dict
 
-import httpx
 import tenacity
 
 from ..api.common import ApiResultHandler, is_incorrect_return, create_verification, \
     verify_verification
 from ..model import BaseApiStatus, MissionStatus, MissionData, \
     MissionState, UserAccount, plugin_config, plugin_env, UserData
-from ..utils import logger, generate_ds, \
-    get_async_retry, get_validate
+from ..utils import logger, create_async_client, generate_ds, \
+    get_async_retry, get_validate, record_api_status
 
 URL_SIGN = "https://bbs-api.mihoyo.com/apihub/app/api/signIn"
 URL_GET_POST = "https://bbs-api.miyoushe.com/post/api/feeds/posts?fresh_action=1&gids={}&is_first_initialize=false" \
@@ -109,6 +108,7 @@ class BaseMission:
         self.headers = HEADERS_BASE.copy()
         self.headers["x-rpc-device_id"] = account.device_id_android
 
+    @record_api_status
     async def sign(self, user: UserData, retry: bool = True) -> Tuple[MissionStatus, Optional[int]]:
         """
         签到
@@ -124,7 +124,7 @@ class BaseMission:
                     headers = HEADERS_OLD.copy()
                     headers["x-rpc-device_id"] = self.account.device_id_android
                     headers["DS"] = generate_ds(data=content)
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await client.post(
                             URL_SIGN,
                             headers=headers,
@@ -174,6 +174,7 @@ class BaseMission:
                 logger.exception("米游币任务 - 讨论区签到: 请求失败")
                 return MissionStatus(network_error=True), None
 
+    @record_api_status
     async def get_posts(self, retry: bool = True) -> Tuple[BaseApiStatus, Optional[List[str]]]:
         """
         获取文章ID列表，若失败返回 `None`
@@ -187,7 +188,7 @@ class BaseMission:
                 with attempt:
                     headers = HEADERS_GET_POSTS.copy()
                     headers["x-rpc-device_id"] = self.account.device_id_ios
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await client.get(
                             URL_GET_POST.format(self.gids),
                             headers=headers,
@@ -208,6 +209,7 @@ class BaseMission:
                 logger.exception(f"米游币任务 - 获取文章列表: 请求失败")
                 return BaseApiStatus(network_error=True), None
 
+    @record_api_status
     async def read(self, read_times: int = 5, retry: bool = True) -> MissionStatus:
         """
         阅读
@@ -227,7 +229,7 @@ class BaseMission:
                     async for attempt in get_async_retry(retry):
                         with attempt:
                             self.headers["DS"] = generate_ds(platform="android")
-                            async with httpx.AsyncClient() as client:
+                            async with create_async_client() as client:
                                 res = await client.get(
                                     URL_READ.format(post_id),
                                     headers=self.headers,
@@ -267,6 +269,7 @@ class BaseMission:
 
         return MissionStatus(success=True)
 
+    @record_api_status
     async def like(self, like_times: int = 10, retry: bool = True) -> MissionStatus:
         """
         点赞文章
@@ -288,7 +291,7 @@ class BaseMission:
                             headers = HEADERS_OLD.copy()
                             headers["x-rpc-device_id"] = self.account.device_id_android
                             headers["DS"] = generate_ds(platform="android")
-                            async with httpx.AsyncClient() as client:
+                            async with create_async_client() as client:
                                 res = await client.post(
                                     URL_LIKE, headers=headers,
                                     json={'is_cancel': False, 'post_id': post_id},
@@ -327,6 +330,7 @@ class BaseMission:
 
         return MissionStatus(success=True)
 
+    @record_api_status
     async def share(self, retry: bool = True):
         """
         分享文章
@@ -342,7 +346,7 @@ class BaseMission:
                     headers = HEADERS_OLD.copy()
                     headers["x-rpc-device_id"] = self.account.device_id_android
                     headers["DS"] = generate_ds(platform="android")
-                    async with httpx.AsyncClient() as client:
+                    async with create_async_client() as client:
                         res = await client.get(
                             URL_SHARE.format(posts[0]),
                             headers=headers,
@@ -450,6 +454,7 @@ for subclass in [
     BaseMission.available_games[subclass.__name__] = subclass
 
 
+@record_api_status
 async def get_missions(account: UserAccount, retry: bool = True) -> Tuple[BaseApiStatus, Optional[List[MissionData]]]:
     """
     获取米游币任务信息
@@ -460,7 +465,7 @@ async def get_missions(account: UserAccount, retry: bool = True) -> Tuple[BaseAp
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(URL_MISSION, headers=HEADERS_MISSION,
                                            cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
                                            timeout=plugin_config.preference.timeout)
@@ -484,6 +489,7 @@ async def get_missions(account: UserAccount, retry: bool = True) -> Tuple[BaseAp
             return BaseApiStatus(network_error=True), None
 
 
+@record_api_status
 async def get_missions_state(account: UserAccount, retry: bool = True) -> Tuple[BaseApiStatus, Optional[MissionState]]:
     """
     获取米游币任务完成情况
@@ -497,7 +503,7 @@ async def get_missions_state(account: UserAccount, retry: bool = True) -> Tuple[
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(URL_MISSION_STATE, headers=HEADERS_MISSION,
                                            cookies=account.cookies.dict(v2_stoken=True, cookie_type=True),
                                            timeout=plugin_config.preference.timeout)
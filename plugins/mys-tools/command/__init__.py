@@ -4,3 +4,5 @@ from .login import *
 from .plan import *
 from .setting import *
 from .user_check import *
+from .credential import *
+from .status import *
@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import List, Dict, Tuple, Iterable, Union
+
+from nonebot import on_command
+from nonebot_plugin_apscheduler import scheduler
+
+from ..api.common import get_ltoken_by_stoken, get_cookie_token_by_stoken, get_user_myb
+from ..command.common import CommandRegistry
+from ..model import PluginDataManager, plugin_config, UserAccount, GetCookieStatus, BaseApiStatus, CommandUsage
+from ..utils import logger, GeneralMessageEvent, get_unique_users, get_all_bind, NotificationOutbox, \
+    is_admin, read_admin_list
+
+__all__ = ["refresh_account_cookies", "refresh_all_cookies", "CredentialHealth", "check_all_credentials",
+           "credential_check"]
+
+
+def _refresh_time():
+    """
+    根据每日自动任务的执行时间和提前时间，计算刷新 Cookies 和检查登录状态的定时任务的执行时间
+
+    :return: (时, 分)
+    """
+    hour, minute = map(int, plugin_config.preference.plan_time.split(':'))
+    total = (hour * 60 + minute - plugin_config.preference.cookie_refresh_lead_time) % (24 * 60)
+    return total // 60, total % 60
+
+
+def _collect_accounts() -> Dict[str, Tuple[List[UserAccount], List[str]]]:
+    """
+    获取所有用户的米游社账户（按米游社UID分组）以及对应的用户ID（包含绑定的用户）
+
+    同一米游社账户可能被多个用户分别登录，每个用户的数据中各有一份账户数据
+
+    :return: {米游社UID: ([各用户的账户数据], [用户ID])}
+    """
+    accounts: Dict[str, Tuple[List[UserAccount], List[str]]] = {}
+    for user_id, user in get_unique_users():
+        user_ids = [user_id] + list(get_all_bind(user_id))
+        for account in user.accounts.values():
+            copies, owners = accounts.setdefault(account.bbs_uid, ([], []))
+            copies.append(account)
+            owners.extend(i for i in user_ids if i not in owners)
+    return accounts
+
+
+async def refresh_account_cookies(account: UserAccount) -> GetCookieStatus:
+    """
+    使用账户保存的 stoken_v2 同时刷新 ltoken 和 cookie_token（不写入插件数据文件）
+
+    :param account: 米游社账户数据
+    :return: 刷新 cookie_token 的结果
+    """
+    if not account.cookies.stoken_v2:
+        return GetCookieStatus(missing_stoken_v2=True)
+    if not account.cookies.mid:
+        return GetCookieStatus(missing_mid=True)
+    # 两个请求分别只写入 Cookies 中的 ltoken 和 cookie_token，可以同时进行
+    (ltoken_status, _), (cookie_status, _) = await asyncio.gather(
+        get_ltoken_by_stoken(account.cookies, account.device_id_ios),
+        get_cookie_token_by_stoken(account.cookies, account.device_id_ios)
+    )
+    if not ltoken_status:
+        logger.info(f"{plugin_config.preference.log_head}刷新Cookies - 账户 {account.display_name} 刷新 ltoken 失败")
+    return cookie_status
+
+
+async def refresh_all_cookies():
+    """
+    分批刷新所有账户的 Cookies，全部完成后写入一次插件数据
+
+    同一米游社账户只刷新一次（优先使用保存了 stoken_v2 的那份账户数据），刷新成功后复制到其他用户的账户数据中
+    """
+    account_copies = [copies for copies, _ in _collect_accounts().values()]
+    account_list = [next((account for account in copies if account.cookies.stoken_v2 and account.cookies.mid),
+                         copies[0]) for copies in account_copies]
+
+    batch_size = max(plugin_config.preference.cookie_refresh_batch_size, 1)
+    success_num, expired_num, skipped_num, failed_num = 0, 0, 0, 0
+    for i in range(0, len(account_list), batch_size):
+        if i:
+            await asyncio.sleep(plugin_config.preference.cookie_refresh_batch_interval)
+        batch = account_list[i:i + batch_size]
+        for account, copies, status in zip(batch, account_copies[i:i + batch_size],
+                                           await asyncio.gather(*map(refresh_account_cookies, batch))):
+            if status:
+                success_num += 1
+                for other in copies:
+                    if other is not account:
+                        other.cookies = account.cookies.copy(deep=True)
+            elif status.login_expired:
+                expired_num += 1
+                logger.info(
+                    f"{plugin_config.preference.log_head}刷新Cookies - 账户 {account.display_name} 的 stoken 已失效")
+            elif status.missing_stoken_v2 or status.missing_mid:
+                skipped_num += 1
+            else:
+                failed_num += 1
+    if success_num:
+        PluginDataManager.write_plugin_data()
+    logger.info(f"{plugin_config.preference.log_head}刷新Cookies完成 - "
+                f"成功 {success_num} 个，stoken失效 {expired_num} 个，"
+                f"缺少stoken跳过 {skipped_num} 个，失败 {failed_num} 个")
+
+
+class CredentialHealth:
+    """
+    账户登录状态的检查结果
+
+    检查结果按米游社UID缓存，并记录检查时账户 Cookies 的指纹：
+    用户重新登录或 Cookies 被刷新后指纹改变，之前的登录失效结果随即不再生效。
+    """
+    _results: Dict[str, Tuple[float, str, bool]] = {}
+    """{米游社UID: (检查时间, 检查时的Cookies指纹, 是否登录失效)}"""
+
+    @staticmethod
+    def _fingerprint(account: UserAccount) -> str:
+        """
+        计算账户 Cookies 的指纹
+        """
+        return hashlib.sha256(json.dumps(account.cookies.dict(), sort_keys=True, default=str).encode()).hexdigest()
+
+    @classmethod
+    def record(cls, account: UserAccount, expired: bool):
+        """
+        记录账户的登录状态
+
+        :param account: 米游社账户数据
+        :param expired: 是否登录失效
+        """
+        cls._results[account.bbs_uid] = time.time(), cls._fingerprint(account), expired
+
+    @classmethod
+    def is_expired(cls, account: UserAccount) -> bool:
+        """
+        账户是否在有效期内被检查为登录失效，且之后 Cookies 没有变化
+
+        :param account: 米游社账户数据
+        """
+        if (result := cls._results.get(account.bbs_uid)) is None:
+            return False
+        checked_time, fingerprint, expired = result
+        return expired \
+            and time.time() - checked_time < plugin_config.preference.credential_check_ttl \
+            and fingerprint == cls._fingerprint(account)
+
+    @classmethod
+    async def check(cls, accounts: Iterable[UserAccount]) -> Dict[str, BaseApiStatus]:
+        """
+        通过查询米游币数量检查账户的登录状态，并记录结果
+
+        :param accounts: 需要检查的账户
+        :return: {米游社UID: 查询结果}
+        """
+        semaphore = asyncio.Semaphore(max(plugin_config.preference.credential_check_concurrency, 1))
+
+        async def probe(account: UserAccount) -> Tuple[str, BaseApiStatus]:
+            async with semaphore:
+                status, _ = await get_user_myb(account)
+            # 请求失败时无法判断登录状态，不记录
+            if status or status.login_expired:
+                cls.record(account, status.login_expired)
+            return account.bbs_uid, status
+
+        return dict(await asyncio.gather(*map(probe, accounts)))
+
+
+async def check_all_credentials(notify: bool = False) -> str:
+    """
+    检查所有账户的登录状态
+
+    :param notify: 是否通知登录失效的账户所属的用户重新登录（通知会立即发出，先于每日自动任务的通知）
+    :return: 检查结果汇总文本
+    """
+    accounts = _collect_accounts()
+    results = await CredentialHealth.check(copies[0] for copies, _ in accounts.values())
+    valid = [bbs_uid for bbs_uid, status in results.items() if status]
+    expired = [bbs_uid for bbs_uid, status in results.items() if status.login_expired]
+    failed = [bbs_uid for bbs_uid, status in results.items() if not status and not status.login_expired]
+
+    if notify:
+        expired_by_user: Dict[str, List[UserAccount]] = {}
+        for bbs_uid in expired:
+            copies, user_ids = accounts[bbs_uid]
+            for user_id in user_ids:
+                expired_by_user.setdefault(user_id, []).append(copies[0])
+        for user_id, user_accounts in expired_by_user.items():
+            user = PluginDataManager.plugin_data.users.get(user_id)
+            if user and user.enable_notice:
+                names = "\n".join(f"- {account.display_name}" for account in user_accounts)
+                NotificationOutbox.put(
+                    user_id, f"⚠️以下米游社账户登录已失效，将暂停自动任务，请重新登录：\n{names}")
+        NotificationOutbox.flush(expired_by_user.keys())
+
+    summary = (f"🩺账户登录状态检查完成"
+               f"\n共 {len(results)} 个账户"
+               f"\n✅有效：{len(valid)}"
+               f"\n⚠️登录失效：{len(expired)}"
+               f"\n❓检查失败：{len(failed)}")
+    if expired:
+        max_lines = 20
+        summary += "\n\n登录失效的账户：\n" + "\n".join(
+            f"- {accounts[bbs_uid][0][0].display_name}（用户 {', '.join(accounts[bbs_uid][1])}）"
+            for bbs_uid in expired[:max_lines]
+        )
+        if len(expired) > max_lines:
+            summary += f"\n...等 {len(expired)} 个账户"
+    logger.info(f"{plugin_config.preference.log_head}{summary}")
+    return summary
+
+
+credential_check = on_command(plugin_config.preference.command_start + '账户检查', priority=5, block=True)
+
+CommandRegistry.set_usage(
+    credential_check,
+    CommandUsage(
+        name="账户检查",
+        description="（管理员）检查所有米游社账户的登录状态，登录失效的账户将不参与自动任务"
+    )
+)
+
+
+@credential_check.handle()
+async def _(event: Union[GeneralMessageEvent]):
+    if not is_admin(event.get_user_id()):
+        await credential_check.finish("⚠️你暂无权限执行此操作，只有管理员名单中的用户可以执行此操作")
+    await credential_check.send("⏳开始检查所有账户的登录状态...")
+    await credential_check.finish(await check_all_credentials())
+
+
+@scheduler.scheduled_job("cron",
+                         hour=_refresh_time()[0],
+                         minute=_refresh_time()[1],
+                         id="credential_maintenance")
+async def credential_schedule():
+    """
+    在每日自动任务之前刷新所有账户的 Cookies 并检查登录状态，
+    使每日任务使用有效的 cookie_token，并跳过登录失效的账户
+    """
+    if plugin_config.preference.enable_cookie_refresh:
+        logger.info(f"{plugin_config.preference.log_head}开始刷新所有账户的Cookies")
+        await refresh_all_cookies()
+    if plugin_config.preference.enable_credential_check:
+        logger.info(f"{plugin_config.preference.log_head}开始检查所有账户的登录状态")
+        summary = await check_all_credentials(notify=True)
+        for admin_id in read_admin_list():
+            NotificationOutbox.put(admin_id, summary)
+        NotificationOutbox.flush()
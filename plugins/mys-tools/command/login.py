@@ -13,14 +13,14 @@ from nonebot.internal.params import ArgStr
 from nonebot.params import T_State
 
 from ..api.common import get_ltoken_by_stoken, get_cookie_token_by_stoken, get_device_fp, fetch_game_token_qrcode, \
-    query_game_token_qrcode, \
+    QrCodeLoginPoller, \
     get_token_by_game_token, get_cookie_token_by_game_token
 from ..command.common import CommandRegistry
 from ..model import PluginDataManager, plugin_config, UserAccount, UserData, CommandUsage, BBSCookies, \
     QueryGameTokenQrCodeStatus, GetCookieStatus
 from ..utils import logger, COMMAND_BEGIN, GeneralMessageEvent, GeneralPrivateMessageEvent, \
     GeneralGroupMessageEvent, \
-    read_blacklist, read_whitelist, generate_device_id, generate_qr_img
+    is_blacklisted, is_whitelisted, generate_device_id, generate_qr_img, PrivateTargetCache
 
 __all__ = ["get_cookie", "output_cookies"]
 
@@ -39,10 +39,10 @@ CommandRegistry.set_usage(
 async def handle_first_receive(event: Union[GeneralMessageEvent]):
     user_num = len(set(PluginDataManager.plugin_data.users.values()))  # 由于加入了用户数据绑定功能，可能存在重复的用户数据对象，需要去重
     if plugin_config.preference.enable_blacklist:
-        if event.get_user_id() in read_blacklist():
+        if is_blacklisted(event.get_user_id()):
             await get_cookie.finish("⚠️您已被加入黑名单，无法使用本功能")
     elif plugin_config.preference.enable_whitelist:
-        if event.get_user_id() not in read_whitelist():
+        if not is_whitelisted(event.get_user_id()):
             await get_cookie.finish("⚠️您不在白名单内，无法使用本功能")
     if user_num <= plugin_config.preference.max_user or plugin_config.preference.max_user in [-1, 0]:
         # 获取用户数据对象
@@ -52,6 +52,7 @@ async def handle_first_receive(event: Union[GeneralMessageEvent]):
         # 如果是QQ频道，需要记录频道ID
         if isinstance(event, DirectMessageCreateEvent):
             user.qq_guild[user_id] = event.channel_id
+            PrivateTargetCache.invalidate(user_id)
 
         # 1. 获取 GameToken 登录二维码
         device_id = generate_device_id()
@@ -78,25 +79,17 @@ async def handle_first_receive(event: Union[GeneralMessageEvent]):
                     await get_cookie.finish("⚠️发送二维码失败，无法登录")
 
             # 2. 从二维码登录获取 GameToken
-            qrcode_query_times = round(
-                plugin_config.preference.qrcode_wait_time / plugin_config.preference.qrcode_query_interval
-            )
             bbs_uid, game_token = None, None
-            for _ in range(qrcode_query_times):
-                login_status, query_qrcode_ret = await query_game_token_qrcode(
-                    qrcode_ticket,
-                    device_id,
-                    plugin_config.preference.game_token_app_id
-                )
-                if query_qrcode_ret:
-                    bbs_uid, game_token = query_qrcode_ret
-                    logger.success(f"用户 {bbs_uid} 成功获取 game_token: {game_token}")
-                    break
-                elif login_status.qrcode_expired:
-                    get_cookie.finish("⚠️二维码已过期，登录失败")
-                elif not login_status:
-                    await asyncio.sleep(plugin_config.preference.qrcode_query_interval)
-                    continue
+            login_status, query_qrcode_ret = await QrCodeLoginPoller.wait(
+                qrcode_ticket,
+                device_id,
+                plugin_config.preference.game_token_app_id
+            )
+            if query_qrcode_ret:
+                bbs_uid, game_token = query_qrcode_ret
+                logger.success(f"用户 {bbs_uid} 成功获取 game_token: {game_token}")
+            elif login_status.qrcode_expired:
+                await get_cookie.finish("⚠️二维码已过期，登录失败")
 
             if bbs_uid and game_token:
                 cookies = BBSCookies()
@@ -114,10 +107,8 @@ async def handle_first_receive(event: Union[GeneralMessageEvent]):
                     account = user.accounts[bbs_uid]
                 else:
                     account.cookies.update(cookies)
-                fp_status, account.device_fp = await get_device_fp(device_id)
-                if fp_status:
-                    logger.success(f"用户 {bbs_uid} 成功获取 device_fp: {account.device_fp}")
-                PluginDataManager.write_plugin_data()
+                # device_fp 与后续的 Cookies 获取互不依赖，同时进行
+                fp_task = asyncio.create_task(get_device_fp(device_id))
 
                 if login_status:
                     # 3. 通过 GameToken 获取 stoken_v2
@@ -125,35 +116,35 @@ async def handle_first_receive(event: Union[GeneralMessageEvent]):
                     if login_status:
                         logger.success(f"用户 {bbs_uid} 成功获取 stoken_v2: {cookies.stoken_v2}")
                         account.cookies.update(cookies)
-                        PluginDataManager.write_plugin_data()
 
                         if account.cookies.stoken_v2:
-                            # 5. 通过 stoken_v2 获取 ltoken
-                            login_status, cookies = await get_ltoken_by_stoken(account.cookies, device_id)
-                            if login_status:
-                                logger.success(f"用户 {bbs_uid} 成功获取 ltoken: {cookies.ltoken}")
-                                account.cookies.update(cookies)
-                                PluginDataManager.write_plugin_data()
-
-                            # 6.1. 通过 stoken_v2 获取 cookie_token
-                            login_status, cookies = await get_cookie_token_by_stoken(account.cookies, device_id)
-                            if login_status:
-                                logger.success(f"用户 {bbs_uid} 成功获取 cookie_token: {cookies.cookie_token}")
-                                account.cookies.update(cookies)
-                                PluginDataManager.write_plugin_data()
-
-                                logger.success(
-                                    f"{plugin_config.preference.log_head}米游社账户 {bbs_uid} 绑定成功")
-                                await get_cookie.finish(f"🎉米游社账户 {bbs_uid} 绑定成功")
+                            # 5. 通过 stoken_v2 获取 ltoken 和 6.1. 通过 stoken_v2 获取 cookie_token
+                            # 两个请求分别只写入 Cookies 中的 ltoken 和 cookie_token，可以同时进行
+                            (ltoken_status, ltoken_cookies), (login_status, cookies) = await asyncio.gather(
+                                get_ltoken_by_stoken(account.cookies, device_id),
+                                get_cookie_token_by_stoken(account.cookies, device_id)
+                            )
+                            if ltoken_status:
+                                logger.success(f"用户 {bbs_uid} 成功获取 ltoken: {ltoken_cookies.ltoken}")
+                                account.cookies.update(ltoken_cookies)
                         else:
                             # 6.2. 通过 GameToken 获取 cookie_token
                             login_status, cookies = await get_cookie_token_by_game_token(bbs_uid, game_token)
-                            if login_status:
-                                logger.success(f"用户 {bbs_uid} 成功获取 cookie_token: {cookies.cookie_token}")
-                                account.cookies.update(cookies)
-                                PluginDataManager.write_plugin_data()
+                        if login_status:
+                            logger.success(f"用户 {bbs_uid} 成功获取 cookie_token: {cookies.cookie_token}")
+                            account.cookies.update(cookies)
+
+                fp_status, account.device_fp = await fp_task
+                if fp_status:
+                    logger.success(f"用户 {bbs_uid} 成功获取 device_fp: {account.device_fp}")
+                PluginDataManager.write_plugin_data()
+
+                if login_status:
+                    logger.success(
+                        f"{plugin_config.preference.log_head}米游社账户 {bbs_uid} 绑定成功")
+                    await get_cookie.finish(f"🎉米游社账户 {bbs_uid} 绑定成功")
             else:
-                get_cookie.finish("⚠️获取二维码扫描状态超时，请尝试重新登录")
+                await get_cookie.finish("⚠️获取二维码扫描状态超时，请尝试重新登录")
 
         if not login_status:
             notice_text = "⚠️登录失败："
@@ -1,5 +1,5 @@
 import asyncio
-from typing import Union, Optional, Iterable, Dict
+from typing import Union, Optional, Iterable, Dict, List, Tuple
 
 from nonebot import on_command, get_adapters
 from nonebot.adapters.onebot.v11 import MessageSegment as OneBotV11MessageSegment, Adapter as OneBotV11Adapter, \
@@ -11,17 +11,17 @@ from nonebot.exception import ActionFailed
 from nonebot.internal.matcher import Matcher
 from nonebot.params import CommandArg
 from nonebot_plugin_apscheduler import scheduler
-from nonebot_plugin_saa import Image
 from pydantic import BaseModel
 from ..api import BaseGameSign
 from ..api import BaseMission, get_missions_state
 from ..api.common import genshin_note, get_game_record, starrail_note, zzz_note
 from ..command.common import CommandRegistry
-from ..model import (MissionStatus, PluginDataManager, plugin_config, UserData, CommandUsage, GenshinNoteNotice,
-                     StarRailNoteNotice, ZzzNoteNotice)
-from ..utils import get_file, logger, COMMAND_BEGIN, GeneralMessageEvent, \
-    send_private_msg, get_all_bind, \
-    get_unique_users, get_validate, read_admin_list
+from ..command.credential import CredentialHealth
+from ..model import (MissionStatus, PluginDataManager, plugin_config, UserData, UserAccount, CommandUsage,
+                     GenshinNoteNotice, StarRailNoteNotice, ZzzNoteNotice, BaseApiStatus, GameSignResult)
+from ..utils import MediaCache, logger, COMMAND_BEGIN, GeneralMessageEvent, \
+    get_all_bind, NotificationOutbox, \
+    get_unique_users, get_validate, is_admin, RunReport, read_admin_list
 
 __all__ = [
     "manually_game_sign", "manually_bbs_sign", "manually_genshin_note_check",
@@ -50,7 +50,7 @@ async def _(bot: Bot, event: Union[GeneralMessageEvent], matcher: Matcher, comma
         await manually_game_sign.finish(f"⚠️你尚未绑定米游社账户，请先使用『{COMMAND_BEGIN}登录』进行登录")
     if command_arg:
         if (specified_user_id := str(command_arg)) == "*" or specified_user_id.isdigit():
-            if user_id not in read_admin_list():
+            if not is_admin(user_id):
                 await manually_game_sign.finish("⚠️你暂无权限执行此操作，只有管理员名单中的用户可以执行此操作")
             else:
                 if specified_user_id == "*":
@@ -209,13 +209,116 @@ async def _(event: Union[GeneralMessageEvent], matcher: Matcher):
     await zzz_note_check(user=user, user_ids=[user_id], matcher=matcher)
 
 
+async def _perform_single_game_sign(
+        signer: BaseGameSign,
+        user: UserData,
+        matcher: Matcher = None,
+        notify: bool = False
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    执行单个游戏的签到，返回需要发送给用户的通知
+
+    :param signer: 游戏签到对象
+    :param user: 用户数据
+    :param matcher: 事件响应器
+    :param notify: 自动签到时是否有需要接收签到结果的用户
+    :return: 通知列表 [(通知文本, 签到奖励图片URL)]
+    """
+    account = signer.account
+    notices: List[Tuple[str, Optional[str]]] = []
+    with RunReport.phase("record"):
+        get_info_status, info = await signer.get_info(account.platform)
+    if not get_info_status:
+        notices.append((f"⚠️账户 {account.display_name} 获取签到记录失败", None))
+
+    # 若没签到，则进行签到功能；若获取今日签到情况失败，仍可继续
+    if get_info_status and info.is_sign:
+        sign_result = GameSignResult.signed_before(info)
+    else:
+        with RunReport.phase("sign"):
+            sign_status, mmt_data = await signer.sign(platform=account.platform)
+            if sign_status.need_verify:
+                if plugin_config.preference.geetest_url or user.geetest_url:
+                    if matcher:
+                        await matcher.send("⏳正在尝试完成人机验证，请稍后...", at_sender=True)
+                    geetest_result = await get_validate(user, mmt_data.gt, mmt_data.challenge)
+                    sign_status, _ = await signer.sign(platform=account.platform, mmt_data=mmt_data,
+                                                       geetest_result=geetest_result)
+
+        if not sign_status and (notify or matcher):
+            if sign_status.login_expired:
+                message = f"⚠️账户 {account.display_name} 🎮『{signer.name}』签到时服务器返回登录失效，请尝试重新登录绑定账户"
+            elif sign_status.need_verify:
+                message = (f"⚠️账户 {account.display_name} 🎮『{signer.name}』签到时可能遇到验证码拦截，"
+                           "请尝试使用命令『/账号设置』更改设备平台，若仍失败请手动前往米游社签到")
+            else:
+                message = f"⚠️账户 {account.display_name} 🎮『{signer.name}』签到失败，请稍后再试"
+            notices.append((message, None))
+            await asyncio.sleep(plugin_config.preference.sleep_time)
+            return notices
+
+        sign_result = GameSignResult.after_sign(sign_status, info)
+        await asyncio.sleep(plugin_config.preference.sleep_time)
+
+    # 有用户打开通知或手动签到时，进行通知
+    if notify or matcher:
+        icon_url = None
+        # 签到前的签到记录获取失败时，才需要重新获取签到后的签到记录
+        with RunReport.phase("rewards"):
+            if sign_result.info:
+                get_info_status, info = BaseApiStatus(success=True), sign_result.info
+            else:
+                get_info_status, info = await signer.get_info(account.platform)
+            get_award_status, awards = await signer.get_rewards()
+        if not get_info_status or not get_award_status:
+            msg = f"⚠️账户 {account.display_name} 🎮『{signer.name}』获取签到结果失败！请手动前往米游社查看"
+        else:
+            award = awards[info.total_sign_day - 1]
+            if info.is_sign:
+                status = "签到成功！" if not sign_result.already_signed else "已经签到过了"
+                msg = f"🪪账户 {account.display_name}" \
+                      f"\n🎮『{signer.name}』" \
+                      f"\n🎮状态: {status}" \
+                      f"\n{signer.record.nickname}·{signer.record.level}" \
+                      "\n\n🎁今日签到奖励：" \
+                      f"\n{award.name} * {award.cnt}" \
+                      f"\n\n📅本月签到次数：{info.total_sign_day}"
+                # 预先下载签到奖励图片，下载失败时不附带图片
+                with RunReport.phase("rewards"):
+                    if await MediaCache.get_file(award.icon) is not None:
+                        icon_url = award.icon
+            else:
+                msg = (f"⚠️账户 {account.display_name} 🎮『{signer.name}』签到失败！请尝试重新签到，"
+                       "若多次失败请尝试重新登录绑定账户")
+        notices.append((msg, icon_url))
+    return notices
+
+
+def _account_recipients(user: UserData, user_ids: Iterable[str], account: UserAccount,
+                        account_recipients: Optional[Dict[str, List[str]]]) -> Tuple[List[str], bool]:
+    """
+    获取账户执行结果的接收者
+
+    :param user: 执行任务的用户数据
+    :param user_ids: 发送通知的所有用户ID
+    :param account: 米游社账户
+    :param account_recipients: 自动任务中各账户的接收者，为None时使用 ``user_ids`` 并按该用户的通知设置决定是否通知
+    :return: (接收通知的用户ID列表, 是否发送执行结果通知)
+    """
+    if account_recipients is None:
+        return list(user_ids), user.enable_notice
+    recipients = account_recipients[account.bbs_uid]
+    return recipients, bool(recipients)
+
+
 async def perform_game_sign(
 
         user: UserData,
         user_ids: Iterable[str],
         matcher: Matcher = None,
         bot: Bot = None,
-        event: Union[GeneralMessageEvent] = None
+        event: Union[GeneralMessageEvent] = None,
+        account_recipients: Optional[Dict[str, List[str]]] = None
 ):
     """
     执行游戏签到函数，并发送给用户签到消息。
@@ -225,134 +328,76 @@ async def perform_game_sign(
     :param matcher: 事件响应器
     :param bot 机器人
     :param event: 事件
+    :param account_recipients: 可选，只执行其中的账户，且各账户的通知发送给对应的用户ID
     """
     failed_accounts = []
-    for account in user.accounts.values():
-        # 自动签到时，要求用户打开了签到功能；手动签到时都可以调用执行。
-        if not matcher and not account.enable_game_sign:
+    for account in RunReport.track_accounts(user.accounts.values()):
+        if account_recipients is not None and account.bbs_uid not in account_recipients:
+            continue
+        recipients, notify = _account_recipients(user, user_ids, account, account_recipients)
+        # 自动签到时，要求用户打开了签到功能且账户未被检查为登录失效；手动签到时都可以调用执行。
+        if not matcher and (not account.enable_game_sign or CredentialHealth.is_expired(account)):
             continue
-        signed = False
-        """是否已经完成过签到"""
         msg_list = []
-        game_record_status, records = await get_game_record(account)
+        with RunReport.phase("record"):
+            game_record_status, records = await get_game_record(account)
         if game_record_status.login_expired:
+            CredentialHealth.record(account, expired=True)
             if matcher:
                 await matcher.send(f"⚠️账户 {account.display_name} 登录过期，请重新登录", at_sender=True)
             else:
-                for user_id in user_ids:
-                    await send_private_msg(
-                        user_id=user_id,
-                        message=f"⚠️账户 {account.display_name} 登录过期，请重新登录"
-                    )
+                for user_id in recipients:
+                    NotificationOutbox.put(user_id, f"⚠️账户 {account.display_name} 登录过期，请重新登录")
+            continue
         elif not game_record_status:
             if matcher:
                 await matcher.send(f"⚠️账户 {account.display_name} 获取游戏账号信息失败，请重新尝试", at_sender=True)
             else:
-                for user_id in user_ids:
-                    await send_private_msg(
-                        user_id=user_id,
-                        message=f"⚠️账户 {account.display_name} 获取游戏账号信息失败，请重新尝试"
-                    )
+                for user_id in recipients:
+                    NotificationOutbox.put(user_id, f"⚠️账户 {account.display_name} 获取游戏账号信息失败，请重新尝试")
             continue
-        games_has_record = []
-        for class_type in BaseGameSign.available_game_signs:
-            signer = class_type(account, records)
-            if not signer.has_record:
-                continue
-            else:
-                games_has_record.append(signer)
-                get_info_status, info = await signer.get_info(account.platform)
-            if not get_info_status:
-                if matcher:
-                    await matcher.send(f"⚠️账户 {account.display_name} 获取签到记录失败", at_sender=True)
-                else:
-                    for user_id in user_ids:
-                        await send_private_msg(
-                            user_id=user_id,
-                            message=f"⚠️账户 {account.display_name} 获取签到记录失败"
-                        )
-            else:
-                signed = info.is_sign
-
-            # 若没签到，则进行签到功能；若获取今日签到情况失败，仍可继续
-            if (get_info_status and not info.is_sign) or not get_info_status:
-                sign_status, mmt_data = await signer.sign(platform=account.platform)
-                if sign_status.need_verify:
-                    if plugin_config.preference.geetest_url or user.geetest_url:
-                        if matcher:
-                            await matcher.send("⏳正在尝试完成人机验证，请稍后...", at_sender=True)
-                        geetest_result = await get_validate(user, mmt_data.gt, mmt_data.challenge)
-                        sign_status, _ = await signer.sign(platform=account.platform, mmt_data=mmt_data,
-                                                           geetest_result=geetest_result)
-
-                if not sign_status and (user.enable_notice or matcher):
-                    if sign_status.login_expired:
-                        message = f"⚠️账户 {account.display_name} 🎮『{signer.name}』签到时服务器返回登录失效，请尝试重新登录绑定账户"
-                    elif sign_status.need_verify:
-                        message = (f"⚠️账户 {account.display_name} 🎮『{signer.name}』签到时可能遇到验证码拦截，"
-                                   "请尝试使用命令『/账号设置』更改设备平台，若仍失败请手动前往米游社签到")
-                    else:
-                        message = f"⚠️账户 {account.display_name} 🎮『{signer.name}』签到失败，请稍后再试"
-                    if matcher:
-                        if isinstance(event, OneBotV11GroupMessageEvent):
-                            msg_list.append(message)
-                        else:
-                            await matcher.send(message, at_sender=True)
-                    elif user.enable_notice:
-                        for user_id in user_ids:
-                            await send_private_msg(user_id=user_id, message=message)
-                    await asyncio.sleep(plugin_config.preference.sleep_time)
-                    continue
+        games_has_record = sorted(
+            filter(lambda x: x.has_record, map(lambda x: x(account, records), BaseGameSign.available_game_signs)),
+            key=lambda x: x.game_id
+        )
 
-                await asyncio.sleep(plugin_config.preference.sleep_time)
+        # 各游戏的签到互不依赖，并发执行以缩短单个账户的签到耗时，结果仍按游戏顺序发送
+        semaphore = asyncio.Semaphore(plugin_config.preference.game_sign_concurrency)
 
-            # 用户打开通知或手动签到时，进行通知
-            if user.enable_notice or matcher:
-                onebot_img_msg, saa_img, qq_guild_img_msg = "", "", ""
-                get_info_status, info = await signer.get_info(account.platform)
-                get_award_status, awards = await signer.get_rewards()
-                if not get_info_status or not get_award_status:
-                    msg = f"⚠️账户 {account.display_name} 🎮『{signer.name}』获取签到结果失败！请手动前往米游社查看"
-                else:
-                    award = awards[info.total_sign_day - 1]
-                    if info.is_sign:
-                        status = "签到成功！" if not signed else "已经签到过了"
-                        msg = f"🪪账户 {account.display_name}" \
-                              f"\n🎮『{signer.name}』" \
-                              f"\n🎮状态: {status}" \
-                              f"\n{signer.record.nickname}·{signer.record.level}" \
-                              "\n\n🎁今日签到奖励：" \
-                              f"\n{award.name} * {award.cnt}" \
-                              f"\n\n📅本月签到次数：{info.total_sign_day}"
-                        img_file = await get_file(award.icon)
-                        onebot_img_msg = OneBotV11MessageSegment.image(img_file)
-                        saa_img = Image(img_file)
-                        qq_guild_img_msg = QQGuildMessageSegment.file_image(img_file)
-                    else:
-                        msg = (f"⚠️账户 {account.display_name} 🎮『{signer.name}』签到失败！请尝试重新签到，"
-                               "若多次失败请尝试重新登录绑定账户")
+        async def sign_with_limit(signer: BaseGameSign):
+            async with semaphore:
+                return await _perform_single_game_sign(signer, user, matcher, notify)
+
+        results = await asyncio.gather(*map(sign_with_limit, games_has_record))
+        with RunReport.phase("build_notices"):
+            for msg, icon_url in (notice for notices in results for notice in notices):
                 if matcher:
                     try:
                         if isinstance(event, OneBotV11MessageEvent):
+                            onebot_img_msg = ""
+                            if icon_url:
+                                onebot_img_msg = OneBotV11MessageSegment.image(
+                                    await MediaCache.get_payload(icon_url, OneBotV11Adapter))
                             if isinstance(event, OneBotV11GroupMessageEvent):
                                 msg_list.append(msg + onebot_img_msg)
                             else:
                                 await matcher.send(msg + onebot_img_msg, at_sender=True)
                         elif isinstance(event, QQGuildMessageEvent):
                             await matcher.send(msg)
-                            await matcher.send(qq_guild_img_msg)
+                            if icon_url:
+                                await matcher.send(QQGuildMessageSegment.file_image(
+                                    await MediaCache.get_payload(icon_url, QQGuildAdapter)))
                     except (ActionFailed, AuditException):
                         pass
                 else:
+                    # 每个 Adapter 只构建一次图片数据，所有接收者共用同一条消息；
+                    # QQ频道私信中的图片会由通知发件箱拆分为单独的消息发送
                     for adapter in get_adapters().values():
-                        if isinstance(adapter, OneBotV11Adapter):
-                            for user_id in user_ids:
-                                await send_private_msg(use=adapter, user_id=user_id, message=msg + saa_img)
-                        elif isinstance(adapter, QQGuildAdapter):
-                            for user_id in user_ids:
-                                await send_private_msg(use=adapter, user_id=user_id, message=msg)
-                                await send_private_msg(use=adapter, user_id=user_id, message=qq_guild_img_msg)
-            await asyncio.sleep(plugin_config.preference.sleep_time)
+                        if isinstance(adapter, (OneBotV11Adapter, QQGuildAdapter)):
+                            image = await MediaCache.get_image(icon_url, adapter) if icon_url else None
+                            message = msg + image if image else msg
+                            for user_id in recipients:
+                                NotificationOutbox.put(user_id, message, use=adapter)
         if msg_list:  # 在群聊触发游戏签到将使用合并消息
             def build_forward_msg(msg):
                 return {"type": "node", "data": {"nickname": "流萤", "user_id": "100723375", "content": msg}}
@@ -366,11 +411,8 @@ async def perform_game_sign(
             if matcher:
                 await matcher.send(f"⚠️您的米游社账户 {account.display_name} 下不存在任何游戏账号，已跳过签到")
             else:
-                for user_id in user_ids:
-                    await send_private_msg(
-                        user_id=user_id,
-                        message=f"⚠️您的米游社账户 {account.display_name} 下不存在任何游戏账号，已跳过签到"
-                    )
+                for user_id in recipients:
+                    NotificationOutbox.put(user_id, f"⚠️您的米游社账户 {account.display_name} 下不存在任何游戏账号，已跳过签到")
 
     # 如果全部登录失效，则关闭通知
     if len(failed_accounts) == len(user.accounts):
@@ -378,39 +420,40 @@ async def perform_game_sign(
         PluginDataManager.write_plugin_data()
 
 
-async def perform_bbs_sign(user: UserData, user_ids: Iterable[str], matcher: Matcher = None):
+async def perform_bbs_sign(user: UserData, user_ids: Iterable[str], matcher: Matcher = None,
+                           account_recipients: Optional[Dict[str, List[str]]] = None):
     """
     执行米游币任务函数，并发送给用户任务执行消息。
 
     :param user: 用户数据
     :param user_ids: 发送通知的所有用户ID
     :param matcher: 事件响应器
+    :param account_recipients: 可选，只执行其中的账户，且各账户的通知发送给对应的用户ID
     """
     failed_accounts = []
-    for account in user.accounts.values():
-        # 自动执行米游币任务时，要求用户打开了米游币任务功能；手动执行米游币任务时都可以调用执行。
-        if not matcher and not account.enable_mission:
+    for account in RunReport.track_accounts(user.accounts.values()):
+        if account_recipients is not None and account.bbs_uid not in account_recipients:
+            continue
+        recipients, notify = _account_recipients(user, user_ids, account, account_recipients)
+        # 自动执行米游币任务时，要求用户打开了米游币任务功能且账户未被检查为登录失效；手动执行米游币任务时都可以调用执行。
+        if not matcher and (not account.enable_mission or CredentialHealth.is_expired(account)):
             continue
 
-        missions_state_status, missions_state = await get_missions_state(account)
+        with RunReport.phase("record"):
+            missions_state_status, missions_state = await get_missions_state(account)
         if not missions_state_status:
             if missions_state_status.login_expired:
+                CredentialHealth.record(account, expired=True)
                 if matcher:
                     await matcher.send(f'⚠️账户 {account.display_name} 登录失效，请重新登录')
                 else:
-                    for user_id in user_ids:
-                        await send_private_msg(
-                            user_id=user_id,
-                            message=f'⚠️账户 {account.display_name} 登录失效，请重新登录'
-                        )
+                    for user_id in recipients:
+                        NotificationOutbox.put(user_id, f'⚠️账户 {account.display_name} 登录失效，请重新登录')
             if matcher:
                 await matcher.send(f'⚠️账户 {account.display_name} 获取任务完成情况请求失败，你可以手动前往App查看')
             else:
-                for user_id in user_ids:
-                    await send_private_msg(
-                        user_id=user_id,
-                        message=f'⚠️账户 {account.display_name} 获取任务完成情况请求失败，你可以手动前往App查看'
-                    )
+                for user_id in recipients:
+                    NotificationOutbox.put(user_id, f'⚠️账户 {account.display_name} 获取任务完成情况请求失败，你可以手动前往App查看')
             continue
         myb_before_mission = missions_state.current_myb
 
@@ -441,15 +484,16 @@ async def perform_bbs_sign(user: UserData, user_ids: Iterable[str], matcher: Mat
                     MissionStatus()
                 )
                 sign_points: Optional[int] = None
-                for key_name in missions_state.state_dict:
-                    if key_name == BaseMission.SIGN:
-                        sign_status, sign_points = await mission_obj.sign(user)
-                    elif key_name == BaseMission.VIEW:
-                        read_status = await mission_obj.read()
-                    elif key_name == BaseMission.LIKE:
-                        like_status = await mission_obj.like()
-                    elif key_name == BaseMission.SHARE:
-                        share_status = await mission_obj.share()
+                with RunReport.phase("missions"):
+                    for key_name in missions_state.state_dict:
+                        if key_name == BaseMission.SIGN:
+                            sign_status, sign_points = await mission_obj.sign(user)
+                        elif key_name == BaseMission.VIEW:
+                            read_status = await mission_obj.read()
+                        elif key_name == BaseMission.LIKE:
+                            like_status = await mission_obj.like()
+                        elif key_name == BaseMission.SHARE:
+                            share_status = await mission_obj.share()
 
                 if matcher:
                     await matcher.send(message=
@@ -461,29 +505,24 @@ async def perform_bbs_sign(user: UserData, user_ids: Iterable[str], matcher: Mat
                                        at_sender=True
                                        )
 
-        # 用户打开通知或手动任务时，进行通知
-        if user.enable_notice or matcher:
-            missions_state_status, missions_state = await get_missions_state(account)
+        # 有用户打开通知或手动任务时，进行通知
+        if notify or matcher:
+            with RunReport.phase("record"):
+                missions_state_status, missions_state = await get_missions_state(account)
             if not missions_state_status:
                 if missions_state_status.login_expired:
                     if matcher:
                         await matcher.send(f'⚠️账户 {account.display_name} 登录失效，请重新登录', at_sender=True)
                     else:
-                        for user_id in user_ids:
-                            await send_private_msg(
-                                user_id=user_id,
-                                message=f'⚠️账户 {account.display_name} 登录失效，请重新登录'
-                            )
+                        for user_id in recipients:
+                            NotificationOutbox.put(user_id, f'⚠️账户 {account.display_name} 登录失效，请重新登录')
                     continue
                 if matcher:
                     await matcher.send(
                         f'⚠️账户 {account.display_name} 获取任务完成情况请求失败，你可以手动前往App查看', at_sender=True)
                 else:
-                    for user_id in user_ids:
-                        await send_private_msg(
-                            user_id=user_id,
-                            message=f'⚠️账户 {account.display_name} 获取任务完成情况请求失败，你可以手动前往App查看'
-                        )
+                    for user_id in recipients:
+                        NotificationOutbox.put(user_id, f'⚠️账户 {account.display_name} 获取任务完成情况请求失败，你可以手动前往App查看')
                 continue
             if all(current == mission.threshold for mission, current in missions_state.state_dict.values()):
                 notice_string = "🎉已完成今日米游币任务"
@@ -510,8 +549,8 @@ async def perform_bbs_sign(user: UserData, user_ids: Iterable[str], matcher: Mat
             if matcher:
                 await matcher.send(msg, at_sender=True)
             else:
-                for user_id in user_ids:
-                    await send_private_msg(user_id=user_id, message=msg)
+                for user_id in recipients:
+                    NotificationOutbox.put(user_id, msg)
 
     # 如果全部登录失效，则关闭通知
     if len(failed_accounts) == len(user.accounts):
@@ -519,19 +558,25 @@ async def perform_bbs_sign(user: UserData, user_ids: Iterable[str], matcher: Mat
         PluginDataManager.write_plugin_data()
 
 
-async def genshin_note_check(user: UserData, user_ids: Iterable[str], matcher: Matcher = None):
+async def genshin_note_check(user: UserData, user_ids: Iterable[str], matcher: Matcher = None,
+                             account_recipients: Optional[Dict[str, List[str]]] = None):
     """
     查看原神实时便签函数，并发送给用户任务执行消息。
 
     :param user: 用户对象
     :param user_ids: 发送通知的所有用户ID
     :param matcher: 事件响应器
+    :param account_recipients: 可选，只执行其中的账户，且各账户的通知发送给对应的用户ID
     """
-    for account in user.accounts.values():
+    for account in RunReport.track_accounts(user.accounts.values()):
+        if account_recipients is not None and account.bbs_uid not in account_recipients:
+            continue
+        recipients = account_recipients[account.bbs_uid] if account_recipients is not None else user_ids
         note_notice_status.setdefault(account.bbs_uid, NoteNoticeStatus())
         genshin_notice = note_notice_status[account.bbs_uid].genshin
-        if account.enable_resin or matcher:
-            genshin_board_status, note = await genshin_note(account)
+        if account.enable_resin and not CredentialHealth.is_expired(account) or matcher:
+            with RunReport.phase("record"):
+                genshin_board_status, note = await genshin_note(account)
             if not genshin_board_status:
                 if matcher:
                     if genshin_board_status.login_expired:
@@ -605,23 +650,29 @@ async def genshin_note_check(user: UserData, user_ids: Iterable[str], matcher: M
             if matcher:
                 await matcher.send(msg, at_sender=True)
             else:
-                for user_id in user_ids:
-                    await send_private_msg(user_id=user_id, message=msg)
+                for user_id in recipients:
+                    NotificationOutbox.put(user_id, msg)
 
 
-async def starrail_note_check(user: UserData, user_ids: Iterable[str], matcher: Matcher = None):
+async def starrail_note_check(user: UserData, user_ids: Iterable[str], matcher: Matcher = None,
+                              account_recipients: Optional[Dict[str, List[str]]] = None):
     """
     查看星铁实时便签函数，并发送给用户任务执行消息。
 
     :param user: 用户对象
     :param user_ids: 发送通知的所有用户ID
     :param matcher: 事件响应器
+    :param account_recipients: 可选，只执行其中的账户，且各账户的通知发送给对应的用户ID
     """
-    for account in user.accounts.values():
+    for account in RunReport.track_accounts(user.accounts.values()):
+        if account_recipients is not None and account.bbs_uid not in account_recipients:
+            continue
+        recipients = account_recipients[account.bbs_uid] if account_recipients is not None else user_ids
         note_notice_status.setdefault(account.bbs_uid, NoteNoticeStatus())
         starrail_notice = note_notice_status[account.bbs_uid].starrail
-        if account.enable_resin or matcher:
-            starrail_board_status, note = await starrail_note(account)
+        if account.enable_resin and not CredentialHealth.is_expired(account) or matcher:
+            with RunReport.phase("record"):
+                starrail_board_status, note = await starrail_note(account)
             if not starrail_board_status:
                 if matcher:
                     if starrail_board_status.login_expired:
@@ -683,23 +734,29 @@ async def starrail_note_check(user: UserData, user_ids: Iterable[str], matcher:
             if matcher:
                 await matcher.send(msg, at_sender=True)
             else:
-                for user_id in user_ids:
-                    await send_private_msg(user_id=user_id, message=msg)
+                for user_id in recipients:
+                    NotificationOutbox.put(user_id, msg)
 
 
-async def zzz_note_check(user: UserData, user_ids: Iterable[str], matcher: Matcher = None):
+async def zzz_note_check(user: UserData, user_ids: Iterable[str], matcher: Matcher = None,
+                         account_recipients: Optional[Dict[str, List[str]]] = None):
     """
     查看绝区零实时便签函数，并发送给用户任务执行消息。
 
     :param user: 用户对象
     :param user_ids: 发送通知的所有用户ID
     :param matcher: 事件响应器
+    :param account_recipients: 可选，只执行其中的账户，且各账户的通知发送给对应的用户ID
     """
-    for account in user.accounts.values():
+    for account in RunReport.track_accounts(user.accounts.values()):
+        if account_recipients is not None and account.bbs_uid not in account_recipients:
+            continue
+        recipients = account_recipients[account.bbs_uid] if account_recipients is not None else user_ids
         note_notice_status.setdefault(account.bbs_uid, NoteNoticeStatus())
         zzz_notice = note_notice_status[account.bbs_uid].zzz
-        if account.enable_resin or matcher:
-            zzz_board_status, note = await zzz_note(account)
+        if account.enable_resin and not CredentialHealth.is_expired(account) or matcher:
+            with RunReport.phase("record"):
+                zzz_board_status, note = await zzz_note(account)
             if not zzz_board_status:
                 if matcher:
                     if zzz_board_status.login_expired:
@@ -724,12 +781,12 @@ async def zzz_note_check(user: UserData, user_ids: Iterable[str], matcher: Match
                     # 防止重复提醒
                     if not zzz_notice.current_energy_full:
                         if note.current_energy >= note.max_energy:
-                            note_notice_status.curr = True
+                            zzz_notice.current_energy_full = True
                             msg += '❕您的电量已经溢出\n'
                             if note.current_vitality != note.max_vitality:
                                 msg += '❕您的每日活跃度未完成\n'
                             do_notice = True
-                        elif not zzz_notice.current_energy_full:
+                        elif not zzz_notice.current_energy:
                             zzz_notice.current_energy_full = False
                             zzz_notice.current_energy = True
                             msg += '❕您的电量已达到提醒阈值\n'
@@ -773,8 +830,51 @@ async def zzz_note_check(user: UserData, user_ids: Iterable[str], matcher: Match
             if matcher:
                 await matcher.send(msg, at_sender=True)
             else:
-                for user_id in user_ids:
-                    await send_private_msg(user_id=user_id, message=msg)
+                for user_id in recipients:
+                    NotificationOutbox.put(user_id, msg)
+
+
+_TASK_SWITCHES = {
+    "game_sign": "enable_game_sign",
+    "mission": "enable_mission",
+    "resin": "enable_resin"
+}
+"""自动任务类型 -> 账户中开启该任务的设置项"""
+
+
+def _plan_account_runs(task: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    按米游社UID对所有用户的账户去重，使同一账户在一次自动任务中只执行一次，执行结果通知该账户的所有用户
+
+    同一账户由 开启了该任务 的用户中的一个执行，优先选择 未被检查为登录失效、且设置了人机验证打码接口 的那份账户数据；
+    没有任何用户开启该任务的账户不执行。
+    游戏签到和米游币任务的结果通知开启了通知的用户，实时便签的提醒通知开启了便签检查的用户。
+
+    :param task: 任务类型，``game_sign``、``mission`` 或 ``resin``
+    :return: {执行账户的用户ID: {米游社UID: 接收通知的用户ID列表}}
+    """
+    switch = _TASK_SWITCHES[task]
+    owners: Dict[str, List[Tuple[str, UserData, UserAccount]]] = {}
+    for user_id, user in get_unique_users():
+        for account in user.accounts.values():
+            owners.setdefault(account.bbs_uid, []).append((user_id, user, account))
+
+    account_runs: Dict[str, Dict[str, List[str]]] = {}
+    for bbs_uid, account_owners in owners.items():
+        enabled = [owner for owner in account_owners if getattr(owner[2], switch)]
+        if not enabled:
+            continue
+        executor_id, _, _ = min(
+            enabled,
+            key=lambda owner: (CredentialHealth.is_expired(owner[2]), not owner[1].geetest_url)
+        )
+        recipients: List[str] = []
+        for user_id, user, account in account_owners:
+            wants_notice = getattr(account, switch) if task == "resin" else user.enable_notice
+            if wants_notice:
+                recipients += [i for i in [user_id, *get_all_bind(user_id)] if i not in recipients]
+        account_runs.setdefault(executor_id, {})[bbs_uid] = recipients
+    return account_runs
 
 
 @scheduler.scheduled_job("cron",
@@ -786,11 +886,28 @@ async def daily_schedule():
     自动米游币任务、游戏签到函数
     """
     logger.info(f"{plugin_config.preference.log_head}开始执行每日自动任务")
-    for user_id, user in get_unique_users():
-        user_ids = [user_id] + list(get_all_bind(user_id))
-        await perform_game_sign(user=user, user_ids=user_ids)
-        await perform_bbs_sign(user=user, user_ids=user_ids)
-    logger.info(f"{plugin_config.preference.log_head}每日自动任务执行完成")
+    with RunReport.start("daily_schedule") as report:
+        sign_runs = _plan_account_runs("game_sign")
+        mission_runs = _plan_account_runs("mission")
+        for user_id, user in get_unique_users():
+            user_ids = [user_id] + list(get_all_bind(user_id))
+            account_sign_runs = sign_runs.get(user_id, {})
+            account_mission_runs = mission_runs.get(user_id, {})
+            try:
+                await perform_game_sign(user=user, user_ids=user_ids, account_recipients=account_sign_runs)
+                await perform_bbs_sign(user=user, user_ids=user_ids, account_recipients=account_mission_runs)
+            finally:
+                # 该用户的通知合并为一条后交给发送协程，不等待发送完成
+                NotificationOutbox.flush({
+                    *user_ids,
+                    *(i for runs in (account_sign_runs, account_mission_runs) for ids in runs.values() for i in ids)
+                })
+    summary = report.summary()
+    logger.info(f"{plugin_config.preference.log_head}每日自动任务执行完成\n{summary}")
+    if plugin_config.preference.enable_run_report_notice:
+        for admin_id in read_admin_list():
+            NotificationOutbox.put(admin_id, summary)
+    NotificationOutbox.flush()
 
 
 @scheduler.scheduled_job("interval",
@@ -801,9 +918,17 @@ async def auto_note_check():
     自动查看实时便签
     """
     logger.info(f"{plugin_config.preference.log_head}开始执行自动便签检查")
-    for user_id, user in get_unique_users():
-        user_ids = [user_id] + list(get_all_bind(user_id))
-        await genshin_note_check(user=user, user_ids=user_ids)
-        await starrail_note_check(user=user, user_ids=user_ids)
-        await zzz_note_check(user=user, user_ids=user_ids)
-    logger.info(f"{plugin_config.preference.log_head}自动便签检查执行完成")
+    with RunReport.start("auto_note_check") as report:
+        runs = _plan_account_runs("resin")
+        for user_id, user in get_unique_users():
+            user_ids = [user_id] + list(get_all_bind(user_id))
+            account_runs = runs.get(user_id, {})
+            try:
+                await genshin_note_check(user=user, user_ids=user_ids, account_recipients=account_runs)
+                await starrail_note_check(user=user, user_ids=user_ids, account_recipients=account_runs)
+                await zzz_note_check(user=user, user_ids=user_ids, account_recipients=account_runs)
+            finally:
+                NotificationOutbox.flush({*user_ids, *(i for ids in account_runs.values() for i in ids)})
+    # 便签检查执行频繁，报告只记录到文件和日志，不发送给管理员
+    NotificationOutbox.flush()
+    logger.info(f"{plugin_config.preference.log_head}自动便签检查执行完成\n{report.summary()}")
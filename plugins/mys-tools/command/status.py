@@ -0,0 +1,26 @@
+from typing import Union
+
+from nonebot import on_command
+
+from ..command.common import CommandRegistry
+from ..model import plugin_config, CommandUsage
+from ..utils import GeneralMessageEvent, is_admin, Metrics
+
+__all__ = ["plugin_status"]
+
+plugin_status = on_command(plugin_config.preference.command_start + '状态', priority=5, block=True)
+
+CommandRegistry.set_usage(
+    plugin_status,
+    CommandUsage(
+        name="状态",
+        description="（管理员）查看插件的网络请求统计、API错误统计和打码平台、消息发送队列等运行状态"
+    )
+)
+
+
+@plugin_status.handle()
+async def _(event: Union[GeneralMessageEvent]):
+    if not is_admin(event.get_user_id()):
+        await plugin_status.finish("⚠️你暂无权限执行此操作，只有管理员名单中的用户可以执行此操作")
+    await plugin_status.finish(Metrics.summary())
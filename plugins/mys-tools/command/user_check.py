@@ -13,7 +13,7 @@ from ..command.common import CommandRegistry
 from ..model import PluginDataManager, plugin_config, uuid4_validate, CommandUsage
 from ..utils import logger, GeneralMessageEvent, COMMAND_BEGIN, get_last_command_sep, \
     GeneralGroupMessageEvent, PLUGIN, \
-    send_private_msg
+    send_private_msg, SendGovernor, PrivateTargetCache
 
 __all__ = ["friendRequest", "user_binding", "direct_msg_respond"]
 _driver = get_driver()
@@ -191,6 +191,7 @@ async def _(
                 user.qq_guild[user_id] = event.channel_id
             elif isinstance(event, MessageCreateEvent):
                 user.qq_guild[user_id] = event.guild_id
+            PrivateTargetCache.invalidate(user_id)
             if isinstance(event, GeneralGroupMessageEvent):
                 user.uuid = str(uuid4())
                 await matcher.send("🔑由于您在群聊中进行绑定，已刷新您的UUID密钥，但不会影响其他已绑定用户")
@@ -224,6 +225,7 @@ async def _(bot: Bot, event: Union[GeneralGroupMessageEvent]):
         user_id = event.get_user_id()
         if user := PluginDataManager.plugin_data.users.get(user_id):
             user.qq_guild[user_id] = event.guild_id
+            PrivateTargetCache.invalidate(user_id)
             PluginDataManager.write_plugin_data()
 
     msg_text = f"{PLUGIN.metadata.name}" \
@@ -234,7 +236,8 @@ async def _(bot: Bot, event: Union[GeneralGroupMessageEvent]):
         user_id=event.get_user_id(),
         message=msg_text,
         guild_id=int(event.guild_id) if isinstance(event, MessageCreateEvent) else None,
-        use=bot
+        use=bot,
+        priority=SendGovernor.INTERACTIVE
     )
     if send_result:
         await direct_msg_respond.send("✔已发送私信，请查看私信消息")
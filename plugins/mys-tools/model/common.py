@@ -9,12 +9,12 @@ from pydantic import BaseModel
 
 __all__ = ["root_path", "data_path", "BaseModelWithSetter", "BaseModelWithUpdate", "GameRecord", "GameInfo",
            "MmtData",
-           "Award", "GameSignInfo", "MissionData", "MissionState", "GenshinNote", "StarRailNote", "ZzzNote",
+           "Award", "GameSignInfo", "MissionData", "MissionState", "Good", "Address", "GenshinNote", "StarRailNote", "ZzzNote",
            "GenshinNoteNotice",
-           "StarRailNoteNotice", "ZzzNoteNotice", "BaseApiStatus", "CreateMobileCaptchaStatus", "GetCookieStatus",
-           "MissionStatus", "GetFpStatus", "BoardStatus", "GenshinNoteStatus", "StarRailNoteStatus",
+           "StarRailNoteNotice", "ZzzNoteNotice", "BaseApiStatus", "GameSignResult", "CreateMobileCaptchaStatus",
+           "GetCookieStatus", "MissionStatus", "GetFpStatus", "BoardStatus", "GenshinNoteStatus", "StarRailNoteStatus",
            "ZzzNoteStatus",
-           "QueryGameTokenQrCodeStatus", "GeetestResult", "GeetestResultV4", "CommandUsage"]
+           "QueryGameTokenQrCodeStatus", "ExchangeStatus", "GeetestResult", "GeetestResultV4", "CommandUsage"]
 
 root_path = Path(__name__).parent.absolute()
 '''NoneBot2 机器人根目录'''
@@ -178,6 +178,107 @@ class MissionState(BaseModel):
     """所有任务对应的完成进度 {mission_key, (MissionData, 当前进度)}"""
 
 
+class Good(BaseModelWithUpdate):
+    """
+    米游币商城商品数据
+    """
+    goods_id: str
+    """商品ID"""
+    goods_name: str
+    """商品名称"""
+    type: int
+    """为 1 时商品只有在指定时间开放兑换；为 0 时商品任何时间均可兑换"""
+    price: int
+    """商品价格（米游币）"""
+    icon: str
+    """商品图片链接"""
+    next_time: Optional[int] = None
+    """下一次开放兑换的时间戳，为 0 表示任何时间均可兑换或兑换已结束"""
+    next_num: Optional[int] = None
+    """下一次开放兑换时的库存"""
+    sale_start_time: Optional[int] = None
+    """开放兑换的时间戳（商品详情中获取）"""
+    status: Optional[str] = None
+    """商品状态，例如 online、not_in_sell"""
+    game_biz: Optional[str] = None
+    """商品对应的游戏，为空时说明是米游社周边等实物商品"""
+    account_exchange_num: Optional[int] = None
+    """账户已兑换次数"""
+    account_cycle_limit: Optional[int] = None
+    """账户在一个周期内的兑换次数上限"""
+    account_cycle_type: Optional[str] = None
+    """兑换次数上限的周期类型"""
+
+    def update(self, obj: Union["Good", Dict[str, Any]]) -> "Good":
+        """
+        使用商品详情等数据更新商品数据
+
+        :param obj: 新的商品数据对象或属性字典
+        """
+        return super().update(obj)
+
+    @property
+    def time(self) -> Optional[int]:
+        """
+        兑换时间戳，为 None 说明任何时间均可兑换或兑换已结束
+        """
+        if self.type != 1 and not self.next_time:
+            return None
+        return self.next_time or self.sale_start_time or None
+
+    @property
+    def time_text(self) -> str:
+        """
+        兑换时间文本
+        """
+        if self.time is None:
+            return "任何时间" if self.status != "not_in_sell" else "已结束"
+        return datetime.fromtimestamp(self.time).strftime("%Y-%m-%d %H:%M:%S")
+
+    @property
+    def general_name(self) -> str:
+        """
+        去除首尾空白字符的商品名称
+        """
+        return self.goods_name.strip()
+
+    @property
+    def list_signature(self) -> Tuple[Any, ...]:
+        """
+        商品列表中会发生变化的字段，用于判断商品列表中的商品是否有更新
+        """
+        return self.goods_name, self.price, self.icon, self.type, self.next_time, self.next_num, self.status
+
+
+class Address(BaseModel):
+    """
+    米游社收货地址数据
+    """
+    id: str
+    """地址ID"""
+    connect_name: str
+    """收货人姓名"""
+    connect_areacode: str
+    """电话区号"""
+    connect_mobile: str
+    """手机号"""
+    province_name: str
+    """省份"""
+    city_name: str
+    """城市"""
+    county_name: str
+    """区/县"""
+    addr_ext: str
+    """详细地址"""
+
+    @property
+    def full_address(self) -> str:
+        """
+        完整的收货地址文本
+        """
+        return f"{self.province_name}{self.city_name}{self.county_name}{self.addr_ext}"
+
+
 class GenshinNote(BaseModel):
     """
     原神实时便签数据 (从米游社内相关页面API的返回数据初始化)
@@ -377,12 +478,46 @@ class BaseApiStatus(BaseModel):
         """
         返回错误类型
         """
-        for key, field in self.__fields__.items():
-            if field and key != "success":
+        for key, value in self:
+            if value is True and key != "success":
                 return key
         return None
 
 
+class GameSignResult(BaseModel):
+    """
+    游戏签到结果（包含签到后的签到记录）
+    """
+    status: BaseApiStatus
+    """签到返回结果"""
+    already_signed: bool = False
+    """签到前是否已经签到过"""
+    info: Optional[GameSignInfo] = None
+    """签到后的签到记录，无法由签到前的签到记录推算得出时为 None"""
+
+    @classmethod
+    def after_sign(cls, status: BaseApiStatus, info_before: Optional[GameSignInfo]) -> "GameSignResult":
+        """
+        根据签到前的签到记录推算签到后的签到记录，无需再次请求签到记录
+
+        :param status: 签到返回结果
+        :param info_before: 签到前的签到记录，获取失败时为 None
+        """
+        info = None
+        if status and info_before:
+            info = info_before.copy(update={"is_sign": True, "total_sign_day": info_before.total_sign_day + 1})
+        return cls(status=status, info=info)
+
+    @classmethod
+    def signed_before(cls, info: GameSignInfo) -> "GameSignResult":
+        """
+        签到前已经签到过的签到结果
+
+        :param info: 签到记录
+        """
+        return cls(status=BaseApiStatus(success=True), already_signed=True, info=info)
+
+
 class CreateMobileCaptchaStatus(BaseApiStatus):
     """
     发送短信验证码 返回结果
@@ -483,6 +618,18 @@ class QueryGameTokenQrCodeStatus(BaseApiStatus):
     """二维码已扫描但未确认"""
 
 
+class ExchangeStatus(BaseApiStatus):
+    """
+    米游币商品兑换 返回结果
+    """
+    missing_address = False
+    """实物商品缺少收货地址"""
+    missing_game_record = False
+    """虚拟商品缺少对应的游戏账户"""
+    exchange_failed = False
+    """服务器拒绝兑换（如库存不足、米游币不足、不在兑换时间）"""
+
+
 GeetestResult = NamedTuple("GeetestResult", validate=str, seccode=str)
 """人机验证结果数据"""
 
@@ -13,7 +13,8 @@ from ..model.common import data_path
 if TYPE_CHECKING:
     IntStr = Union[int, str]
 
-__all__ = ["plugin_config_path", "Preference", "SaltConfig", "DeviceConfig", "PluginConfig", "PluginEnv",
+__all__ = ["plugin_config_path", "Preference", "GoodListImageConfig", "SaltConfig", "DeviceConfig", "PluginConfig",
+           "PluginEnv",
            "plugin_config",
            "plugin_env"]
 
@@ -60,10 +61,42 @@ class Preference(BaseModel):
     '''插件内部命令头(若为""空字符串则不启用)'''
     sleep_time: float = 2
     '''任务操作冷却时间(如米游币任务)'''
+    game_sign_concurrency: int = 6
+    """单个账户同时进行签到的游戏数量上限"""
+    device_register_valid_time: float = 86400
+    """安卓设备登录和保存(device_login/device_save)的有效期，有效期内且设备ID不变时不会重复执行，为0则每次都执行（单位：秒）"""
+    notice_worker_num: int = 2
+    """定时任务通知的发送协程数量"""
+    notice_send_interval: float = 0.5
+    """定时任务通知两次发送之间的最小间隔，所有发送协程共用（单位：秒）"""
+    notice_max_retry_times: int = 3
+    """定时任务通知发送失败时的最大重试次数"""
+    private_msg_rate: float = 1
+    """每个 Bot 每秒最多发送的QQ聊天私信数量"""
+    guild_direct_msg_rate: float = 0.5
+    """每个 Bot 每秒最多发送的QQ频道私信数量"""
+    send_burst: int = 5
+    """每个 Bot 对同一类私信允许的最大突发发送数量"""
     plan_time: str = "00:30"
     '''每日自动签到和米游社任务的定时任务执行时间，格式为HH:MM'''
     resin_interval: int = 60
     '''每次检查原神便签间隔，单位为分钟'''
+    enable_cookie_refresh: bool = True
+    """是否在每日自动任务前使用 stoken 刷新所有账户的 cookie_token 和 ltoken"""
+    cookie_refresh_lead_time: int = 30
+    '''刷新 Cookies 和检查账户登录状态的定时任务比每日自动任务提前的时间，单位为分钟'''
+    cookie_refresh_batch_size: int = 5
+    """刷新 Cookies 时每批同时刷新的账户数量"""
+    cookie_refresh_batch_interval: float = 2
+    """刷新 Cookies 时两批之间的间隔（单位：秒）"""
+    enable_credential_check: bool = True
+    """是否在每日自动任务前检查所有账户的登录状态，登录失效的账户将不参与自动任务"""
+    credential_check_concurrency: int = 8
+    """检查账户登录状态时同时进行的请求数量"""
+    credential_check_ttl: float = 86400
+    """账户登录失效的检查结果的有效期，超过后重新参与自动任务（单位：秒）"""
+    note_endpoint_probe_interval: float = 43200
+    """实时便签接口的重新探测间隔，超过该时间后会优先尝试上次未使用的接口（单位：秒）"""
     global_geetest: bool = True
     '''是否开启使用全局极验Geetest，默认开启'''
     geetest_url: Optional[str]
@@ -75,6 +108,12 @@ class Preference(BaseModel):
         "challenge": "{challenge}"
     }
     '''极验Geetest人机验证打码API发送的JSON数据 `{gt}`, `{challenge}` 为占位符'''
+    geetest_concurrency: int = 2
+    """每个打码接口URL同时进行的人机验证请求数量"""
+    geetest_timeout: float = 60
+    """打码接口单次请求的超时时间（单位：秒）"""
+    geetest_wait_time: float = 120
+    """一次人机验证（包括排队等待和重试）的最长时间，超过后放弃本次验证（单位：秒）"""
     override_device_and_salt: bool = False
     """是否读取插件数据文件中的 device_config 设备配置 和 salt_config 配置而不是默认配置（一般情况不建议开启）"""
     enable_blacklist: bool = False
@@ -93,8 +132,32 @@ class Preference(BaseModel):
     """米游社二维码登录的应用标识符（可用的任何值都没有区别，但是必须传递此参数）"""
     qrcode_query_interval: float = 1
     """检查米游社登录二维码扫描情况的请求间隔（单位：秒）"""
+    qrcode_query_interval_max: float = 5
+    """米游社登录二维码未被扫描时，检查扫描情况的请求间隔逐渐增加到的最大值（单位：秒）"""
     qrcode_wait_time: float = 120
     """等待米游社登录二维码扫描的最长时间（单位：秒）"""
+    good_catalog_ttl: float = 600
+    """米游币商城商品列表缓存的有效期（单位：秒）"""
+    good_list_page_concurrency: int = 4
+    """获取米游币商城商品列表时同时请求的页数"""
+    good_detail_concurrency: int = 8
+    """获取米游币商城商品详情时同时进行的请求数量"""
+    exchange_warmup_time: float = 10
+    """商品兑换开始前提前建立连接并校准时间的时间（单位：秒）"""
+    exchange_clock_samples: int = 5
+    """商品兑换前校准时间时对服务器的采样次数"""
+    exchange_attempts: int = 3
+    """每个兑换计划在开放兑换时发出的请求次数"""
+    exchange_attempt_interval: float = 0.05
+    """同一兑换计划的多次兑换请求之间的间隔（单位：秒）"""
+    metrics_path: Optional[str] = None
+    """Prometheus 格式统计指标接口在 NoneBot HTTP 服务上的路径（如 ``/mystool/metrics``），默认为 None 即不提供（需要使用 FastAPI 等支持 HTTP 服务的驱动器）"""
+    run_report_path: Optional[Path] = data_path / "run_report.jsonl"
+    """定时任务执行报告的保存路径（JSON Lines 格式，每次执行追加一行），为 None 则不保存"""
+    run_report_max_size: Optional[int] = 1024 * 1024
+    """执行报告文件的大小上限（单位：字节），超过后将其重命名为 ``*.1``（覆盖上一份旧报告）并写入新文件，为 None 则不限制"""
+    enable_run_report_notice: bool = True
+    """每日自动任务执行完成后，是否向管理员名单中的用户发送执行报告"""
 
     @validator("log_path", allow_reuse=True)
     def _(cls, v: Optional[Path]):
@@ -198,8 +261,43 @@ class DeviceConfig(BaseModel):
         pass
 
 
+class GoodListImageConfig(BaseModel):
+    """
+    商品列表输出图片设置
+    """
+    ICON_SIZE: Tuple[int, int] = (600, 600)
+    '''商品预览图在最终结果图中的大小'''
+    WIDTH: int = 2000
+    '''最终结果图宽度'''
+    PADDING_ICON: int = 0
+    '''展示图与展示图之间的间隙 高'''
+    PADDING_TEXT_AND_ICON_Y: int = 125
+    '''文字顶部与展示图顶部之间的距离 高'''
+    PADDING_TEXT_AND_ICON_X: int = 10
+    '''文字与展示图之间的横向距离 宽'''
+    FONT_PATH: Optional[Path] = None
+    '''
+    字体文件路径(若使用计算机已经安装的字体，直接填入字体名称，若为None则自动下载字体)
+
+    开源字体 Source Han Sans 思源黑体
+    https://github.com/adobe-fonts/source-han-sans
+    '''
+    FONT_SIZE: int = 50
+    '''字体大小'''
+    MULTI_PROCESS: bool = True
+    '''是否使用多进程生成图片（否则在线程中生成）'''
+    PROCESS_NUM: int = 2
+    '''生成图片的进程数量'''
+    CACHE_MAX_NUM: int = 32
+    '''最多在磁盘上缓存的商品列表图片数量，超出后删除最久未使用的图片，为0则不缓存'''
+
+    class Config(Preference.Config):
+        pass
+
+
 class PluginConfig(BaseSettings):
     preference = Preference()
+    good_list_image_config = GoodListImageConfig()
 
 
 class PluginEnv(BaseSettings):
@@ -9,7 +9,8 @@ from nonebot.log import logger
 from pydantic import BaseModel, ValidationError, validator, Field
 
 from .._version import __version__
-from ..model.common import data_path, BaseModelWithSetter, BaseModelWithUpdate, GameRecord
+from ..model.common import data_path, BaseModelWithSetter, BaseModelWithUpdate, GameRecord, Good, \
+    Address
 
 if TYPE_CHECKING:
     IntStr = Union[int, str]
@@ -17,7 +18,7 @@ if TYPE_CHECKING:
     AbstractSetIntStr = AbstractSet[IntStr]
     MappingIntStrAny = Mapping[IntStr, Any]
 
-__all__ = ["plugin_data_path", "BBSCookies", "UserAccount", "uuid4_validate",
+__all__ = ["plugin_data_path", "BBSCookies", "UserAccount", "ExchangePlan", "uuid4_validate",
            "UserData", "PluginData", "PluginDataManager"]
 
 plugin_data_path = data_path / "dataV2.json"
@@ -279,6 +280,20 @@ class UserAccount(BaseModelWithSetter):
         return f"{self.bbs_uid}({blur_phone(self.phone_number)})" if self.phone_number else self.bbs_uid
 
 
+class ExchangePlan(BaseModel):
+    """
+    米游币商品兑换计划
+    """
+    good: Good
+    """兑换的商品"""
+    account: UserAccount
+    """进行兑换的米游社账户"""
+    address: Optional[Address] = None
+    """收货地址（实物商品需要）"""
+    game_record: Optional[GameRecord] = None
+    """接收商品的游戏账户（虚拟商品需要）"""
+
+
 def uuid4_validate(v):
     """
     验证UUID是否为合法的UUIDv4
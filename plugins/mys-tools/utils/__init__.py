@@ -1,2 +1,6 @@
 from .common import *
-
+from .font import *
+from .media import *
+from .metrics import *
+from .notification import *
+from .report import *
@@ -1,5 +1,8 @@
+import asyncio
 import hashlib
+import heapq
 import io
+import itertools
 import json
 import os
 import random
@@ -8,7 +11,7 @@ import time
 import uuid
 from copy import deepcopy
 from pathlib import Path
-from typing import (Dict, Literal, Union, Optional, Tuple, Iterable, List)
+from typing import (Dict, Literal, Union, Optional, Tuple, Iterable, List, FrozenSet, Any)
 from urllib.parse import urlencode
 
 import httpx
@@ -25,7 +28,7 @@ except ImportError:
 from nonebot import Adapter, Bot
 
 from nonebot_plugin_saa import MessageSegmentFactory, Text, AggregatedMessageFactory, TargetQQPrivate, \
-    TargetQQGuildDirect, enable_auto_select_bot
+    TargetQQGuildDirect, PlatformTarget, enable_auto_select_bot
 
 from nonebot.adapters.onebot.v11 import MessageEvent as OneBotV11MessageEvent, PrivateMessageEvent, GroupMessageEvent, \
     Adapter as OneBotV11Adapter, Bot as OneBotV11Bot
@@ -35,13 +38,14 @@ from nonebot.log import logger
 from qrcode import QRCode
 
 from ..model import GeetestResult, PluginDataManager, Preference, plugin_config, plugin_env, UserData
+from .metrics import Metrics, create_async_client
 
 __all__ = ["GeneralMessageEvent", "GeneralPrivateMessageEvent", "GeneralGroupMessageEvent", "CommandBegin",
            "get_last_command_sep", "COMMAND_BEGIN", "set_logger", "logger", "PLUGIN", "custom_attempt_times",
            "get_async_retry", "generate_device_id", "cookie_str_to_dict", "cookie_dict_to_str", "generate_ds",
-           "get_validate", "generate_seed_id", "generate_fp_locally", "get_file", "blur_phone", "generate_qr_img",
-           "send_private_msg", "get_unique_users", "get_all_bind", "read_blacklist", "read_whitelist",
-           "read_admin_list"]
+           "GeetestSolver", "get_validate", "generate_seed_id", "generate_fp_locally", "get_file", "blur_phone", "generate_qr_img",
+           "SendGovernor", "PrivateTargetCache", "send_private_msg", "get_unique_users", "get_all_bind", "read_blacklist", "read_whitelist",
+           "read_admin_list", "is_blacklisted", "is_whitelisted", "is_admin"]
 
 # 启用 nonebot-plugin-send-anything-anywhere 的自动选择 Bot 功能
 enable_auto_select_bot()
@@ -143,6 +147,7 @@ def get_async_retry(retry: bool):
         stop=custom_attempt_times(retry),
         retry=tenacity.retry_if_exception_type(BaseException),
         wait=tenacity.wait_fixed(plugin_config.preference.retry_interval),
+        before_sleep=Metrics.record_retry
     )
 
 
@@ -230,7 +235,235 @@ def generate_ds(data: Union[str, dict, list, None] = None, params: Union[str, di
         return f"{t},{r},{c}"
 
 
-async def get_validate(user: UserData, gt: str = None, challenge: str = None, retry: bool = True):
+class _DeadlineSemaphore:
+    """
+    按截止时间排队的信号量，截止时间越早的请求越先获得
+    """
+
+    def __init__(self, value: int):
+        self.value = max(value, 1)
+        """剩余的可用数量"""
+        self.waiters: List[Tuple[float, int, asyncio.Future]] = []
+        """等待中的请求 (截止时间, 序号, Future)"""
+        self._counter = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        正在等待的请求数量
+        """
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+    async def acquire(self, deadline: float):
+        """
+        获取一个名额，调用方取消等待时自动退出队列
+
+        :param deadline: 截止时间（``time.monotonic()``）
+        """
+        if not self.waiters and self.value > 0:
+            self.value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (deadline, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 已经分配到名额时才被取消，需要交还名额
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """
+        释放一个名额，交给截止时间最早的等待者
+        """
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.value += 1
+
+
+class _GeetestProviderStats:
+    """
+    单个打码平台的统计数据
+    """
+
+    def __init__(self):
+        self.requests = 0
+        """发出的请求次数"""
+        self.success = 0
+        """成功获取验证结果的次数"""
+        self.failure = 0
+        """重试后仍失败的次数"""
+        self.timeout = 0
+        """超过截止时间放弃的次数"""
+        self.cancelled = 0
+        """调用方取消的次数"""
+        self.latency_total = 0.0
+        """成功的验证请求的总耗时（单位：秒）"""
+        self.wait_total = 0.0
+        """排队等待的总时间（单位：秒）"""
+        self.in_flight = 0
+        """正在进行的请求数量"""
+
+
+class GeetestSolver:
+    """
+    人机验证打码服务
+
+    每个打码接口URL使用一个连接池和一个按截止时间排队的并发上限（``geetest_concurrency``）。
+    每次验证最多持续 ``geetest_wait_time`` 秒，超时或调用方取消时放弃并让出名额，
+    因此大量同时出现的验证不会一直占用打码接口而拖慢其他任务。
+    """
+    _client: Optional[httpx.AsyncClient] = None
+    _semaphores: Dict[str, _DeadlineSemaphore] = {}
+    """打码接口URL -> 并发限制"""
+    _stats: Dict[str, _GeetestProviderStats] = {}
+    """打码平台（URL的主机名） -> 统计数据"""
+
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """
+        获取共用的连接池
+        """
+        if cls._client is None or cls._client.is_closed:
+            cls._client = create_async_client()
+        return cls._client
+
+    @classmethod
+    async def close(cls):
+        """
+        关闭共用的连接池
+        """
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Union[int, float]]]:
+        """
+        获取各打码平台的统计数据
+
+        :return: {打码平台: {指标名称: 值}}
+        """
+        return {
+            provider: {
+                **vars(stats),
+                "queued": sum(semaphore.queue_depth for url, semaphore in cls._semaphores.items()
+                              if httpx.URL(url).host == provider),
+                "latency_avg": stats.latency_total / stats.success if stats.success else 0.0
+            }
+            for provider, stats in cls._stats.items()
+        }
+
+    @classmethod
+    async def solve(
+            cls,
+            url: str,
+            params: Dict[str, Any],
+            content: Dict[str, Any],
+            retry: bool = True,
+            deadline: Optional[float] = None
+    ) -> Optional[GeetestResult]:
+        """
+        请求打码接口完成人机验证，失败、超时时返回None
+
+        :param url: 打码接口URL
+        :param params: URL参数
+        :param content: JSON数据
+        :param retry: 是否允许重试
+        :param deadline: 截止时间（``time.monotonic()``），默认为 ``geetest_wait_time`` 秒后
+        """
+        if deadline is None:
+            deadline = time.monotonic() + plugin_config.preference.geetest_wait_time
+        semaphore = cls._semaphores.setdefault(url, _DeadlineSemaphore(plugin_config.preference.geetest_concurrency))
+        stats = cls._stats.setdefault(httpx.URL(url).host, _GeetestProviderStats())
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(semaphore.acquire(deadline), deadline - start)
+        except asyncio.TimeoutError:
+            stats.timeout += 1
+            logger.warning(f"{plugin_config.preference.log_head}获取人机验证validate失败：等待打码接口超时")
+            return None
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+
+        stats.wait_total += time.monotonic() - start
+        stats.in_flight += 1
+        request_start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(cls._request(url, params, content, retry, stats),
+                                            deadline - request_start)
+        except asyncio.TimeoutError:
+            stats.timeout += 1
+            logger.warning(f"{plugin_config.preference.log_head}获取人机验证validate失败：打码接口请求超时")
+            return None
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            semaphore.release()
+
+        if result is None:
+            stats.failure += 1
+        else:
+            stats.success += 1
+            stats.latency_total += time.monotonic() - request_start
+        return result
+
+    @classmethod
+    async def _request(
+            cls,
+            url: str,
+            params: Dict[str, Any],
+            content: Dict[str, Any],
+            retry: bool,
+            stats: _GeetestProviderStats
+    ) -> Optional[GeetestResult]:
+        """
+        请求打码接口，允许时进行重试
+        """
+        try:
+            # 只对 Exception 重试，调用方取消（CancelledError）时立即结束
+            async for attempt in tenacity.AsyncRetrying(
+                    stop=custom_attempt_times(retry),
+                    retry=tenacity.retry_if_exception_type(Exception),
+                    wait=tenacity.wait_fixed(plugin_config.preference.retry_interval),
+                    before_sleep=Metrics.record_retry
+            ):
+                with attempt:
+                    stats.requests += 1
+                    res = await cls._get_client().post(
+                        url,
+                        params=params,
+                        json=content,
+                        timeout=plugin_config.preference.geetest_timeout
+                    )
+                    geetest_data = res.json()
+                    logger.debug(f"{plugin_config.preference.log_head}人机验证结果：{geetest_data}")
+                    validate = geetest_data['data']['validate']
+                    seccode = geetest_data['data'].get('seccode') or f"{validate}|jordan"
+                    return GeetestResult(validate=validate, seccode=seccode)
+        except tenacity.RetryError:
+            logger.exception(f"{plugin_config.preference.log_head}获取人机验证validate失败")
+            return None
+
+
+nonebot.get_driver().on_shutdown(GeetestSolver.close)
+
+
+async def get_validate(
+        user: UserData,
+        gt: str = None,
+        challenge: str = None,
+        retry: bool = True,
+        deadline: Optional[float] = None
+):
     """
     使用打码平台获取人机验证validate
 
@@ -238,7 +471,8 @@ async def get_validate(user: UserData, gt: str = None, challenge: str = None, re
     :param gt: 验证码gt
     :param challenge: challenge
     :param retry: 是否允许重试
-    :return: 如果配置了平台URL，且 gt, challenge 不为空，返回 GeetestResult
+    :param deadline: 可选，截止时间（``time.monotonic()``），超过后放弃验证
+    :return: 如果配置了平台URL，且 gt, challenge 不为空，返回 GeetestResult；验证失败或超时时返回None
     """
     if not plugin_config.preference.global_geetest:
         if not (gt and challenge) or not user.geetest_url:
@@ -258,23 +492,7 @@ async def get_validate(user: UserData, gt: str = None, challenge: str = None, re
             content[key] = value.format(gt=gt, challenge=challenge)
     debug_log = {"geetest_url": geetest_url, "params": params, "content": content}
     logger.debug(f"{plugin_config.preference.log_head}get_validate: {debug_log}")
-    try:
-        async for attempt in get_async_retry(retry):
-            with attempt:
-                async with httpx.AsyncClient() as client:
-                    res = await client.post(
-                        geetest_url,
-                        params=params,
-                        json=content,
-                        timeout=60
-                    )
-                geetest_data = res.json()
-                logger.debug(f"{plugin_config.preference.log_head}人机验证结果：{geetest_data}")
-                validate = geetest_data['data']['validate']
-                seccode = geetest_data['data'].get('seccode') or f"{validate}|jordan"
-                return GeetestResult(validate=validate, seccode=seccode)
-    except tenacity.RetryError:
-        logger.exception(f"{plugin_config.preference.log_head}获取人机验证validate失败")
+    return await GeetestSolver.solve(geetest_url, params, content, retry, deadline)
 
 
 def generate_seed_id(length: int = 8) -> str:
@@ -308,7 +526,7 @@ async def get_file(url: str, retry: bool = True):
     try:
         async for attempt in get_async_retry(retry):
             with attempt:
-                async with httpx.AsyncClient() as client:
+                async with create_async_client() as client:
                     res = await client.get(url, timeout=plugin_config.preference.timeout, follow_redirects=True)
                 return res.content
     except tenacity.RetryError:
@@ -345,11 +563,209 @@ def generate_qr_img(data: str):
     return image_bytes.getvalue()
 
 
+class _TokenBucket:
+    """
+    带优先级等待队列的令牌桶
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        """每秒补充的令牌数量"""
+        self.capacity = max(capacity, 1)
+        """令牌桶容量"""
+        self.tokens = float(self.capacity)
+        """当前令牌数量"""
+        self.updated = time.monotonic()
+        """上次补充令牌的时间"""
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        """等待令牌的请求 (优先级, 序号, Future)"""
+        self._counter = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def _refill(self):
+        """
+        按经过的时间补充令牌
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        正在等待令牌的请求数量
+        """
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+    async def acquire(self, priority: int):
+        """
+        获取一个令牌，优先级数值越小越先获取
+
+        :param priority: 优先级
+        """
+        self._refill()
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self._counter), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        """
+        按优先级依次向等待的请求发放令牌
+        """
+        while self.waiters:
+            # 跳过已取消的请求
+            if self.waiters[0][2].done():
+                heapq.heappop(self.waiters)
+                continue
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                _, _, future = heapq.heappop(self.waiters)
+                future.set_result(None)
+            else:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SendGovernor:
+    """
+    主动消息发送限速器
+
+    对每个 Bot 的每种私信目标类型（QQ聊天私信、QQ频道私信）分别使用令牌桶限速，
+    等待发送时交互回复优先于定时任务通知。
+    """
+    INTERACTIVE = 0
+    """优先级：用户交互的回复"""
+    SCHEDULED = 1
+    """优先级：定时任务通知"""
+
+    _buckets: Dict[Tuple[str, str], _TokenBucket] = {}
+    """(Bot ID, 目标类型) -> 令牌桶"""
+
+    @classmethod
+    def _get_bucket(cls, bot: Bot, target: PlatformTarget) -> _TokenBucket:
+        key = bot.self_id, type(target).__name__
+        if (bucket := cls._buckets.get(key)) is None:
+            if isinstance(target, TargetQQGuildDirect):
+                rate = plugin_config.preference.guild_direct_msg_rate
+            else:
+                rate = plugin_config.preference.private_msg_rate
+            bucket = cls._buckets[key] = _TokenBucket(rate, plugin_config.preference.send_burst)
+        return bucket
+
+    @classmethod
+    async def acquire(cls, bot: Bot, target: PlatformTarget, priority: int = SCHEDULED):
+        """
+        等待直到允许使用该 Bot 向该类目标发送一条消息
+
+        :param bot: 发送消息的 Bot
+        :param target: 发送目标
+        :param priority: 优先级，``INTERACTIVE`` 或 ``SCHEDULED``
+        """
+        bucket = cls._get_bucket(bot, target)
+        if bucket.rate <= 0:
+            return
+        await bucket.acquire(priority)
+
+    @classmethod
+    def queue_depth(cls) -> Dict[Tuple[str, str], int]:
+        """
+        获取各个 (Bot ID, 目标类型) 正在等待发送的消息数量
+        """
+        return {key: bucket.queue_depth for key, bucket in cls._buckets.items()}
+
+
+class PrivateTargetCache:
+    """
+    主动私信的 Bot 与发送目标缓存
+
+    缓存各 Adapter 可用的 Bot 列表和 (用户ID, Adapter) 对应的私信目标，
+    Bot 连接或断开时清空 Bot 缓存，用户频道ID变化时需调用 ``invalidate`` 清除该用户的目标缓存。
+    """
+    _bots: Dict[Optional[str], List[Bot]] = {}
+    """Adapter名称(为None则为所有Adapter) -> Bot列表"""
+    _targets: Dict[Tuple[str, str], PlatformTarget] = {}
+    """(用户ID, Adapter名称) -> 私信目标"""
+
+    @classmethod
+    def get_bots(cls, use: Union[Bot, Adapter] = None) -> List[Bot]:
+        """
+        获取用于发送私信的 Bot 列表
+
+        :param use: 使用的Bot或Adapter，为None则使用所有Bot
+        """
+        if isinstance(use, (OneBotV11Bot, QQGuildBot)):
+            return [use]
+        key = use.get_name() if isinstance(use, (OneBotV11Adapter, QQGuildAdapter)) else None
+        if (bots := cls._bots.get(key)) is None:
+            if key is None:
+                bots = list(nonebot.get_bots().values())
+            else:
+                bots = list(use.bots.values())
+            cls._bots[key] = bots
+        return bots
+
+    @classmethod
+    def get_target(cls, bot: Bot, user_id: str) -> Optional[PlatformTarget]:
+        """
+        获取用户在该 Bot 所属平台的私信目标，找不到频道ID时返回None
+
+        :param bot: 发送消息的 Bot
+        :param user_id: 目标用户ID
+        """
+        key = user_id, bot.adapter.get_name()
+        if (target := cls._targets.get(key)) is not None:
+            return target
+        if isinstance(bot, OneBotV11Bot):
+            target = TargetQQPrivate(user_id=int(user_id))
+        else:
+            if user := PluginDataManager.plugin_data.users.get(user_id):
+                if not (guild_id := user.qq_guild.get(user_id)):
+                    logger.error(f"{plugin_config.preference.log_head}用户 {user_id} 数据中没有任何频道ID")
+                    return None
+            else:
+                logger.error(
+                    f"{plugin_config.preference.log_head}用户数据中不存在用户 {user_id}，无法获取频道ID")
+                return None
+            target = TargetQQGuildDirect(recipient_id=int(user_id), source_guild_id=guild_id)
+        cls._targets[key] = target
+        return target
+
+    @classmethod
+    def invalidate(cls, user_id: str = None):
+        """
+        清除私信目标缓存
+
+        :param user_id: 只清除该用户的缓存，为None则清除全部
+        """
+        if user_id is None:
+            cls._targets.clear()
+        else:
+            for key in [key for key in cls._targets if key[0] == user_id]:
+                cls._targets.pop(key)
+
+    @classmethod
+    def invalidate_bots(cls):
+        """
+        清除 Bot 列表缓存
+        """
+        cls._bots.clear()
+
+
+nonebot.get_driver().on_bot_connect(PrivateTargetCache.invalidate_bots)
+nonebot.get_driver().on_bot_disconnect(PrivateTargetCache.invalidate_bots)
+
+
 async def send_private_msg(
         user_id: str,
         message: Union[str, MessageSegmentFactory, AggregatedMessageFactory],
         use: Union[Bot, Adapter] = None,
-        guild_id: int = None
+        guild_id: int = None,
+        priority: int = SendGovernor.SCHEDULED
 ) -> Tuple[bool, Optional[Exception]]:
     """
     主动发送私信消息
@@ -358,41 +774,27 @@ async def send_private_msg(
     :param message: 消息内容
     :param use: 使用的Bot或Adapter，为None则使用所有Bot
     :param guild_id: 用户所在频道ID，为None则从用户数据中获取
+    :param priority: 发送优先级，等待限速时 ``SendGovernor.INTERACTIVE`` 优先于 ``SendGovernor.SCHEDULED``
     :return: (是否发送成功, ActionFailed Exception)
     """
-    user_id_int = int(user_id)
     if isinstance(message, str):
         message = Text(message)
 
-    # 整合符合条件的 Bot 对象
-    if isinstance(use, (OneBotV11Bot, QQGuildBot)):
-        bots = [use]
-    elif isinstance(use, (OneBotV11Adapter, QQGuildAdapter)):
-        bots = use.bots.values()
-    else:
-        bots = nonebot.get_bots().values()
-
-    for bot in bots:
+    for bot in PrivateTargetCache.get_bots(use):
         try:
             # 获取 PlatformTarget 对象
-            if isinstance(bot, OneBotV11Bot):
-                target = TargetQQPrivate(user_id=user_id_int)
+            if guild_id is not None and isinstance(bot, QQGuildBot):
+                target = TargetQQGuildDirect(recipient_id=int(user_id), source_guild_id=guild_id)
+            elif not (target := PrivateTargetCache.get_target(bot, user_id)):
+                return False, None
+            if isinstance(target, TargetQQPrivate):
                 logger.info(
-                    f"{plugin_config.preference.log_head}向用户 {user_id} 发送 QQ 聊天私信 user_id: {user_id_int}")
+                    f"{plugin_config.preference.log_head}向用户 {user_id} 发送 QQ 聊天私信 user_id: {target.user_id}")
             else:
-                if guild_id is None:
-                    if user := PluginDataManager.plugin_data.users.get(user_id):
-                        if not (guild_id := user.qq_guild.get(user_id)):
-                            logger.error(f"{plugin_config.preference.log_head}用户 {user_id} 数据中没有任何频道ID")
-                            return False, None
-                    else:
-                        logger.error(
-                            f"{plugin_config.preference.log_head}用户数据中不存在用户 {user_id}，无法获取频道ID")
-                        return False, None
-                target = TargetQQGuildDirect(recipient_id=user_id_int, source_guild_id=guild_id)
                 logger.info(f"{plugin_config.preference.log_head}向用户 {user_id} 发送 QQ 频道私信"
-                            f" recipient_id: {user_id_int}, source_guild_id: {guild_id}")
+                            f" recipient_id: {target.recipient_id}, source_guild_id: {target.source_guild_id}")
 
+            await SendGovernor.acquire(bot, target, priority)
             await message.send_to(target=target, bot=bot)
         except Exception as e:
             return False, e
@@ -421,23 +823,59 @@ def get_all_bind(user_id: str) -> Iterable[str]:
     return user_id_filter
 
 
-def _read_user_list(path: Path) -> List[str]:
+_user_list_cache: Dict[Path, Tuple[Optional[Tuple[int, int]], Tuple[str, ...], FrozenSet[str]]] = {}
+"""名单文件路径 -> (文件修改时间和大小, 名单中的用户ID, 用户ID集合)"""
+
+
+def _load_user_list(path: Path) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
     """
-    从TEXT读取用户名单
+    读取用户名单，文件修改时间和大小都没有变化时直接使用上次读取的结果
 
-    :return: 名单中的所有用户ID
+    :return: (名单中的所有用户ID, 用户ID集合)
     """
-    if not path:
-        return []
-    if os.path.isfile(path):
+    try:
+        stat = os.stat(path)
+        file_state = stat.st_mtime_ns, stat.st_size
+    except OSError:
+        file_state = None
+    cached = _user_list_cache.get(path)
+    if cached and cached[0] == file_state:
+        return cached[1], cached[2]
+
+    if file_state is not None and os.path.isfile(path):
         with open(path, "r", encoding=plugin_config.preference.encoding) as f:
             lines = f.readlines()
         lines = map(lambda x: x.strip(), lines)
         line_filter = filter(lambda x: x and x != "\n", lines)
-        return list(line_filter)
+        user_ids = tuple(line_filter)
     else:
         logger.error(f"{plugin_config.preference.log_head}黑/白名单文件 {path} 不存在")
+        user_ids = ()
+    _user_list_cache[path] = file_state, user_ids, frozenset(user_ids)
+    return user_ids, _user_list_cache[path][2]
+
+
+def _read_user_list(path: Path) -> List[str]:
+    """
+    从TEXT读取用户名单
+
+    :return: 名单中的所有用户ID
+    """
+    if not path:
         return []
+    return list(_load_user_list(path)[0])
+
+
+def _in_user_list(path: Path, user_id: str) -> bool:
+    """
+    判断用户是否在名单中
+
+    :param path: 名单文件路径
+    :param user_id: 用户ID
+    """
+    if not path:
+        return False
+    return user_id in _load_user_list(path)[1]
 
 
 def read_blacklist() -> List[str]:
@@ -466,3 +904,48 @@ def read_admin_list() -> List[str]:
     """
     return _read_user_list(
         plugin_config.preference.admin_list_path) if plugin_config.preference.enable_admin_list else []
+
+
+def is_blacklisted(user_id: str) -> bool:
+    """
+    判断用户是否在黑名单中（未启用黑名单时总是返回False）
+
+    :param user_id: 用户ID
+    """
+    return plugin_config.preference.enable_blacklist and _in_user_list(plugin_config.preference.blacklist_path,
+                                                                        user_id)
+
+
+def is_whitelisted(user_id: str) -> bool:
+    """
+    判断用户是否在白名单中（未启用白名单时总是返回False）
+
+    :param user_id: 用户ID
+    """
+    return plugin_config.preference.enable_whitelist and _in_user_list(plugin_config.preference.whitelist_path,
+                                                                        user_id)
+
+
+def is_admin(user_id: str) -> bool:
+    """
+    判断用户是否在管理员名单中（未启用管理员名单时总是返回False）
+
+    :param user_id: 用户ID
+    """
+    return plugin_config.preference.enable_admin_list and _in_user_list(plugin_config.preference.admin_list_path,
+                                                                         user_id)
+
+
+def _collect_runtime_metrics():
+    """
+    收集打码平台和消息发送限速器的统计指标
+    """
+    for provider, stats in GeetestSolver.stats().items():
+        for name, value in stats.items():
+            yield "mystool_geetest_" + name, "Geetest solver statistics", {"provider": provider}, value
+    for (bot_id, target_type), depth in SendGovernor.queue_depth().items():
+        yield "mystool_send_queue_depth", "Messages waiting for the send rate limiter", \
+            {"bot": bot_id, "target": target_type}, depth
+
+
+Metrics.register_collector(_collect_runtime_metrics)
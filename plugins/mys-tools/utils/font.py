@@ -0,0 +1,120 @@
+import asyncio
+import os
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import ImageFont
+
+from ..model import data_path, plugin_config
+from .common import get_file, logger
+
+__all__ = ["FontManager"]
+
+FONT_URL = os.path.join(
+    plugin_config.preference.github_proxy,
+    "https://github.com/adobe-fonts/source-han-sans/releases/download/2.004R/SourceHanSansHWSC.zip")
+TEMP_FONT_PATH = data_path / "temp" / "font.zip"
+FONT_SAVE_PATH = data_path / "SourceHanSansHWSC-Regular.otf"
+
+
+def _extract_font(zip_path: Path, save_path: Path):
+    """
+    从下载的字体压缩包中解压字体文件，并删除压缩包
+    """
+    with zipfile.ZipFile(zip_path) as z:
+        with z.open("OTF/SimplifiedChineseHW/SourceHanSansHWSC-Regular.otf") as zip_font:
+            with open(save_path, "wb") as fp_font:
+                fp_font.write(zip_font.read())
+    try:
+        os.remove(zip_path)
+    except Exception:
+        logger.exception(
+            f"{plugin_config.preference.log_head}商品列表图片生成 - 无法清理下载的字体压缩包临时文件")
+
+
+class FontManager:
+    """
+    生成图片所用字体的管理
+
+    机器人启动时在后台准备字体文件（缺少时自动下载），并按字体大小缓存 ImageFont 对象，
+    生成图片时不需要再重新加载字体文件。
+    """
+    font_path: Optional[Path] = None
+    """已准备好的字体文件路径"""
+
+    _prepare_task: Optional[asyncio.Task] = None
+    _fonts: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
+    """(字体文件路径, 字体大小) -> 字体对象"""
+
+    @classmethod
+    async def start_prepare(cls):
+        """
+        在后台开始准备字体文件（用于机器人启动时）
+        """
+        if cls._prepare_task is None:
+            cls._prepare_task = asyncio.create_task(cls._prepare())
+
+    @classmethod
+    async def wait_ready(cls) -> Optional[Path]:
+        """
+        等待字体文件准备完成
+
+        :return: 字体文件路径，若准备失败则返回None
+        """
+        if cls._prepare_task is None or (cls._prepare_task.done() and cls.font_path is None):
+            # 尚未开始准备或上次准备失败时，重新准备
+            cls._prepare_task = asyncio.create_task(cls._prepare())
+        await asyncio.shield(cls._prepare_task)
+        return cls.font_path
+
+    @classmethod
+    async def _prepare(cls):
+        """
+        准备字体文件，优先使用配置中的字体，否则使用已下载的字体或进行下载
+        """
+        font_path = plugin_config.good_list_image_config.FONT_PATH
+        if font_path is not None and os.path.isfile(font_path):
+            cls.font_path = Path(font_path)
+        elif os.path.isfile(FONT_SAVE_PATH):
+            cls.font_path = FONT_SAVE_PATH
+        else:
+            logger.warning(
+                f"{plugin_config.preference.log_head}商品列表图片生成 - 缺少字体，正在从 "
+                "https://github.com/adobe-fonts/source-han-sans/tree/release "
+                f"下载字体...")
+            content = await get_file(FONT_URL)
+            if content is None:
+                logger.error(
+                    f"{plugin_config.preference.log_head}商品列表图片生成 - 字体下载失败，无法继续生成图片")
+                return
+            try:
+                os.makedirs(os.path.dirname(TEMP_FONT_PATH), exist_ok=True)
+                with open(TEMP_FONT_PATH, "wb") as f:
+                    f.write(content)
+                await asyncio.get_running_loop().run_in_executor(
+                    None, _extract_font, TEMP_FONT_PATH, FONT_SAVE_PATH)
+            except Exception:
+                logger.exception(f"{plugin_config.preference.log_head}商品列表图片生成 - 字体解压失败")
+                return
+            logger.info(
+                f"{plugin_config.preference.log_head}商品列表图片生成 - 已完成字体下载 -> {FONT_SAVE_PATH}")
+            cls.font_path = FONT_SAVE_PATH
+
+        # 预先加载配置中的字体大小
+        cls.get_font(plugin_config.good_list_image_config.FONT_SIZE)
+
+    @classmethod
+    def get_font(cls, size: int, font_path: Optional[str] = None) -> ImageFont.FreeTypeFont:
+        """
+        获取字体对象，同一进程中相同字体文件和大小的字体只加载一次
+
+        :param size: 字体大小
+        :param font_path: 字体文件路径，为None则使用已准备好的字体文件
+        """
+        font_path = str(font_path or cls.font_path)
+        key = font_path, size
+        if (font := cls._fonts.get(key)) is None:
+            # 传入文件路径，由 FreeType 自行读取字体文件，不在 Python 中复制一份字体数据
+            font = cls._fonts[key] = ImageFont.truetype(font_path, size, encoding=plugin_config.preference.encoding)
+        return font
@@ -1,127 +1,214 @@
+import asyncio
+import hashlib
 import io
+import json
 import os
-import zipfile
-from multiprocessing import Lock
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Tuple, Dict, Optional
 
-import httpx
-from PIL import Image, ImageDraw, ImageFont
+import nonebot
+from PIL import Image, ImageDraw
 
-from ..api.common import get_good_detail
 from ..model import Good, data_path, plugin_config
-from ..utils.common import get_file, logger, get_async_retry
+from ..utils.common import get_file, logger
+from ..utils.font import FontManager
 
 __all__ = ["game_list_to_image"]
 
-FONT_URL = os.path.join(
-    plugin_config.preference.github_proxy,
-    "https://github.com/adobe-fonts/source-han-sans/releases/download/2.004R/SourceHanSansHWSC.zip")
-TEMP_FONT_PATH = data_path / "temp" / "font.zip"
-FONT_SAVE_PATH = data_path / "SourceHanSansHWSC-Regular.otf"
+RENDER_CACHE_PATH = data_path / "temp" / "good_list_image"
+"""商品列表图片缓存目录"""
 
+_executor: Optional[ProcessPoolExecutor] = None
+"""生成图片的进程池"""
+_executor_font: Optional[str] = None
+"""进程池中预加载的字体文件路径"""
 
-async def game_list_to_image(good_list: List[Good], lock: Lock = None, retry: bool = True):
+_rendering: Dict[str, "asyncio.Future[Optional[bytes]]"] = {}
+"""正在生成的图片，相同内容的生成请求共用一次生成"""
+
+
+def _render_good_list(
+        goods: List[Tuple[str, bytes]],
+        font_path: str,
+        font_size: int,
+        icon_size: Tuple[int, int],
+        width: int,
+        padding_icon: int,
+        padding_text_and_icon_x: int,
+        padding_text_and_icon_y: int
+) -> bytes:
+    """
+    合成商品列表图片并编码为JPEG（在进程池或线程中执行，参数需可被 pickle）
+
+    :param goods: 商品列表 [(商品文字信息, 商品预览图数据)]
+    :return: 图片数据
+    """
+    font = FontManager.get_font(font_size, font_path)
+    size_y = len(goods) * (icon_size[1] + padding_icon)
+    preview = Image.new('RGB', (width, size_y), (255, 255, 255))
+    draw = ImageDraw.Draw(preview)
+
+    for i, (text, icon) in enumerate(goods):
+        icon_y = i * (icon_size[1] + padding_icon)
+        img = Image.open(io.BytesIO(icon))
+        # 调整预览图大小
+        preview.paste(img.resize(icon_size), (0, icon_y))
+        # 根据预览图高度来确定写入文字的位置
+        draw.text((icon_size[0] + padding_text_and_icon_x, icon_y + padding_text_and_icon_y), text, (0, 0, 0), font)
+
+    # 导出
+    image_bytes = io.BytesIO()
+    preview.save(image_bytes, format="JPEG")
+    return image_bytes.getvalue()
+
+
+def _get_executor(font_path: str) -> ProcessPoolExecutor:
+    """
+    获取生成图片的进程池，进程启动时预加载字体
+    """
+    global _executor, _executor_font
+    if _executor is None or _executor_font != font_path:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(
+            max_workers=plugin_config.good_list_image_config.PROCESS_NUM,
+            initializer=FontManager.get_font,
+            initargs=(plugin_config.good_list_image_config.FONT_SIZE, font_path)
+        )
+        _executor_font = font_path
+    return _executor
+
+
+@nonebot.get_driver().on_shutdown
+def _shutdown_executor():
+    """
+    关闭生成图片的进程池
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _render_cache_key(good_list: List[Good]) -> str:
+    """
+    根据商品列表内容和图片布局设置生成图片缓存的键
+    """
+    content = {
+        "goods": [[good.goods_id, good.price, good.time_text, good.general_name, good.icon] for good in good_list],
+        "layout": plugin_config.good_list_image_config.dict(exclude={"MULTI_PROCESS", "PROCESS_NUM", "CACHE_MAX_NUM"})
+    }
+    return hashlib.sha256(
+        json.dumps(content, ensure_ascii=False, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _read_render_cache(key: str) -> Optional[bytes]:
+    """
+    读取缓存的图片，并更新其修改时间作为最近使用时间
+    """
+    path = RENDER_CACHE_PATH / f"{key}.jpg"
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+        os.utime(path)
+        return content
+    except OSError:
+        return None
+
+
+def _write_render_cache(key: str, content: bytes):
+    """
+    写入图片缓存，并删除超出数量上限的最久未使用的图片
+    """
+    try:
+        os.makedirs(RENDER_CACHE_PATH, exist_ok=True)
+        temp_path = RENDER_CACHE_PATH / f"{key}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, RENDER_CACHE_PATH / f"{key}.jpg")
+
+        cached_files = sorted(RENDER_CACHE_PATH.glob("*.jpg"), key=lambda x: x.stat().st_mtime, reverse=True)
+        for path in cached_files[plugin_config.good_list_image_config.CACHE_MAX_NUM:]:
+            os.remove(path)
+    except OSError:
+        logger.exception(f"{plugin_config.preference.log_head}商品列表图片生成 - 无法写入图片缓存")
+
+
+async def game_list_to_image(good_list: List[Good]) -> Optional[bytes]:
     """
     将商品信息列表转换为图片数据，若返回`None`说明生成失败
 
-    :param good_list: 商品列表数据
-    :param lock: 进程同步锁，防止多进程同时在下载字体
-    :param retry: 是否允许重试
+    商品列表内容和图片布局没有变化时直接返回磁盘上缓存的图片，相同内容的并发请求只生成一次
+
+    :param good_list: 商品列表数据（应已包含商品详情，可由 ``GoodsCatalog`` 获取）
+    """
+    if plugin_config.good_list_image_config.CACHE_MAX_NUM <= 0:
+        return await _game_list_to_image(good_list)
+
+    key = _render_cache_key(good_list)
+    if (content := _read_render_cache(key)) is not None:
+        return content
+    if (future := _rendering.get(key)) is not None:
+        return await asyncio.shield(future)
+
+    future = _rendering[key] = asyncio.get_running_loop().create_future()
+    try:
+        content = await _game_list_to_image(good_list)
+        if content is not None:
+            _write_render_cache(key, content)
+        future.set_result(content)
+        return content
+    finally:
+        if not future.done():
+            future.set_result(None)
+        _rendering.pop(key, None)
+
+
+async def _game_list_to_image(good_list: List[Good]) -> Optional[bytes]:
+    """
+    生成商品列表图片，若返回`None`说明生成失败
+
+    商品预览图并发获取，图片的合成和编码在进程池（或线程）中完成，不会阻塞事件循环
+
+    :param good_list: 商品列表数据（应已包含商品详情，可由 ``GoodsCatalog`` 获取）
     """
-    # TODO: 暂时会阻塞，目前还找不到更好的解决方案
-    #   回调函数是否适用于 NoneBot Matcher 暂不清楚，
-    #   若适用则可以传入回调函数而不阻塞主进程
+    global _executor
     try:
-        if lock is not None:
-            lock.acquire()
-
-        font_path = plugin_config.good_list_image_config.FONT_PATH
-        if font_path is None or not os.path.isfile(font_path):
-            if os.path.isfile(FONT_SAVE_PATH):
-                font_path = FONT_SAVE_PATH
-            else:
-                logger.warning(
-                    f"{plugin_config.preference.log_head}商品列表图片生成 - 缺少字体，正在从 "
-                    "https://github.com/adobe-fonts/source-han-sans/tree/release "
-                    f"下载字体...")
-                try:
-                    os.makedirs(os.path.dirname(TEMP_FONT_PATH))
-                except FileExistsError:
-                    pass
-                with open(TEMP_FONT_PATH, "wb") as f:
-                    content = await get_file(FONT_URL)
-                    if content is None:
-                        logger.error(
-                            f"{plugin_config.preference.log_head}商品列表图片生成 - 字体下载失败，无法继续生成图片")
-                        return None
-                    f.write(content)
-                with open(TEMP_FONT_PATH, "rb") as f:
-                    with zipfile.ZipFile(f) as z:
-                        with z.open("OTF/SimplifiedChineseHW/SourceHanSansHWSC-Regular.otf") as zip_font:
-                            with open(FONT_SAVE_PATH, "wb") as fp_font:
-                                fp_font.write(zip_font.read())
-                logger.info(
-                    f"{plugin_config.preference.log_head}商品列表图片生成 - 已完成字体下载 -> {FONT_SAVE_PATH}")
-                try:
-                    os.remove(TEMP_FONT_PATH)
-                except Exception:
-                    logger.exception(
-                        f"{plugin_config.preference.log_head}商品列表图片生成 - 无法清理下载的字体压缩包临时文件")
-                font_path = FONT_SAVE_PATH
-
-        if lock is not None:
-            lock.release()
-
-        font = ImageFont.truetype(
-            str(font_path), plugin_config.good_list_image_config.FONT_SIZE, encoding=plugin_config.preference.encoding)
-
-        size_y = 0
-        '''起始粘贴位置 高'''
-        position: List[tuple] = []
-        '''预览图粘贴的位置'''
-        imgs: List[Image.Image] = []
-        '''商品预览图'''
-
-        for good in good_list:
-            await get_good_detail(good)
-            async for attempt in get_async_retry(retry):
-                with attempt:
-                    async with httpx.AsyncClient() as client:
-                        icon = await client.get(good.icon, timeout=plugin_config.preference.timeout)
-            img = Image.open(io.BytesIO(icon.content))
-            # 调整预览图大小
-            img = img.resize(plugin_config.good_list_image_config.ICON_SIZE)
-            # 记录预览图粘贴位置
-            position.append((0, size_y))
-            # 调整下一个粘贴的位置
-            size_y += plugin_config.good_list_image_config.ICON_SIZE[1] + \
-                      plugin_config.good_list_image_config.PADDING_ICON
-            imgs.append(img)
-
-        preview = Image.new(
-            'RGB', (plugin_config.good_list_image_config.WIDTH, size_y), (255, 255, 255))
-
-        i = 0
-        for img in imgs:
-            preview.paste(img, position[i])
-            i += 1
-
-        draw_y = plugin_config.good_list_image_config.PADDING_TEXT_AND_ICON_Y
-        '''写入文字的起始位置 高'''
-        for good in good_list:
-            draw = ImageDraw.Draw(preview)
-            # 根据预览图高度来确定写入文字的位置，并调整空间
-            draw.text((plugin_config.good_list_image_config.ICON_SIZE[
-                           0] + plugin_config.good_list_image_config.PADDING_TEXT_AND_ICON_X,
-                       draw_y),
-                      f"{good.general_name}\n商品ID: {good.goods_id}\n兑换时间: {good.time_text}\n价格: {good.price} 米游币",
-                      (0, 0, 0), font)
-            draw_y += (plugin_config.good_list_image_config.ICON_SIZE[1] +
-                       plugin_config.good_list_image_config.PADDING_ICON)
-
-        # 导出
-        image_bytes = io.BytesIO()
-        preview.save(image_bytes, format="JPEG")
-        return image_bytes.getvalue()
+        font_path = await FontManager.wait_ready()
+        if font_path is None:
+            return None
+        font_path = str(font_path)
+
+        icons = await asyncio.gather(*(get_file(good.icon) for good in good_list))
+        if None in icons:
+            logger.error(f"{plugin_config.preference.log_head}商品列表图片生成 - 商品预览图下载失败")
+            return None
+
+        goods = [
+            (f"{good.general_name}\n商品ID: {good.goods_id}\n兑换时间: {good.time_text}\n价格: {good.price} 米游币", icon)
+            for good, icon in zip(good_list, icons)
+        ]
+        image_config = plugin_config.good_list_image_config
+        args = (
+            goods,
+            font_path,
+            image_config.FONT_SIZE,
+            tuple(image_config.ICON_SIZE),
+            image_config.WIDTH,
+            image_config.PADDING_ICON,
+            image_config.PADDING_TEXT_AND_ICON_X,
+            image_config.PADDING_TEXT_AND_ICON_Y
+        )
+        loop = asyncio.get_running_loop()
+        if image_config.MULTI_PROCESS:
+            try:
+                return await loop.run_in_executor(_get_executor(font_path), _render_good_list, *args)
+            except BrokenProcessPool:
+                logger.exception(
+                    f"{plugin_config.preference.log_head}商品列表图片生成 - 进程池异常退出，改为在线程中生成")
+                _executor = None
+        return await loop.run_in_executor(None, _render_good_list, *args)
     except Exception:
         logger.exception(f"{plugin_config.preference.log_head}商品列表图片生成 - 无法完成图片生成")
@@ -0,0 +1,109 @@
+import asyncio
+import base64
+from typing import Dict, Tuple, Optional, Union, Type
+
+from nonebot import Adapter
+from nonebot.adapters.onebot.v11 import Adapter as OneBotV11Adapter
+from nonebot_plugin_saa import Image
+
+from .common import get_file
+
+__all__ = ["MediaCache"]
+
+
+class MediaCache:
+    """
+    图片等媒体文件缓存
+
+    同一个URL的文件只下载一次，并为每种 Adapter 只编码一次发送用的数据，
+    之后所有接收者和后续的消息都复用同一份数据。
+    """
+    max_items = 256
+    """最多缓存的文件数量，超出后移除最早缓存的文件"""
+
+    _files: Dict[str, bytes] = {}
+    """URL -> 文件数据"""
+    _payloads: Dict[Tuple[str, str], Union[str, bytes]] = {}
+    """(URL, Adapter名称) -> 发送用的图片数据"""
+    _downloading: Dict[str, "asyncio.Future[Optional[bytes]]"] = {}
+    """正在下载的文件，用于合并同时发起的下载"""
+
+    @classmethod
+    async def get_file(cls, url: str) -> Optional[bytes]:
+        """
+        获取文件数据，优先使用缓存，下载失败时返回None且不缓存
+
+        :param url: 文件URL
+        """
+        if (content := cls._files.get(url)) is not None:
+            return content
+        if (future := cls._downloading.get(url)) is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        cls._downloading[url] = future
+        try:
+            content = await get_file(url)
+        except Exception as e:
+            future.set_exception(e)
+            # 避免没有其他等待者时出现 "Future exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(content)
+            if content is not None:
+                cls._files[url] = content
+                cls._evict()
+            return content
+        finally:
+            cls._downloading.pop(url, None)
+
+    @classmethod
+    async def get_payload(
+            cls,
+            url: str,
+            use: Union[Adapter, Type[Adapter]]
+    ) -> Optional[Union[str, bytes]]:
+        """
+        获取适用于目标 Adapter 的图片数据
+
+        OneBot V11 会将图片数据编码为 base64 后再调用 API，因此缓存编码后的 ``base64://`` 字符串；
+        其他 Adapter 直接复用同一份文件数据。
+
+        :param url: 图片URL
+        :param use: 目标 Adapter 或 Adapter 类
+        """
+        adapter_type = use if isinstance(use, type) else type(use)
+        key = url, adapter_type.get_name()
+        if (payload := cls._payloads.get(key)) is not None:
+            return payload
+        if (content := await cls.get_file(url)) is None:
+            return None
+        if issubclass(adapter_type, OneBotV11Adapter):
+            payload = f"base64://{base64.b64encode(content).decode()}"
+        else:
+            payload = content
+        cls._payloads[key] = payload
+        return payload
+
+    @classmethod
+    async def get_image(cls, url: str, use: Union[Adapter, Type[Adapter]]) -> Optional[Image]:
+        """
+        获取适用于目标 Adapter 的图片消息段
+
+        :param url: 图片URL
+        :param use: 目标 Adapter 或 Adapter 类
+        """
+        payload = await cls.get_payload(url, use)
+        return Image(payload) if payload is not None else None
+
+    @classmethod
+    def _evict(cls):
+        """
+        移除超出数量上限的最早缓存的文件
+        """
+        while len(cls._files) > cls.max_items:
+            url = next(iter(cls._files))
+            cls._files.pop(url)
+            for key in [key for key in cls._payloads if key[0] == url]:
+                cls._payloads.pop(key)
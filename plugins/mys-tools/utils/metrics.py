@@ -0,0 +1,458 @@
+import bisect
+import contextvars
+import functools
+import ipaddress
+import json
+import time
+import urllib.request
+from typing import Dict, Tuple, List, Optional, Callable, Iterable, AsyncIterator, Any, Awaitable, TypeVar
+
+import httpx
+import nonebot
+import tenacity
+from nonebot.drivers import ASGIMixin, HTTPServerSetup, Request, Response, URL
+from nonebot.log import logger
+
+from ..model import plugin_config, BaseApiStatus
+
+__all__ = ["Metrics", "record_api_status", "create_async_client", "setup_metrics_endpoint"]
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+"""请求耗时直方图的分桶上限（单位：秒）"""
+
+_current_endpoint: contextvars.ContextVar[str] = contextvars.ContextVar("_current_endpoint", default="unknown")
+"""当前任务最近一次请求的接口，用于统计重试次数"""
+
+MetricSample = Tuple[str, str, Dict[str, str], float]
+"""(指标名称, 指标说明, 标签, 值)"""
+
+_last_status: contextvars.ContextVar[Optional[BaseApiStatus]] = contextvars.ContextVar("_last_status", default=None)
+"""当前任务最近一次记录的API返回结果，用于避免外层API函数原样返回内层结果时重复记录"""
+
+_ApiFunction = TypeVar("_ApiFunction", bound=Callable[..., Awaitable[Any]])
+
+
+class _Histogram:
+    """
+    累计分桶的耗时直方图
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        """各分桶（最后一个为 +Inf）的计数"""
+        self.sum = 0.0
+        """耗时总和"""
+        self.count = 0
+        """样本数量"""
+
+    def observe(self, value: float):
+        """
+        记录一个样本
+        """
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        估计分位数（返回所在分桶的上限）
+        """
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """
+    网络请求与API结果的统计指标
+
+    通过 ``create_async_client`` 创建的连接会记录每个接口（主机名+路径）的请求次数、耗时、
+    传输字节数和返回的 retcode；``get_async_retry`` 记录重试次数；``record_api_status`` 装饰的API函数记录各类错误的出现次数。
+    """
+    _start_time = time.time()
+    """开始统计的时间"""
+    _requests: Dict[Tuple[str, str], int] = {}
+    """{(接口, HTTP状态码或异常类型): 请求次数}"""
+    _latency: Dict[str, _Histogram] = {}
+    """{接口: 耗时直方图}"""
+    _retcodes: Dict[Tuple[str, str], int] = {}
+    """{(接口, retcode): 次数}"""
+    _bytes_sent: Dict[str, int] = {}
+    """{接口: 发送的字节数}"""
+    _bytes_received: Dict[str, int] = {}
+    """{接口: 接收的字节数}"""
+    _retries: Dict[str, int] = {}
+    """{接口: 重试次数}"""
+    _statuses: Dict[Tuple[str, str], int] = {}
+    """{(API返回结果类型, 错误类型): 次数}"""
+    _collectors: List[Callable[[], Iterable[MetricSample]]] = []
+    """其他模块注册的指标收集函数"""
+    _request_listeners: List[Callable[[str, str, float], None]] = []
+    """每次记录请求时调用的函数，参数为 (接口, HTTP状态码或异常类型, 耗时)"""
+    _status_listeners: List[Callable[[BaseApiStatus], None]] = []
+    """每次记录API返回结果时调用的函数"""
+
+    @classmethod
+    def record_request(
+            cls,
+            endpoint: str,
+            outcome: str,
+            duration: float,
+            bytes_sent: int,
+            bytes_received: int,
+            retcode: Optional[Any] = None
+    ):
+        """
+        记录一次请求
+
+        :param endpoint: 接口（主机名+路径）
+        :param outcome: HTTP状态码，或请求失败时的异常类型
+        :param duration: 从发出请求到接收完响应的耗时
+        :param bytes_sent: 请求体字节数
+        :param bytes_received: 响应体字节数
+        :param retcode: 响应中的 retcode
+        """
+        key = endpoint, outcome
+        cls._requests[key] = cls._requests.get(key, 0) + 1
+        cls._latency.setdefault(endpoint, _Histogram()).observe(duration)
+        cls._bytes_sent[endpoint] = cls._bytes_sent.get(endpoint, 0) + bytes_sent
+        cls._bytes_received[endpoint] = cls._bytes_received.get(endpoint, 0) + bytes_received
+        if retcode is not None:
+            key = endpoint, str(retcode)
+            cls._retcodes[key] = cls._retcodes.get(key, 0) + 1
+        for listener in cls._request_listeners:
+            listener(endpoint, outcome, duration)
+
+    @classmethod
+    def record_retry(cls, _: Optional[tenacity.RetryCallState] = None):
+        """
+        记录一次重试（用作 tenacity 的 ``before_sleep`` 回调），计入当前任务最近一次请求的接口
+        """
+        endpoint = _current_endpoint.get()
+        cls._retries[endpoint] = cls._retries.get(endpoint, 0) + 1
+
+    @classmethod
+    def record_status(cls, status: BaseApiStatus):
+        """
+        记录一个API返回结果
+        """
+        key = type(status).__name__, status.error_type or ("success" if status else "unknown")
+        cls._statuses[key] = cls._statuses.get(key, 0) + 1
+        for listener in cls._status_listeners:
+            listener(status)
+
+    @classmethod
+    def register_collector(cls, collector: Callable[[], Iterable[MetricSample]]):
+        """
+        注册额外的指标收集函数，导出指标时调用
+
+        :param collector: 返回 [(指标名称, 指标说明, 标签, 值)] 的函数
+        """
+        cls._collectors.append(collector)
+
+    @classmethod
+    def add_request_listener(cls, listener: Callable[[str, str, float], None]):
+        """
+        添加每次记录请求时调用的函数
+
+        :param listener: 参数为 (接口, HTTP状态码或异常类型, 耗时) 的函数
+        """
+        cls._request_listeners.append(listener)
+
+    @classmethod
+    def add_status_listener(cls, listener: Callable[[BaseApiStatus], None]):
+        """
+        添加每次记录API返回结果时调用的函数
+        """
+        cls._status_listeners.append(listener)
+
+    @classmethod
+    def _collect(cls) -> List[MetricSample]:
+        """
+        调用所有额外的指标收集函数
+        """
+        samples = []
+        for collector in cls._collectors:
+            try:
+                samples += collector()
+            except Exception:
+                logger.exception(f"{plugin_config.preference.log_head}统计指标 - 收集指标失败")
+        return samples
+
+    @staticmethod
+    def _format_labels(labels: Dict[str, str]) -> str:
+        """
+        生成 Prometheus 格式的标签
+        """
+        if not labels:
+            return ""
+
+        def escape(value: str) -> str:
+            return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+    @classmethod
+    def render_prometheus(cls) -> str:
+        """
+        以 Prometheus 文本格式导出所有指标
+        """
+        lines: List[str] = []
+
+        def metric(name: str, help_text: str, metric_type: str, samples: Iterable[Tuple[Dict[str, str], float]],
+                   suffix_samples: Iterable[Tuple[str, Dict[str, str], float]] = ()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(f"{name}{cls._format_labels(labels)} {value}" for labels, value in samples)
+            lines.extend(f"{name}{suffix}{cls._format_labels(labels)} {value}"
+                         for suffix, labels, value in suffix_samples)
+
+        metric("mystool_uptime_seconds", "Seconds since metrics collection started", "gauge",
+               [({}, round(time.time() - cls._start_time, 3))])
+        metric("mystool_http_requests_total", "HTTP requests by endpoint and status code or exception", "counter",
+               [({"endpoint": endpoint, "outcome": outcome}, count)
+                for (endpoint, outcome), count in cls._requests.items()])
+
+        histogram_samples = []
+        for endpoint, histogram in cls._latency.items():
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), histogram.counts):
+                cumulative += count
+                histogram_samples.append(("_bucket", {"endpoint": endpoint, "le": str(bound)}, cumulative))
+            histogram_samples.append(("_sum", {"endpoint": endpoint}, round(histogram.sum, 6)))
+            histogram_samples.append(("_count", {"endpoint": endpoint}, histogram.count))
+        metric("mystool_http_request_duration_seconds", "HTTP request duration including response body",
+               "histogram", [], histogram_samples)
+
+        metric("mystool_http_request_bytes_total", "Request body bytes sent", "counter",
+               [({"endpoint": endpoint}, value) for endpoint, value in cls._bytes_sent.items()])
+        metric("mystool_http_response_bytes_total", "Response body bytes received", "counter",
+               [({"endpoint": endpoint}, value) for endpoint, value in cls._bytes_received.items()])
+        metric("mystool_api_retcode_total", "API responses by retcode", "counter",
+               [({"endpoint": endpoint, "retcode": retcode}, count)
+                for (endpoint, retcode), count in cls._retcodes.items()])
+        metric("mystool_http_retries_total", "Request retries by the last requested endpoint", "counter",
+               [({"endpoint": endpoint}, count) for endpoint, count in cls._retries.items()])
+        metric("mystool_api_status_total", "API call results by status type and error type", "counter",
+               [({"type": status_type, "error": error}, count)
+                for (status_type, error), count in cls._statuses.items()])
+
+        collected: Dict[str, Tuple[str, List[Tuple[Dict[str, str], float]]]] = {}
+        for name, help_text, labels, value in cls._collect():
+            collected.setdefault(name, (help_text, []))[1].append((labels, value))
+        for name, (help_text, samples) in collected.items():
+            metric(name, help_text, "gauge", samples)
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def summary(cls, top: int = 5) -> str:
+        """
+        生成用于聊天消息的统计摘要
+
+        :param top: 列出平均耗时最高的接口数量
+        """
+        uptime = int(time.time() - cls._start_time)
+        total = sum(cls._requests.values())
+        failed = sum(count for (_, outcome), count in cls._requests.items()
+                     if not outcome.isdigit() or int(outcome) >= 400)
+        sent, received = sum(cls._bytes_sent.values()), sum(cls._bytes_received.values())
+        text = (f"🖥️插件运行状态"
+                f"\n⏱️统计时长：{uptime // 3600}时{uptime % 3600 // 60}分"
+                f"\n🌐网络请求：{total} 次，失败 {failed} 次，重试 {sum(cls._retries.values())} 次"
+                f"\n📤发送 {sent / 1024:.1f} KiB，📥接收 {received / 1024:.1f} KiB")
+
+        slowest = sorted(cls._latency.items(), key=lambda x: x[1].sum / x[1].count, reverse=True)[:top]
+        if slowest:
+            text += "\n\n🐢平均耗时最高的接口："
+            for endpoint, histogram in slowest:
+                text += (f"\n- {endpoint}：{histogram.count} 次，平均 {histogram.sum / histogram.count:.2f}s，"
+                         f"P95 ≤ {histogram.quantile(0.95)}s")
+
+        errors = sorted(((key, count) for key, count in cls._statuses.items() if key[1] != "success"),
+                        key=lambda x: x[1], reverse=True)[:top]
+        if errors:
+            text += "\n\n⚠️API错误："
+            for (status_type, error), count in errors:
+                text += f"\n- {status_type}.{error}：{count} 次"
+
+        collected = cls._collect()
+        if collected:
+            text += "\n\n📊其他指标："
+            for name, _, labels, value in collected:
+                label_text = ",".join(f"{key}={value}" for key, value in labels.items())
+                text += f"\n- {name}{f'({label_text})' if label_text else ''}：{value}"
+        return text
+
+
+class _InstrumentedStream(httpx.AsyncByteStream):
+    """
+    统计响应体字节数，读取完毕时记录请求
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[int, Optional[bytes]], None],
+                 keep_content: bool):
+        self._stream = stream
+        self._on_close = on_close
+        self._keep_content = keep_content
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._size += len(chunk)
+            if self._keep_content:
+                self._chunks.append(chunk)
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+        if not self._closed:
+            self._closed = True
+            self._on_close(self._size, b"".join(self._chunks) if self._keep_content else None)
+
+
+def record_api_status(func: _ApiFunction) -> _ApiFunction:
+    """
+    装饰请求并解析API响应的异步函数，记录其返回的 ``BaseApiStatus``（或返回元组中的第一个元素）
+
+    只用于实际发出请求的函数，缓存命中等直接构造的结果不会被记录
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        result = await func(*args, **kwargs)
+        status = result[0] if isinstance(result, tuple) and result else result
+        if isinstance(status, BaseApiStatus) and status is not _last_status.get():
+            Metrics.record_status(status)
+            _last_status.set(status)
+        return result
+
+    return wrapper
+
+
+class _InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    记录统计指标的 httpx 传输层
+    """
+    MAX_PARSE_SIZE = 1024 * 1024
+    """解析 retcode 的响应体（压缩后）大小上限"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = f"{request.url.host}{request.url.path}"
+        _current_endpoint.set(endpoint)
+        try:
+            bytes_sent = len(request.content)
+        except httpx.RequestNotRead:
+            bytes_sent = 0
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception as e:
+            Metrics.record_request(endpoint, type(e).__name__, time.perf_counter() - start, bytes_sent, 0)
+            raise
+
+        def on_close(size: int, content: Optional[bytes]):
+            retcode = None
+            if content and len(content) <= self.MAX_PARSE_SIZE:
+                try:
+                    if response.headers.get("content-encoding"):
+                        # 传输层读取到的是压缩后的响应体，借助 httpx.Response 按 Content-Encoding 解压
+                        content = httpx.Response(response.status_code, headers=response.headers,
+                                                 content=content).content
+                    data = json.loads(content)
+                    if isinstance(data, dict):
+                        retcode = data.get("retcode", data.get("status"))
+                except (ValueError, httpx.DecodingError):
+                    pass
+            Metrics.record_request(endpoint, str(response.status_code), time.perf_counter() - start,
+                                   bytes_sent, size, retcode)
+
+        keep_content = "json" in response.headers.get("content-type", "")
+        if isinstance(response.stream, httpx.ByteStream):
+            # 响应体已在内存中（如 MockTransport），无需等待读取
+            on_close(len(response.content), response.content if keep_content else None)
+        else:
+            response.stream = _InstrumentedStream(response.stream, on_close, keep_content)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _environment_proxies() -> Dict[str, Optional[str]]:
+    """
+    读取环境变量中的代理设置，转换为 ``httpx.AsyncClient`` 的 ``mounts`` 格式（规则与 httpx 读取环境变量时相同）
+
+    :return: {URL匹配规则: 代理URL，为 None 则不使用代理}
+    """
+    proxies = urllib.request.getproxies()
+    mounts: Dict[str, Optional[str]] = {}
+    for scheme in ("http", "https", "all"):
+        if proxies.get(scheme):
+            mounts[f"{scheme}://"] = proxies[scheme] if "://" in proxies[scheme] else f"http://{proxies[scheme]}"
+    for hostname in filter(None, (host.strip() for host in proxies.get("no", "").split(","))):
+        if hostname == "*":
+            return {}
+        elif "://" in hostname:
+            mounts[hostname] = None
+        else:
+            try:
+                address = ipaddress.ip_address(hostname.strip("[]"))
+                mounts[f"all://[{address}]" if address.version == 6 else f"all://{address}"] = None
+            except ValueError:
+                mounts["all://localhost" if hostname.lower() == "localhost" else f"all://*{hostname}"] = None
+    return mounts
+
+
+def create_async_client(**kwargs) -> httpx.AsyncClient:
+    """
+    创建记录统计指标的 ``httpx.AsyncClient``，参数与 ``httpx.AsyncClient`` 相同
+
+    ``limits`` 等连接参数会用于创建底层的传输层。没有传入 ``transport`` 时，与 ``httpx.AsyncClient`` 相同，
+    使用 ``proxy`` 参数或环境变量（HTTP_PROXY、HTTPS_PROXY、ALL_PROXY、NO_PROXY）中的代理
+    """
+    transport = kwargs.pop("transport", None)
+    mounts = {pattern: None if mounted is None else _InstrumentedTransport(mounted)
+              for pattern, mounted in (kwargs.pop("mounts", None) or {}).items()}
+    if transport is None:
+        transport_kwargs = {key: kwargs.pop(key) for key in ("limits", "verify", "cert", "http1", "http2")
+                            if key in kwargs}
+        transport_kwargs["trust_env"] = kwargs.get("trust_env", True)
+        # 传入 transport 后 httpx 不再读取环境变量中的代理，需要自行为代理创建传输层
+        if proxy := kwargs.pop("proxy", None):
+            proxies = {"all://": proxy}
+        else:
+            proxies = _environment_proxies() if transport_kwargs["trust_env"] else {}
+        for pattern, proxy_url in proxies.items():
+            mounts.setdefault(pattern, None if proxy_url is None else _InstrumentedTransport(
+                httpx.AsyncHTTPTransport(proxy=proxy_url, **transport_kwargs)))
+        transport = httpx.AsyncHTTPTransport(**transport_kwargs)
+    return httpx.AsyncClient(transport=_InstrumentedTransport(transport), mounts=mounts or None, **kwargs)
+
+
+def setup_metrics_endpoint():
+    """
+    在 NoneBot 驱动器的 HTTP 服务上注册 Prometheus 格式的指标接口（需要驱动器支持 ASGI，如 FastAPI）
+    """
+    path = plugin_config.preference.metrics_path
+    if not path:
+        return
+    driver = nonebot.get_driver()
+    if not isinstance(driver, ASGIMixin):
+        logger.info(f"{plugin_config.preference.log_head}统计指标 - 当前驱动器不支持HTTP服务，无法提供指标接口")
+        return
+
+    async def handle(_: Request) -> Response:
+        return Response(200, headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+                        content=Metrics.render_prometheus())
+
+    driver.setup_http_server(HTTPServerSetup(path=URL(path), method="GET", name="mystool_metrics",
+                                             handle_func=handle))
@@ -0,0 +1,196 @@
+import asyncio
+import time
+from typing import Dict, List, Tuple, Optional, Union, Iterable, Callable, Awaitable
+
+from nonebot import Adapter
+from nonebot.adapters.qq import Adapter as QQGuildAdapter
+from nonebot_plugin_saa import MessageFactory, MessageSegmentFactory, AggregatedMessageFactory, Image
+
+from ..model import plugin_config, PluginDataManager
+from .common import logger, send_private_msg
+from .report import RunReport
+
+__all__ = ["NotificationOutbox"]
+
+NoticeMessage = Union[str, MessageSegmentFactory, MessageFactory, AggregatedMessageFactory]
+"""可放入通知发件箱的消息类型"""
+
+
+class NotificationOutbox:
+    """
+    定时任务通知发件箱
+
+    定时任务产生的私信通知先按用户ID暂存，用户的任务执行完毕后合并为一条汇总消息，
+    再交由独立的发送协程按限速发送并在失败时重试，任务执行本身不需要等待消息发送完成。
+    为不同 Adapter 分别构建的同一通知（如带图片的签到结果）在合并时只保留用户所在平台的那一份。
+    """
+    sender: Callable[..., Awaitable[Optional[Tuple[bool, Optional[Exception]]]]] = staticmethod(send_private_msg)
+    """实际发送私信的函数，参数和返回值与 `send_private_msg` 相同"""
+
+    _pending: Dict[str, List[Tuple[Optional[Adapter], NoticeMessage]]] = {}
+    """尚未合并发送的通知，用户ID -> [(指定的Adapter, 消息)]"""
+    _queue: Optional["asyncio.Queue[Tuple[str, Optional[Adapter], List[NoticeMessage], Optional[RunReport]]]"] = None
+    """等待发送的汇总消息队列，每项附带放入队列时所属的执行报告"""
+    _workers: List[asyncio.Task] = []
+    """发送协程"""
+    _rate_lock: Optional[asyncio.Lock] = None
+    """发送限速锁"""
+    _next_send_time: float = 0
+    """下一次允许发送的时间"""
+
+    @classmethod
+    def put(cls, user_id: str, message: NoticeMessage, use: Adapter = None):
+        """
+        暂存一条通知，等待 `flush` 时合并发送
+
+        :param user_id: 目标用户ID
+        :param message: 消息内容
+        :param use: 消息只适用于该Adapter（如包含该平台的图片数据），为None则适用于所有平台
+        """
+        cls._pending.setdefault(user_id, []).append((use, message))
+
+    @classmethod
+    def flush(cls, user_ids: Iterable[str] = None):
+        """
+        将暂存的通知合并为每个用户一条汇总消息，放入发送队列后立即返回
+
+        :param user_ids: 只发送这些用户的通知，为None则发送全部
+        """
+        if user_ids is None:
+            keys = list(cls._pending)
+        else:
+            user_ids = set(user_ids)
+            keys = [user_id for user_id in cls._pending if user_id in user_ids]
+        if not keys:
+            return
+
+        cls._start_workers()
+        report = RunReport.current()
+        for user_id in keys:
+            pending = cls._pending.pop(user_id)
+            adapter = cls._resolve_adapter(user_id, [use for use, _ in pending if use is not None])
+            messages = cls._merge([message for use, message in pending if use is None or use is adapter],
+                                  isinstance(adapter, QQGuildAdapter))
+            if messages:
+                if report is not None:
+                    report.notice_queued()
+                cls._queue.put_nowait((user_id, adapter, messages, report))
+
+    @classmethod
+    async def join(cls):
+        """
+        等待发送队列中的消息全部发送完毕
+        """
+        if cls._queue is not None:
+            await cls._queue.join()
+
+    @staticmethod
+    def _resolve_adapter(user_id: str, candidates: List[Adapter]) -> Optional[Adapter]:
+        """
+        确定发送汇总消息使用的Adapter
+
+        :param user_id: 目标用户ID
+        :param candidates: 该用户的通知中指定过的Adapter
+        :return: 用户数据中记录了频道ID的用户使用QQ频道Adapter，否则使用其他Adapter；没有指定过任何Adapter时为None
+        """
+        if not candidates:
+            return None
+        user = PluginDataManager.plugin_data.users.get(user_id)
+        is_guild_user = bool(user and user.qq_guild.get(user_id))
+        return next((adapter for adapter in candidates if isinstance(adapter, QQGuildAdapter) == is_guild_user),
+                    candidates[0])
+
+    @staticmethod
+    def _merge(messages: List[NoticeMessage], split_images: bool) -> List[NoticeMessage]:
+        """
+        合并同一用户的多条通知
+
+        :param messages: 通知列表
+        :param split_images: 是否将图片拆分为单独的消息（QQ频道私信一条消息只能带一张图片）
+        :return: 按顺序发送的消息列表，第一条为合并后的汇总消息
+        """
+        digest = MessageFactory()
+        extra: List[NoticeMessage] = []
+        for message in messages:
+            if isinstance(message, AggregatedMessageFactory):
+                extra.append(message)
+                continue
+            segments = message if isinstance(message, MessageFactory) else MessageFactory(message)
+            parts = []
+            for segment in segments:
+                if split_images and isinstance(segment, Image):
+                    extra.append(segment)
+                else:
+                    parts.append(segment)
+            if parts:
+                if digest:
+                    digest += "\n\n"
+                digest += parts
+        return ([digest] if digest else []) + extra
+
+    @classmethod
+    def _start_workers(cls):
+        """
+        创建发送队列和发送协程（若尚未创建或已退出）
+        """
+        if cls._queue is None:
+            cls._queue = asyncio.Queue()
+            cls._rate_lock = asyncio.Lock()
+        cls._workers = [worker for worker in cls._workers if not worker.done()]
+        for _ in range(max(plugin_config.preference.notice_worker_num, 1) - len(cls._workers)):
+            cls._workers.append(asyncio.create_task(cls._worker()))
+
+    @classmethod
+    async def _wait_rate_limit(cls):
+        """
+        等待直到满足发送间隔限制
+        """
+        async with cls._rate_lock:
+            delay = cls._next_send_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            cls._next_send_time = time.monotonic() + plugin_config.preference.notice_send_interval
+
+    @classmethod
+    async def _send(cls, user_id: str, adapter: Optional[Adapter], message: NoticeMessage) -> bool:
+        """
+        发送单条消息，失败时按配置重试
+
+        :return: 是否发送成功
+        """
+        exception = None
+        for _ in range(plugin_config.preference.notice_max_retry_times + 1):
+            await cls._wait_rate_limit()
+            result = await cls.sender(user_id=user_id, message=message, use=adapter)
+            if result is None:
+                # 没有可用的 Bot，重试也无法发送
+                logger.warning(f"{plugin_config.preference.log_head}向用户 {user_id} 发送通知失败：没有可用的 Bot")
+                return False
+            success, exception = result
+            if success:
+                return True
+            elif exception is None:
+                # 缺少频道ID等数据问题，重试也无法发送
+                return False
+            await asyncio.sleep(plugin_config.preference.retry_interval)
+        logger.opt(exception=exception).error(
+            f"{plugin_config.preference.log_head}向用户 {user_id} 发送通知失败，已达到最大重试次数")
+        return False
+
+    @classmethod
+    async def _worker(cls):
+        """
+        发送协程，从队列中取出汇总消息并依次发送
+        """
+        while True:
+            user_id, adapter, messages, report = await cls._queue.get()
+            try:
+                for message in messages:
+                    if not await cls._send(user_id, adapter, message):
+                        break
+            except Exception:
+                logger.exception(f"{plugin_config.preference.log_head}向用户 {user_id} 发送通知时出现异常")
+            finally:
+                cls._queue.task_done()
+                if report is not None:
+                    report.notice_done()
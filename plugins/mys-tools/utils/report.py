@@ -0,0 +1,264 @@
+import contextlib
+import contextvars
+import json
+import time
+from datetime import datetime
+from typing import Dict, Optional, Iterable, Iterator, TypeVar
+
+from .common import logger
+from .metrics import Metrics
+from ..model import plugin_config, BaseApiStatus, UserAccount
+
+__all__ = ["RunReport"]
+
+_T_Account = TypeVar("_T_Account", bound=UserAccount)
+
+_current_report: contextvars.ContextVar[Optional["RunReport"]] = contextvars.ContextVar(
+    "_current_report", default=None)
+"""当前任务所属的执行报告"""
+_current_account: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("_current_account", default=None)
+"""当前任务正在处理的账户的米游社UID"""
+
+
+class RunReport:
+    """
+    定时任务的执行报告
+
+    统计一次定时任务处理的账户数、各阶段耗时、每个账户发出的请求数、失败类型分布和耗时最长的账户，
+    任务结束时以 JSON Lines 格式追加写入 ``run_report_path``。
+    任务不等待通知发送，``notifications`` 阶段为任务结束后本次任务的通知仍在发送的时长，
+    有未发送完的通知时，报告在这些通知发送完毕后才写入文件。
+    当前报告和账户通过 contextvars 传递，任务内并发执行的协程同样会计入，
+    因此阶段耗时为各协程耗时的累计值，并发执行时可能大于任务总耗时。
+
+    >>> with RunReport.start("daily_schedule") as report:
+    >>>     for account in RunReport.track_accounts(user.accounts.values()):
+    >>>         with RunReport.phase("sign"):
+    >>>             ...
+    >>> report.summary()
+    """
+    PHASES = ("record", "sign", "rewards", "missions", "build_notices", "notifications")
+    """报告中固定列出的阶段"""
+    PHASE_NAMES = {
+        "record": "获取记录",
+        "sign": "签到",
+        "rewards": "签到奖励",
+        "missions": "米游币任务",
+        "build_notices": "生成通知",
+        "notifications": "任务结束后发送通知"
+    }
+    """阶段的显示名称"""
+
+    def __init__(self, name: str):
+        """
+        :param name: 定时任务名称
+        """
+        self.name = name
+        """定时任务名称"""
+        self.start_time = time.time()
+        """开始时间"""
+        self.duration = 0.0
+        """总耗时（单位：秒）"""
+        self.finished = False
+        """是否已结束"""
+        self.phases: Dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        """{阶段: 累计耗时}"""
+        self.account_time: Dict[str, float] = {}
+        """{米游社UID: 处理耗时}"""
+        self.account_requests: Dict[str, int] = {}
+        """{米游社UID: 请求次数}"""
+        self.requests = 0
+        """请求总数（包括不属于任何账户的请求）"""
+        self.failed_requests = 0
+        """失败的请求数（网络异常或HTTP错误状态码）"""
+        self.failures: Dict[str, int] = {}
+        """{API返回结果类型.错误类型: 次数}"""
+        self.notices = 0
+        """放入发送队列的汇总通知数"""
+        self.pending_notices = 0
+        """尚未发送完毕的汇总通知数"""
+        self._end_time = 0.0
+        """任务结束时的 ``time.perf_counter()``"""
+
+    @classmethod
+    @contextlib.contextmanager
+    def start(cls, name: str) -> Iterator["RunReport"]:
+        """
+        开始记录一次定时任务，退出时写入报告文件
+
+        :param name: 定时任务名称
+        """
+        report = cls(name)
+        token = _current_report.set(report)
+        start = time.perf_counter()
+        try:
+            yield report
+        finally:
+            report._end_time = time.perf_counter()
+            report.duration = report._end_time - start
+            report.finished = True
+            _current_report.reset(token)
+            if not report.pending_notices:
+                report.save()
+
+    @classmethod
+    def current(cls) -> Optional["RunReport"]:
+        """
+        获取当前任务所属的执行报告
+        """
+        report = _current_report.get()
+        return report if report is not None and not report.finished else None
+
+    @classmethod
+    @contextlib.contextmanager
+    def phase(cls, name: str) -> Iterator[None]:
+        """
+        将代码块的耗时计入当前报告的某一阶段（没有进行中的报告时不做任何事）
+
+        :param name: 阶段名称
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if (report := cls.current()) is not None:
+                report.phases[name] = report.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @classmethod
+    def track_accounts(cls, accounts: Iterable[_T_Account]) -> Iterator[_T_Account]:
+        """
+        遍历账户，并将每次迭代的耗时和期间发出的请求计入该账户
+
+        迭代期间没有发出任何请求的账户（如未开启自动任务而被跳过）不计入处理的账户
+
+        :param accounts: 账户
+        """
+        for account in accounts:
+            token = _current_account.set(account.bbs_uid)
+            start = time.perf_counter()
+            try:
+                yield account
+            finally:
+                _current_account.reset(token)
+                report = cls.current()
+                if report is not None and account.bbs_uid in report.account_requests:
+                    report.account_time[account.bbs_uid] = \
+                        report.account_time.get(account.bbs_uid, 0.0) + time.perf_counter() - start
+
+    @classmethod
+    def _on_request(cls, _: str, outcome: str, __: float):
+        """
+        统计当前报告和账户的请求
+        """
+        if (report := cls.current()) is None:
+            return
+        report.requests += 1
+        if not outcome.isdigit() or int(outcome) >= 400:
+            report.failed_requests += 1
+        if (bbs_uid := _current_account.get()) is not None:
+            report.account_requests[bbs_uid] = report.account_requests.get(bbs_uid, 0) + 1
+
+    @classmethod
+    def _on_status(cls, status: BaseApiStatus):
+        """
+        统计当前报告中失败的API返回结果
+        """
+        if status or (report := cls.current()) is None:
+            return
+        key = f"{type(status).__name__}.{status.error_type or 'unknown'}"
+        report.failures[key] = report.failures.get(key, 0) + 1
+
+    def notice_queued(self):
+        """
+        记录一条本次任务的汇总通知放入了发送队列
+        """
+        self.notices += 1
+        self.pending_notices += 1
+
+    def notice_done(self):
+        """
+        记录一条本次任务的汇总通知发送完毕（无论成功与否），任务已结束且通知全部发送完毕时写入报告
+        """
+        self.pending_notices -= 1
+        if self.finished and not self.pending_notices:
+            self.phases["notifications"] = time.perf_counter() - self._end_time
+            self.save()
+
+    def slowest_accounts(self, top: int = 5):
+        """
+        耗时最长的账户
+
+        :return: [(米游社UID, 耗时)]
+        """
+        return sorted(self.account_time.items(), key=lambda x: x[1], reverse=True)[:top]
+
+    def dict(self):
+        """
+        转换为写入报告文件的数据
+        """
+        return {
+            "name": self.name,
+            "start_time": datetime.fromtimestamp(self.start_time).isoformat(timespec="seconds"),
+            "duration": round(self.duration, 3),
+            "accounts": len(self.account_time),
+            "phases": {name: round(value, 3) for name, value in self.phases.items()},
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "requests_per_account": self.account_requests,
+            "notices": self.notices,
+            "failures": self.failures,
+            "slowest_accounts": [[bbs_uid, round(value, 3)] for bbs_uid, value in self.slowest_accounts()]
+        }
+
+    def save(self):
+        """
+        以 JSON Lines 格式追加写入报告文件，文件超过 ``run_report_max_size`` 时先进行轮换
+        """
+        path = plugin_config.preference.run_report_path
+        if not path:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 便签检查等频繁执行的任务会不断追加报告，超过大小上限时轮换文件，只保留一份旧报告
+            max_size = plugin_config.preference.run_report_max_size
+            if max_size is not None and path.is_file() and path.stat().st_size >= max_size:
+                path.replace(path.with_name(f"{path.name}.1"))
+            with open(path, "a", encoding=plugin_config.preference.encoding) as f:
+                f.write(json.dumps(self.dict(), ensure_ascii=False) + "\n")
+        except OSError:
+            logger.exception(f"{plugin_config.preference.log_head}执行报告 - 无法写入报告文件")
+
+    def summary(self) -> str:
+        """
+        生成发送给管理员的报告摘要
+        """
+        minutes, seconds = divmod(int(self.duration), 60)
+        text = (f"📋执行报告：{self.name}"
+                f"\n🕐开始时间：{datetime.fromtimestamp(self.start_time).strftime('%Y-%m-%d %H:%M:%S')}"
+                f"\n⏱️总耗时：{minutes}分{seconds}秒"
+                f"\n🆔处理账户：{len(self.account_time)} 个"
+                f"\n🌐网络请求：{self.requests} 次，失败 {self.failed_requests} 次")
+        if self.account_time:
+            text += f"，平均每个账户 {sum(self.account_requests.values()) / len(self.account_time):.1f} 次"
+
+        text += "\n\n⏳各阶段累计耗时："
+        for name, value in self.phases.items():
+            if name == "notifications" and self.pending_notices:
+                text += f"\n- {self.PHASE_NAMES[name]}：进行中，剩余 {self.pending_notices} 条"
+            else:
+                text += f"\n- {self.PHASE_NAMES.get(name, name)}：{value:.1f}s"
+
+        if self.failures:
+            text += "\n\n⚠️失败类型："
+            for key, count in sorted(self.failures.items(), key=lambda x: x[1], reverse=True):
+                text += f"\n- {key}：{count} 次"
+
+        if slowest := self.slowest_accounts():
+            text += "\n\n🐢耗时最长的账户："
+            for bbs_uid, value in slowest:
+                text += f"\n- {bbs_uid}：{value:.1f}s，请求 {self.account_requests.get(bbs_uid, 0)} 次"
+        return text
+
+
+Metrics.add_request_listener(RunReport._on_request)
+Metrics.add_status_listener(RunReport._on_status)